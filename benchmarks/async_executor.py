@@ -0,0 +1,145 @@
+"""
+Measures the dispatch overhead of the async connector under high concurrency.
+
+Runs the same number of small queries from many concurrent tasks against an in-memory fake connection (no
+database or ODBC driver involved, each driver call optionally sleeping for --latency-ms) in two ways:
+
+- multi_hop: the pre-existing dispatch, one hop to the loop's default executor per driver call
+  (execute, fetchall, rollback);
+- single_hop: AsyncDatabaseConnector.async_execute_query, which runs the whole statement in one call on the
+  connector's dedicated executor.
+
+Reports wall time, throughput and per-query latency percentiles as JSON.
+
+Usage:
+    python -m benchmarks.async_executor --queries 20000 --concurrency 64
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+from sqlcore import AsyncDatabaseConnector
+from sqlcore.rows import convert_rows
+
+
+class FakeCursor:
+    def __init__(self, latency: float, rows: list) -> None:
+        self._latency = latency
+        self._rows = rows
+        self.description = None
+
+    def execute(self, query, params=None):
+        if self._latency:
+            time.sleep(self._latency)
+        self.description = [("id", int, None, 10, 10, 0, False), ("name", str, None, 50, 50, 0, True)]
+        return self
+
+    def fetchall(self):
+        return self._rows
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self, latency: float, rows: list) -> None:
+        self._latency = latency
+        self._rows = rows
+
+    def cursor(self):
+        return FakeCursor(self._latency, self._rows)
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class FakeConnector(AsyncDatabaseConnector):
+    def __init__(self, latency: float, rows: list, **kwargs) -> None:
+        self._latency = latency
+        self._rows = rows
+        super().__init__("fake", **kwargs)
+
+    def _connect(self):
+        return FakeConnection(self._latency, self._rows)
+
+
+async def multi_hop(db: FakeConnector, query: str) -> list:
+    loop = asyncio.get_running_loop()
+    conn = await db.get_connection()
+    try:
+        cursor = conn.cursor()
+        await loop.run_in_executor(None, cursor.execute, query)
+        columns = [col[0] for col in cursor.description]
+        result = await loop.run_in_executor(None, lambda: convert_rows(columns, cursor.fetchall(), "dict"))
+        await loop.run_in_executor(None, conn.rollback)
+        cursor.close()
+        return result
+    finally:
+        await db.release_connection(conn)
+
+
+async def single_hop(db: FakeConnector, query: str) -> list:
+    return await db.async_execute_query(query)
+
+
+async def run(mode, queries: int, concurrency: int, latency: float, rows: list) -> dict:
+    db = FakeConnector(latency, rows, pool_limit=concurrency, min_size=concurrency)
+    latencies = []
+    remaining = iter(range(queries))
+
+    async def worker() -> None:
+        for _ in remaining:
+            start = time.perf_counter()
+            await mode(db, "SELECT id, name FROM items")
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    await db.close()
+
+    latencies.sort()
+    return {
+        "mode": mode.__name__,
+        "seconds": round(elapsed, 4),
+        "queries_per_second": round(queries / elapsed),
+        "p50_ms": round(statistics.median(latencies) * 1000, 3),
+        "p99_ms": round(latencies[int(len(latencies) * 0.99) - 1] * 1000, 3),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--queries", type=int, default=20_000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--rows", type=int, default=10, help="rows returned per query")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="simulated time spent in each driver call")
+    args = parser.parse_args()
+
+    rows = [(i, f"item {i}") for i in range(args.rows)]
+    latency = args.latency_ms / 1000
+    results = [asyncio.run(run(mode, args.queries, args.concurrency, latency, rows)) for mode in (multi_hop, single_hop)]
+    print(
+        json.dumps(
+            {
+                "queries": args.queries,
+                "concurrency": args.concurrency,
+                "rows": args.rows,
+                "latency_ms": args.latency_ms,
+                "results": results,
+            },
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
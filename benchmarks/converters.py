@@ -0,0 +1,105 @@
+"""
+Compares decoding DECIMAL, UNIQUEIDENTIFIER and DATETIMEOFFSET columns with output converters against pyodbc's
+default types followed by a conversion pass over the fetched rows.
+
+pyodbc decodes DECIMAL to decimal.Decimal and UNIQUEIDENTIFIER to str by default, and cannot decode
+DATETIMEOFFSET at all, so code that wants floats, uuid.UUID and aware datetimes converts every row a second
+time. With sqlcore.converters.TypeConverters installed, the driver hands the raw value of each column to its
+converter once, while building the row. Both paths are emulated here over the same raw values, with the same
+row-building loop standing in for the driver's, so the difference is the cost of the default decoding plus the
+extra pass. The driver's own fetch loop runs in C and is cheaper than the emulated one, so the relative gain
+against a real driver is larger than reported.
+
+Usage:
+    python -m benchmarks.converters --rows 200000
+"""
+import argparse
+import decimal
+import gc
+import json
+import random
+import struct
+import time
+import uuid
+
+from sqlcore.converters import (
+    SQL_DECIMAL,
+    SQL_GUID,
+    SQL_SS_TIMESTAMPOFFSET,
+    TypeConverters,
+    datetimeoffset_to_datetime,
+)
+
+_DATETIMEOFFSET = struct.Struct("<6hI2h")
+COLUMN_TYPES = (SQL_DECIMAL, SQL_GUID, SQL_SS_TIMESTAMPOFFSET)
+
+# What pyodbc returns for each type without a converter.
+DEFAULT_DECODERS = {
+    SQL_DECIMAL: lambda value: decimal.Decimal(value.decode()),
+    SQL_GUID: lambda value: str(uuid.UUID(bytes_le=value)).upper(),
+    SQL_SS_TIMESTAMPOFFSET: bytes,
+}
+
+
+def make_raw_rows(row_count: int, seed: int = 0):
+    """Raw column values as the driver receives them: decimal text, little-endian GUIDs and offset timestamps."""
+    rng = random.Random(seed)
+    rows = []
+    for _ in range(row_count):
+        rows.append(
+            (
+                f"{rng.randrange(10**8) / 100:.2f}".encode(),
+                uuid.UUID(int=rng.getrandbits(128)).bytes_le,
+                _DATETIMEOFFSET.pack(2024, 1 + rng.randrange(12), 1 + rng.randrange(28), 12, 30, 0, 0, 2, 0),
+            )
+        )
+    return rows
+
+
+def fetch(raw_rows, decoders):
+    """Builds rows the way the driver does, decoding every value with the decoder of its column."""
+    return [tuple(decode(value) for decode, value in zip(decoders, row)) for row in raw_rows]
+
+
+def default_then_convert(raw_rows):
+    rows = fetch(raw_rows, [DEFAULT_DECODERS[sql_type] for sql_type in COLUMN_TYPES])
+    return [(float(amount), uuid.UUID(guid), datetimeoffset_to_datetime(stamp)) for amount, guid, stamp in rows]
+
+
+def with_converters(raw_rows, converters: TypeConverters):
+    return fetch(raw_rows, [converters.get_output_converter(sql_type) for sql_type in COLUMN_TYPES])
+
+
+def measure(name: str, run, repeat: int) -> dict:
+    timings = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        result = run()
+        timings.append(time.perf_counter() - start)
+        del result
+    return {"path": name, "seconds": round(min(timings), 4)}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--repeat", type=int, default=3, help="runs per path; the fastest is reported")
+    args = parser.parse_args()
+
+    raw_rows = make_raw_rows(args.rows)
+    converters = TypeConverters.fast()
+    assert default_then_convert(raw_rows[:100]) == with_converters(raw_rows[:100], converters)
+    results = [
+        measure("default_then_convert", lambda: default_then_convert(raw_rows), args.repeat),
+        measure("converters", lambda: with_converters(raw_rows, converters), args.repeat),
+    ]
+    values = args.rows * len(COLUMN_TYPES)
+    for result in results:
+        result["ns_per_value"] = round(result["seconds"] / values * 1e9, 1)
+    results[1]["speedup"] = round(results[0]["seconds"] / results[1]["seconds"], 2)
+    print(json.dumps({"rows": args.rows, "columns": len(COLUMN_TYPES), "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
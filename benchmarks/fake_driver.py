@@ -0,0 +1,205 @@
+"""
+An in-memory stand-in for pyodbc, for benchmarking the connectors without a database or ODBC driver.
+
+FakeDriver.connect() returns connections whose cursors implement the parts of the pyodbc cursor API the connectors
+use (execute, fetchall/fetchmany/fetchone, description, nextset, setinputsizes, executemany, commit/rollback).
+Every statement returns the same pre-built result, and round trips cost a configurable latency. The latency is
+spent in time.sleep(), which releases the GIL like a real driver waiting on the network, so thread and event loop
+concurrency behave as they would against a server.
+
+Example:
+    driver = FakeDriver(rows=100, width=8, execute_latency=0.0005)
+    db = FakeDatabaseConnector(driver, pool_limit=4)
+"""
+import datetime
+import decimal
+import random
+import time
+from typing import Any, List, Optional, Sequence, Tuple
+
+from sqlcore import AsyncDatabaseConnector, DatabaseConnector
+
+# Column types cycled through to build a result of the requested width, with their cursor.description type codes.
+_COLUMN_TYPES = (int, str, float, decimal.Decimal, datetime.datetime, str, int, bool)
+
+
+def make_result(rows: int, width: int, seed: int = 0) -> Tuple[List[Tuple[Any, ...]], List[Tuple[Any, ...]]]:
+    """
+    Builds a deterministic result set of rows x width values, and its cursor.description.
+
+    Returns:
+        Tuple[List[Tuple[Any, ...]], List[Tuple[Any, ...]]]: The rows and the description.
+    """
+    rng = random.Random(seed)
+    types = [_COLUMN_TYPES[i % len(_COLUMN_TYPES)] for i in range(width)]
+    description = [(f"column_{i}", type_code, None, 50, 18, 2, True) for i, type_code in enumerate(types)]
+    epoch = datetime.datetime(2024, 1, 1)
+
+    def value(type_code: type, row: int) -> Any:
+        if type_code is int:
+            return rng.randrange(1_000_000)
+        if type_code is str:
+            return f"value {row} {rng.randrange(1_000_000)}"
+        if type_code is float:
+            return rng.random() * 1000
+        if type_code is decimal.Decimal:
+            return decimal.Decimal(rng.randrange(10**8)) / 100
+        if type_code is datetime.datetime:
+            return epoch + datetime.timedelta(seconds=rng.randrange(10**7))
+        return rng.random() < 0.5
+
+    result = [tuple(value(type_code, row) for type_code in types) for row in range(rows)]
+    return result, description
+
+
+class FakeCursor:
+    def __init__(self, driver: "FakeDriver") -> None:
+        self._driver = driver
+        self._rows: List[Tuple[Any, ...]] = []
+        self._position = 0
+        self.description: Optional[List[Tuple[Any, ...]]] = None
+        self.rowcount = -1
+        self.fast_executemany = False
+
+    def execute(self, query: str, *params: Any) -> "FakeCursor":
+        self._driver.round_trip(self._driver.execute_latency)
+        if query.lstrip()[:6].upper().startswith(("SELECT", "WITH", "EXEC")):
+            self.description = self._driver.description
+            self._rows = self._driver.rows
+            self.rowcount = -1
+        else:
+            self.description = None
+            self._rows = []
+            self.rowcount = 1
+        self._position = 0
+        return self
+
+    def executemany(self, query: str, seq_of_params: Sequence[Sequence[Any]]) -> None:
+        self._driver.round_trip(self._driver.execute_latency)
+        self.description = None
+        self.rowcount = len(seq_of_params)
+
+    def setinputsizes(self, sizes: Sequence[Any]) -> None:
+        pass
+
+    def fetchmany(self, size: int) -> List[Tuple[Any, ...]]:
+        if self._position >= len(self._rows):
+            return []
+        self._driver.round_trip(self._driver.fetch_latency)
+        batch = self._rows[self._position : self._position + size]
+        self._position += len(batch)
+        return batch
+
+    def fetchall(self) -> List[Tuple[Any, ...]]:
+        self._driver.round_trip(self._driver.fetch_latency)
+        batch = self._rows[self._position :]
+        self._position = len(self._rows)
+        return batch
+
+    def fetchone(self) -> Optional[Tuple[Any, ...]]:
+        batch = self.fetchmany(1)
+        return batch[0] if batch else None
+
+    def nextset(self) -> bool:
+        self.description = None
+        self._rows = []
+        return False
+
+    def cancel(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+class FakeConnection:
+    def __init__(self, driver: "FakeDriver") -> None:
+        self._driver = driver
+        self.timeout = 0
+        self.closed = False
+
+    def cursor(self) -> FakeCursor:
+        return FakeCursor(self._driver)
+
+    def execute(self, query: str, *params: Any) -> FakeCursor:
+        return self.cursor().execute(query, *params)
+
+    def commit(self) -> None:
+        self._driver.round_trip(self._driver.commit_latency)
+
+    def rollback(self) -> None:
+        self._driver.round_trip(self._driver.commit_latency)
+
+    def add_output_converter(self, sql_type: int, func: Any) -> None:
+        pass
+
+    def get_output_converter(self, sql_type: int) -> Any:
+        return None
+
+    def clear_output_converters(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+
+class FakeDriver:
+    """
+    A configurable fake driver. Latencies are in seconds; 0 makes the corresponding call free.
+
+    Args:
+        rows (int): Rows returned by every statement that returns a result.
+        width (int): Columns of the result.
+        execute_latency (float): Cost of executing a statement (server time plus one network round trip).
+        fetch_latency (float): Cost of each fetch round trip (fetchall, or each fetchmany batch).
+        commit_latency (float): Cost of a commit or rollback.
+        connect_latency (float): Cost of opening a connection.
+        seed (int): Seed of the generated values.
+    """
+
+    def __init__(
+        self,
+        rows: int = 10,
+        width: int = 4,
+        execute_latency: float = 0.0,
+        fetch_latency: float = 0.0,
+        commit_latency: float = 0.0,
+        connect_latency: float = 0.0,
+        seed: int = 0,
+    ) -> None:
+        self.rows, self.description = make_result(rows, width, seed)
+        self.execute_latency = execute_latency
+        self.fetch_latency = fetch_latency
+        self.commit_latency = commit_latency
+        self.connect_latency = connect_latency
+
+    @staticmethod
+    def round_trip(latency: float) -> None:
+        if latency:
+            time.sleep(latency)
+
+    def connect(self, conn_string: str, autocommit: bool = False, **kwargs: Any) -> FakeConnection:
+        self.round_trip(self.connect_latency)
+        return FakeConnection(self)
+
+
+class FakeDatabaseConnector(DatabaseConnector):
+    """A DatabaseConnector whose connections come from a FakeDriver."""
+
+    def __init__(self, driver: FakeDriver, **kwargs: Any) -> None:
+        self.driver = driver
+        super().__init__("fake", **kwargs)
+
+    def _connect(self):
+        return self.driver.connect(self.conn_string, autocommit=False)
+
+
+class FakeAsyncDatabaseConnector(AsyncDatabaseConnector):
+    """An AsyncDatabaseConnector whose connections come from a FakeDriver."""
+
+    def __init__(self, driver: FakeDriver, **kwargs: Any) -> None:
+        self.driver = driver
+        super().__init__("fake", **kwargs)
+
+    def _connect(self):
+        return self.driver.connect(self.conn_string, autocommit=False)
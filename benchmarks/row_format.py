@@ -0,0 +1,66 @@
+"""
+Compares the time and memory cost of the connector row formats.
+
+Converts synthetic driver rows (lists standing in for pyodbc.Row, which is not a tuple either) with
+sqlcore.rows.convert_rows and reports, for each row_format, the conversion time and the memory retained by the
+converted result. Time and memory are measured in separate runs because tracing allocations skews timings.
+Timings are reported with and without the cyclic garbage collector, since collections triggered by millions of
+new container objects can dominate the conversion cost itself.
+
+Usage:
+    python -m benchmarks.row_format --rows 1000000 --columns 8
+"""
+import argparse
+import gc
+import json
+import time
+import tracemalloc
+
+from sqlcore.rows import ROW_FORMATS, convert_rows
+
+
+def make_rows(row_count: int, column_count: int):
+    columns = [f"column_{i}" for i in range(column_count)]
+    rows = [[i * column_count + j for j in range(column_count)] for i in range(row_count)]
+    return columns, rows
+
+
+def measure(columns, rows, row_format: str) -> dict:
+    timings = []
+    for collect in (True, False):
+        gc.collect()
+        if not collect:
+            gc.disable()
+        start = time.perf_counter()
+        result = convert_rows(columns, rows, row_format)
+        timings.append(time.perf_counter() - start)
+        gc.enable()
+        del result
+
+    gc.collect()
+    tracemalloc.start()
+    result = convert_rows(columns, rows, row_format)
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return {
+        "row_format": row_format,
+        "seconds": round(timings[0], 4),
+        "seconds_without_gc": round(timings[1], 4),
+        "retained_mb": round(retained / 2**20, 1),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--columns", type=int, default=8)
+    args = parser.parse_args()
+
+    columns, rows = make_rows(args.rows, args.columns)
+    results = [measure(columns, rows, row_format) for row_format in ROW_FORMATS]
+    print(json.dumps({"rows": args.rows, "columns": args.columns, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
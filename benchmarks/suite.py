@@ -0,0 +1,249 @@
+"""
+Throughput and latency benchmark of DatabaseConnector and AsyncDatabaseConnector against a fake driver.
+
+Runs every combination of connector, mode, pool size, concurrency, result rows and result width against
+benchmarks.fake_driver (no database or ODBC driver needed), with a configurable latency per round trip. Each
+case runs a fixed number of calls after a short warm-up and reports throughput and p50/p90/p99 latency.
+
+- sync: DatabaseConnector, called from `concurrency` threads;
+- async: AsyncDatabaseConnector, called from `concurrency` tasks;
+- modes: "query" (execute_query) and "stream" (stream_query with --batch-size).
+
+The output is JSON, with the git commit and environment, so runs can be stored and compared. --compare reads
+an earlier output, prints the change of every case and exits with status 1 if any case regressed by more than
+--threshold.
+
+Usage:
+    python -m benchmarks.suite --output baseline.json
+    python -m benchmarks.suite --compare baseline.json --threshold 0.1
+    python -m benchmarks.suite --pool-sizes 8 --concurrency 1,64 --rows 1000 --widths 32 --latency-ms 0.5
+"""
+import argparse
+import asyncio
+import json
+import platform
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+from typing import Any, Dict, List, Optional
+
+from benchmarks.fake_driver import FakeAsyncDatabaseConnector, FakeDatabaseConnector, FakeDriver
+
+QUERY = "SELECT * FROM items WHERE category = ?"
+CASE_KEYS = ("connector", "mode", "pool_size", "concurrency", "rows", "width")
+
+
+def int_list(value: str) -> List[int]:
+    return [int(item) for item in value.split(",") if item]
+
+
+def percentile(sorted_values: List[int], fraction: float) -> float:
+    """The value at the given fraction of a sorted list, by the nearest-rank method, in milliseconds."""
+    index = max(0, min(len(sorted_values) - 1, round(fraction * len(sorted_values)) - 1))
+    return sorted_values[index] / 1_000_000
+
+
+def summarize(case: Dict[str, Any], latencies: List[int], elapsed: float) -> Dict[str, Any]:
+    latencies.sort()
+    calls = len(latencies)
+    return {
+        **case,
+        "calls": calls,
+        "seconds": round(elapsed, 4),
+        "calls_per_second": round(calls / elapsed, 1),
+        "rows_per_second": round(calls * case["rows"] / elapsed),
+        "mean_ms": round(sum(latencies) / calls / 1_000_000, 4),
+        "p50_ms": round(percentile(latencies, 0.50), 4),
+        "p90_ms": round(percentile(latencies, 0.90), 4),
+        "p99_ms": round(percentile(latencies, 0.99), 4),
+    }
+
+
+def run_sync(case: Dict[str, Any], driver: FakeDriver, calls: int, warmup: int, batch_size: int) -> Dict[str, Any]:
+    db = FakeDatabaseConnector(driver, pool_limit=case["pool_size"], min_size=case["pool_size"])
+    latencies: List[int] = []
+    lock = threading.Lock()
+
+    def call() -> None:
+        if case["mode"] == "query":
+            db.execute_query(QUERY, ("books",))
+        else:
+            with closing(db.stream_query(QUERY, ("books",), batch_size=batch_size)) as rows:
+                for _ in rows:
+                    pass
+
+    def worker(remaining) -> None:
+        local = []
+        for _ in remaining:
+            start = time.perf_counter_ns()
+            call()
+            local.append(time.perf_counter_ns() - start)
+        with lock:
+            latencies.extend(local)
+
+    try:
+        with ThreadPoolExecutor(max_workers=case["concurrency"]) as threads:
+
+            def run(count: int) -> float:
+                remaining = iter(range(count))
+                start = time.perf_counter()
+                for future in [threads.submit(worker, remaining) for _ in range(case["concurrency"])]:
+                    future.result()
+                return time.perf_counter() - start
+
+            run(warmup)
+            latencies.clear()
+            elapsed = run(calls)
+    finally:
+        db.close()
+    return summarize(case, latencies, elapsed)
+
+
+async def run_async(
+    case: Dict[str, Any], driver: FakeDriver, calls: int, warmup: int, batch_size: int
+) -> Dict[str, Any]:
+    db = FakeAsyncDatabaseConnector(driver, pool_limit=case["pool_size"], min_size=case["pool_size"])
+    latencies: List[int] = []
+
+    async def call() -> None:
+        if case["mode"] == "query":
+            await db.async_execute_query(QUERY, ("books",))
+        else:
+            async for _ in db.async_stream_query(QUERY, ("books",), batch_size=batch_size):
+                pass
+
+    async def worker(remaining) -> None:
+        for _ in remaining:
+            start = time.perf_counter_ns()
+            await call()
+            latencies.append(time.perf_counter_ns() - start)
+
+    async def run(count: int) -> float:
+        remaining = iter(range(count))
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(remaining) for _ in range(case["concurrency"])))
+        return time.perf_counter() - start
+
+    try:
+        await run(warmup)
+        latencies.clear()
+        elapsed = await run(calls)
+    finally:
+        await db.close()
+    return summarize(case, latencies, elapsed)
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results: List[Dict[str, Any]], baseline: Dict[str, Any], threshold: float) -> bool:
+    """
+    Prints the change in throughput and p99 latency of every case also present in the baseline.
+    Returns whether any case lost more than threshold (a fraction) of throughput or gained as much p99 latency.
+    """
+    previous = {tuple(case[key] for key in CASE_KEYS): case for case in baseline["results"]}
+    regressed = False
+    print(f"{'case':<48} {'calls/s':>12} {'change':>8} {'p99 ms':>10} {'change':>8}", file=sys.stderr)
+    for case in results:
+        before = previous.get(tuple(case[key] for key in CASE_KEYS))
+        if before is None:
+            continue
+        throughput = case["calls_per_second"] / before["calls_per_second"] - 1
+        p99 = case["p99_ms"] / before["p99_ms"] - 1 if before["p99_ms"] else 0.0
+        slower = throughput < -threshold or p99 > threshold
+        regressed = regressed or slower
+        label = "/".join(str(case[key]) for key in CASE_KEYS)
+        print(
+            f"{label:<48} {case['calls_per_second']:>12.1f} {throughput:>+8.1%} {case['p99_ms']:>10.3f} {p99:>+8.1%}"
+            + ("  REGRESSION" if slower else ""),
+            file=sys.stderr,
+        )
+    return regressed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--connectors", default="sync,async", help="comma-separated: sync, async")
+    parser.add_argument("--modes", default="query", help="comma-separated: query, stream")
+    parser.add_argument("--pool-sizes", type=int_list, default=[1, 8])
+    parser.add_argument("--concurrency", type=int_list, default=[1, 8, 64])
+    parser.add_argument("--rows", type=int_list, default=[1, 100, 1000], help="rows returned per call")
+    parser.add_argument("--widths", type=int_list, default=[4, 32], help="columns per row")
+    parser.add_argument("--calls", type=int, default=2000, help="measured calls per case")
+    parser.add_argument("--warmup", type=int, default=50, help="unmeasured calls per case")
+    parser.add_argument("--batch-size", type=int, default=500, help="fetchmany size in stream mode")
+    parser.add_argument("--latency-ms", type=float, default=0.2, help="simulated execute round trip")
+    parser.add_argument("--fetch-latency-ms", type=float, default=0.05, help="simulated fetch round trip")
+    parser.add_argument("--output", help="write the JSON results to this file instead of stdout")
+    parser.add_argument("--compare", help="JSON output of an earlier run to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="relative change reported as a regression")
+    args = parser.parse_args()
+
+    results = []
+    for rows in args.rows:
+        for width in args.widths:
+            driver = FakeDriver(
+                rows=rows,
+                width=width,
+                execute_latency=args.latency_ms / 1000,
+                fetch_latency=args.fetch_latency_ms / 1000,
+            )
+            for connector in args.connectors.split(","):
+                for mode in args.modes.split(","):
+                    for pool_size in args.pool_sizes:
+                        for concurrency in args.concurrency:
+                            case = {
+                                "connector": connector,
+                                "mode": mode,
+                                "pool_size": pool_size,
+                                "concurrency": concurrency,
+                                "rows": rows,
+                                "width": width,
+                            }
+                            if connector == "sync":
+                                result = run_sync(case, driver, args.calls, args.warmup, args.batch_size)
+                            else:
+                                result = asyncio.run(run_async(case, driver, args.calls, args.warmup, args.batch_size))
+                            results.append(result)
+                            print("/".join(str(case[key]) for key in CASE_KEYS), "done", file=sys.stderr)
+
+    output = {
+        "suite": "sqlcore",
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "settings": {
+            "calls": args.calls,
+            "warmup": args.warmup,
+            "batch_size": args.batch_size,
+            "latency_ms": args.latency_ms,
+            "fetch_latency_ms": args.fetch_latency_ms,
+        },
+        "results": results,
+    }
+    text = json.dumps(output, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if compare(results, baseline, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -45,4 +45,43 @@ AS
 RETURN (
     SELECT 1/0 AS error
 );
-GO
\ No newline at end of file
+GO
+CREATE TABLE bulk_items (
+    id INT,
+    label NVARCHAR(50)
+);
+GO
+
+CREATE TYPE ItemTableType AS TABLE (
+    id INT,
+    label NVARCHAR(50)
+);
+GO
+
+CREATE PROCEDURE sp_insert_items
+    @items ItemTableType READONLY
+AS
+BEGIN
+    INSERT INTO bulk_items (id, label) SELECT id, label FROM @items;
+END;
+GO
+
+CREATE PROCEDURE sp_get_user_summary
+AS
+BEGIN
+    SET NOCOUNT ON;
+    SELECT * FROM users ORDER BY id;
+    SELECT COUNT(*) AS user_count FROM users;
+END;
+GO
+
+CREATE PROCEDURE sp_get_users_by_age
+    @min_age INT,
+    @name_prefix NVARCHAR(20) = NULL
+AS
+BEGIN
+    SELECT id, name, age FROM users
+    WHERE age >= @min_age AND (@name_prefix IS NULL OR name LIKE @name_prefix + '%')
+    ORDER BY id;
+END;
+GO
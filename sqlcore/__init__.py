@@ -1,4 +1,34 @@
 from .connector import DatabaseConnector
 from .async_connector import AsyncDatabaseConnector
+from .batch import BatchResult, QuerySpec
+from .cache import QueryCache
+from .converters import TypeConverters
+from .hooks import QueryEvent, QueryHooks
+from .metrics import MetricsCollector
+from .pool import AsyncConnectionPool, ConnectionPool, PoolLane
+from .retry import RetryPolicy
+from .routines import RoutineCatalog
+from .routing import AsyncRoutingDatabaseConnector, RoutingDatabaseConnector
+from .rows import Row
+from .tvp import table_valued_parameter
 
-__all__ = ["DatabaseConnector", "AsyncDatabaseConnector"]
+__all__ = [
+    "DatabaseConnector",
+    "AsyncDatabaseConnector",
+    "RoutingDatabaseConnector",
+    "AsyncRoutingDatabaseConnector",
+    "ConnectionPool",
+    "AsyncConnectionPool",
+    "PoolLane",
+    "RetryPolicy",
+    "QueryCache",
+    "TypeConverters",
+    "QueryHooks",
+    "QueryEvent",
+    "MetricsCollector",
+    "RoutineCatalog",
+    "QuerySpec",
+    "BatchResult",
+    "Row",
+    "table_valued_parameter",
+]
@@ -1,183 +1,1396 @@
 import os
 import asyncio
+import functools
+import time
 import pyodbc
-from queue import Queue
-from typing import Any, Dict, List, Optional
+from concurrent.futures import Executor, ThreadPoolExecutor
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    Hashable,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+from .batch import BatchResult, QuerySpec, check_specs, concurrency_limit, spec_call
+from .cache import QueryCache, cache_key, copy_result
+from .cancel import Cancellation, check_timeout, close_quietly, statement_error, timeout_error
+from .columnar import require_numpy, run_columnar
+from .converters import TypeConverters
+from .export import DEFAULT_ROW_GROUP_SIZE, check_export_args, export_statement
+from .hooks import (
+    QueryEvent,
+    QueryHooks,
+    connection_acquired,
+    connection_released,
+    count_columnar_rows,
+    count_exported_rows,
+    count_no_rows,
+    count_set_rows,
+    execute_finished,
+    execute_started,
+    instrumented_async,
+    rows_fetched,
+)
+from .pagination import (
+    DEFAULT_PAGE_SIZE,
+    PageKey,
+    as_row_format,
+    check_page_size,
+    fetch_format,
+    last_key,
+    page_params,
+    page_query,
+    page_start,
+    parse_page_keys,
+)
+from .partition import source_query
+from .pool import AsyncConnectionPool, PoolLane
+from .retry import RetryPolicy, connection_lost
+from .routines import RoutineCatalog, RoutineSignature, describe_routine
+from .rows import row_converter, validate_row_format
+from .statements import (
+    DEFAULT_BATCH_SIZE,
+    combine_statements,
+    execute_many_chunked,
+    execute_statement,
+    execution_error,
+    is_read_only,
+    next_result_set,
+    procedure_call,
+    run_result_sets,
+    run_statement,
+    tvf_query,
+)
+from .transaction import AsyncTransaction
+
+
+def _retrieve(future: asyncio.Future) -> None:
+    if not future.cancelled():
+        future.exception()
+
 
 class AsyncDatabaseConnector:
     """A class to handle asynchronous database connections, execute SQL queries, and manage connection pooling."""
 
-    def __init__(self, conn_string: Optional[str] = None, pool_limit: Optional[int] = 5) -> None:
-        """Initializes the AsyncDatabaseConnector with a connection string and an optional pool limit of connections."""
+    def __init__(
+        self,
+        conn_string: Optional[str] = None,
+        pool_limit: Optional[int] = 5,
+        min_size: Optional[int] = None,
+        idle_timeout: Optional[float] = None,
+        max_lifetime: Optional[float] = None,
+        health_check_interval: Optional[float] = 30.0,
+        acquire_timeout: Optional[float] = None,
+        row_format: str = "dict",
+        cache: Optional[QueryCache] = None,
+        executor: Optional[Executor] = None,
+        coalesce: bool = False,
+        routines: Optional[RoutineCatalog] = None,
+        hooks: Sequence[QueryHooks] = (),
+        query_timeout: Optional[float] = None,
+        lanes: Optional[Dict[str, PoolLane]] = None,
+        converters: Optional[TypeConverters] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        cache_namespace: Optional[str] = None,
+    ) -> None:
+        """
+        Initializes the AsyncDatabaseConnector with a connection string and an optional pool limit of connections.
+
+        Args:
+            conn_string (Optional[str]): ODBC connection string. Falls back to the SQL_CONN_STRING environment variable.
+            pool_limit (Optional[int]): Maximum number of pooled connections. None or 0 opens a new connection per query.
+            min_size (Optional[int]): Connections opened up front (in parallel) and kept open while idle. Defaults to 1.
+            idle_timeout (Optional[float]): Seconds after which idle connections above min_size are closed. None keeps them.
+            max_lifetime (Optional[float]): Seconds after which a connection is closed and replaced when it is released.
+            health_check_interval (Optional[float]): Connections idle for at least this many seconds are pinged before
+                being handed out, and replaced if they are dead. None disables the check.
+            acquire_timeout (Optional[float]): Default number of seconds to wait for a pooled connection. None waits indefinitely.
+            row_format (str): How result rows are returned: "dict" (the default), "tuple", or "row" for compact
+                sqlcore.rows.Row objects that support both name and position lookup. Can be overridden per call.
+            cache (Optional[QueryCache]): Result cache used by calls that pass cache_ttl. None disables caching.
+            executor (Optional[Executor]): Executor that runs the blocking driver calls. Defaults to dedicated
+                thread pools owned and shut down by the connector: two threads per pooled connection for statements,
+                so that cancelled statements still running in the driver do not take every thread, and one per
+                pooled connection for connecting, pinging and closing connections.
+            coalesce (bool): Coalesce identical concurrent reads by default: while a SELECT query or TVF call is in
+                flight, identical calls await its result instead of running again. Can be overridden per call.
+            routines (Optional[RoutineCatalog]): Cache of procedure and TVF signatures. When set, stored procedures
+                and TVFs are described once and then called through typed call templates, with their arguments
+                validated on the client. None builds untyped calls.
+            hooks (Sequence[QueryHooks]): Instrumentation hooks notified of connection checkouts, executions,
+                fetches and errors, e.g. a MetricsCollector. Hooks run on the event loop thread.
+            query_timeout (Optional[float]): Default number of seconds a statement may run before it is cancelled on
+                the server and TimeoutError is raised. Applies to the same calls as DatabaseConnector's query_timeout
+                and can be overridden per call. None lets statements run indefinitely; cancelling the awaiting task
+                cancels the statement either way.
+            lanes (Optional[Dict[str, PoolLane]]): Named shares of the pool with reserved and maximum sizes and
+                priorities. See DatabaseConnector.
+            converters (Optional[TypeConverters]): Output converters installed on every connection the connector
+                opens, e.g. TypeConverters.fast(). See DatabaseConnector.
+            retry_policy (Optional[RetryPolicy]): Runs calls again after transient failures, waiting with
+                asyncio.sleep() between attempts. Reads are retried, writes and procedures only when called with
+                retry=True. See DatabaseConnector.
+            cache_namespace (Optional[str]): Identifies the database in the cache keys of this connector. Defaults
+                to the connection string. See DatabaseConnector.
+        """
         self.conn_string = conn_string or os.getenv("SQL_CONN_STRING")
         if not self.conn_string:
             raise ValueError("SQL connection string is not set")
 
         self.pool_limit = pool_limit
+        self.acquire_timeout = acquire_timeout
+        self.row_format = validate_row_format(row_format)
+        self.cache = cache
+        self.coalesce = coalesce
+        self.routines = routines
+        self.query_timeout = check_timeout(query_timeout)
+        self.converters = converters.copy() if converters else None
+        self._converters_key = self.converters.key() if self.converters else None
+        self.retry_policy = retry_policy
+        self.cache_namespace = self.conn_string if cache_namespace is None else cache_namespace
+        self.hooks: List[QueryHooks] = list(hooks)
+        self._checked_out: Dict[int, int] = {}
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self._flights = 0
+        self._joined = 0
         self.pool = None
+        self._transaction: ContextVar = ContextVar(f"sqlcore_transaction_{id(self)}", default=None)
+        self._lane: ContextVar = ContextVar(f"sqlcore_lane_{id(self)}", default=None)
+        # Driver calls run on a dedicated pool rather than the loop's default executor, so they do not queue
+        # behind (or starve) unrelated blocking work. A cancelled statement frees its pool slot at once but keeps
+        # its thread until the driver returns, so the pool gets twice as many threads as connections: up to
+        # pool_limit statements stuck on a slow or unreachable server do not leave free connections without a
+        # thread to run on. Connecting, pinging and closing connections run on a separate, smaller pool so that
+        # they are not held up by statements either.
+        self._owns_executor = executor is None
+        self._executor = executor or ThreadPoolExecutor(
+            max_workers=2 * pool_limit if pool_limit else None, thread_name_prefix="sqlcore"
+        )
+        self._pool_executor = executor or ThreadPoolExecutor(
+            max_workers=pool_limit or None, thread_name_prefix="sqlcore-pool"
+        )
 
         if pool_limit is not None and pool_limit > 0:
-            self.pool = Queue(maxsize=pool_limit)
-            for _ in range(pool_limit):
-                # Note: autocommit is set to False so that we can explicitly control transactions.
-                self.pool.put(pyodbc.connect(self.conn_string, autocommit=False))
-
-    async def get_connection(self):
-        """Retrieve a connection from the pool or create a new one if the pool is unlimited."""
-        if self.pool:
-            return self.pool.get()
+            self.pool = AsyncConnectionPool(
+                self._connect,
+                min_size=min(1, pool_limit) if min_size is None else min_size,
+                max_size=pool_limit,
+                idle_timeout=idle_timeout,
+                max_lifetime=max_lifetime,
+                health_check_interval=health_check_interval,
+                executor=self._pool_executor,
+                lanes=lanes,
+            )
+            self.pool.warm_up()
+        elif lanes:
+            raise ValueError("lanes require a connection pool (pool_limit)")
+
+    def _connect(self):
+        # Note: autocommit is set to False so that we can explicitly control transactions.
+        conn = pyodbc.connect(self.conn_string, autocommit=False)
+        if self.converters:
+            self.converters.install(conn)
+        return conn
+
+    async def get_connection(self, timeout: Optional[float] = None, lane: Optional[str] = None):
+        """
+        Retrieve a connection from the pool or create a new one if the pool is unlimited.
+
+        When every pooled connection is checked out the coroutine waits, in FIFO order with other callers of its
+        lane's priority, without blocking the event loop. Inside transaction() or session() this returns the pinned
+        connection.
+
+        Args:
+            timeout (Optional[float]): Seconds to wait for a pooled connection. Defaults to the connector's acquire_timeout.
+            lane (Optional[str]): Pool lane to check the connection out from. Defaults to the one chosen with lane().
+
+        Raises:
+            TimeoutError: If no pooled connection became available in time.
+            ValueError: If lane is not one of the pool's lanes.
+        """
+        transaction = self._transaction.get()
+        if transaction is not None:
+            return transaction.conn
+        if not self.hooks:
+            return await self._checkout(timeout, lane)
+        started = time.perf_counter_ns()
+        conn = await self._checkout(timeout, lane)
+        acquired = time.perf_counter_ns()
+        self._checked_out[id(conn)] = acquired
+        connection_acquired(self.hooks, acquired - started)
+        return conn
+
+    async def _checkout(self, timeout: Optional[float], lane: Optional[str]):
+        if self.pool is not None:
+            return await self.pool.acquire(
+                timeout if timeout is not None else self.acquire_timeout, self._lane.get() if lane is None else lane
+            )
         else:
-            loop = asyncio.get_running_loop()
-            return await loop.run_in_executor(None, pyodbc.connect, self.conn_string, False)
+            return await self.run_blocking(self._connect)
 
     async def release_connection(self, conn):
         """Release a connection back to the pool or close it if the pool is unlimited."""
-        if self.pool:
-            self.pool.put(conn)
+        if self._pinned(conn) is not None:
+            return
+        self._released(conn)
+        if self.pool is not None:
+            await self.pool.release(conn)
+        else:
+            await self.run_blocking(conn.close)
+
+    async def discard_connection(self, conn):
+        """
+        Closes a checked-out connection that must not be reused, e.g. after its statement was cancelled, and frees
+        its slot in the pool.
+        """
+        self._released(conn)
+        if self.pool is not None:
+            await self.pool.discard(conn)
         else:
-            loop = asyncio.get_running_loop()
-            await loop.run_in_executor(None, conn.close)
+            await self.run_blocking(close_quietly, conn)
+
+    def _released(self, conn) -> None:
+        if self._checked_out:
+            acquired = self._checked_out.pop(id(conn), None)
+            if acquired is not None and self.hooks:
+                connection_released(self.hooks, time.perf_counter_ns() - acquired)
+
+    @asynccontextmanager
+    async def connection(self, timeout: Optional[float] = None, lane: Optional[str] = None):
+        """
+        Async context manager that checks out a connection and always releases it on exit.
+
+        Example:
+            async with db.connection(timeout=5) as conn:
+                ...
+        """
+        conn = await self.get_connection(timeout, lane)
+        try:
+            yield conn
+        finally:
+            await self.release_connection(conn)
+
+    @contextmanager
+    def lane(self, name: str):
+        """
+        Context manager that makes every call inside it, in this task, check its connection out from the given pool
+        lane. Tasks started inside it inherit the lane. See DatabaseConnector.lane.
+
+        Example:
+            with db.lane("batch"):
+                await db.async_export_query("SELECT * FROM events", None, "events.csv")
+        """
+        if self.pool is not None:
+            self.pool.lane(name)
+        token = self._lane.set(name)
+        try:
+            yield
+        finally:
+            self._lane.reset(token)
+
+    def add_hook(self, hook: QueryHooks) -> None:
+        """Registers an instrumentation hook. See DatabaseConnector.add_hook."""
+        self.hooks.append(hook)
+
+    def remove_hook(self, hook: QueryHooks) -> None:
+        """Unregisters a hook added with add_hook() or the hooks argument."""
+        self.hooks.remove(hook)
+
+    def pool_stats(self) -> Dict[str, Any]:
+        """Returns pool size and usage metrics such as the number of waiters and connections recycled or evicted."""
+        if self.pool is None:
+            return {}
+        return self.pool.stats()
+
+    def cache_stats(self) -> Dict[str, Any]:
+        """Returns the result cache's hit/miss counters and size, or an empty dict if no cache is configured."""
+        if self.cache is None:
+            return {}
+        return self.cache.stats()
+
+    def coalesce_stats(self) -> Dict[str, Any]:
+        """
+        Returns how many shared calls were started, how many callers joined one that was already in flight instead
+        of running their own, and how many are in flight now. Covers both coalesced calls and cache misses.
+        """
+        return {"in_flight": len(self._inflight), "started": self._flights, "joined": self._joined}
+
+    def retry_stats(self) -> Dict[str, Any]:
+        """Returns the retry policy's retry and give-up counters, or an empty dict if no policy is configured."""
+        if self.retry_policy is None:
+            return {}
+        return self.retry_policy.stats()
+
+    def transaction(self) -> AsyncTransaction:
+        """
+        Returns an async context manager that runs every call made inside it on one pinned connection, as one
+        transaction: committed once when the block exits cleanly and rolled back if it raises. Nested transaction()
+        blocks become savepoints. See DatabaseConnector.transaction.
+
+        Example:
+            async with db.transaction() as tx:
+                await db.async_execute_query("UPDATE accounts SET balance = balance - ? WHERE id = ?", (10, 1))
+                await db.async_execute_stored_procedure("sp_log_transfer", 1, 2, 10)
+        """
+        return AsyncTransaction(self, self._transaction, atomic=True)
+
+    def session(self) -> AsyncTransaction:
+        """
+        Returns an async context manager that pins one connection for every call made inside it, without making
+        the block atomic. Writes still commit as they run, but reads no longer pay a rollback round trip each.
+        """
+        return AsyncTransaction(self, self._transaction, atomic=False)
+
+    def _pinned(self, conn) -> Optional[AsyncTransaction]:
+        """Returns the transaction or session that conn is pinned to in the current context, if any."""
+        transaction = self._transaction.get()
+        return transaction if transaction is not None and transaction.conn is conn else None
+
+    def _autocommits(self, conn) -> bool:
+        """Whether statements on conn commit individually, i.e. they are not part of an enclosing transaction."""
+        transaction = self._pinned(conn)
+        return transaction is None or not transaction.deferred
+
+    async def run_blocking(self, func, *args: Any) -> Any:
+        """
+        Runs a blocking call, e.g. a driver method of a checked-out connection, in the connector's executor and
+        returns its result.
+        """
+        return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+
+    def _row_format(self, row_format: Optional[str]) -> str:
+        return self.row_format if row_format is None else validate_row_format(row_format)
 
-    async def async_execute_query(self, query: str, params: Optional[tuple] = None) -> List[Dict[str, Any]]:
+    async def async_execute_query(
+        self,
+        query: str,
+        params: Optional[tuple] = None,
+        row_format: Optional[str] = None,
+        cache_ttl: Optional[float] = None,
+        cache_tags: Sequence[str] = (),
+        coalesce: Optional[bool] = None,
+        timeout: Optional[float] = None,
+        lane: Optional[str] = None,
+        converters: Optional[TypeConverters] = None,
+        retry: Optional[bool] = None,
+    ) -> List[Any]:
         """
         Asynchronously executes the given SQL query with optional parameters and returns the result as a list of dictionaries.
         For SELECT queries (which return a result set), a rollback is issued afterward to clear the transaction.
+        Pass cache_ttl to serve repeated reads from the connector's cache; concurrent misses share one query.
+        See DatabaseConnector.execute_query. coalesce overrides the connector's coalesce setting; only queries
+        that are plainly reads (SELECT without INTO, no writes in the batch) are ever coalesced.
+        timeout overrides the connector's query_timeout, lane the pool lane chosen with lane() and converters
+        the connector's output converters. retry decides whether the connector's retry_policy applies: by default
+        it retries reads only.
+        """
+        return await self._execute(
+            "query",
+            query,
+            query,
+            params,
+            row_format,
+            cache_ttl=cache_ttl,
+            cache_tags=cache_tags,
+            coalesce=coalesce,
+            timeout=timeout,
+            lane=lane,
+            converters=converters,
+            retry=retry,
+        )
+
+    async def async_execute_stored_procedure(
+        self,
+        proc_name: str,
+        *args: Any,
+        timeout: Optional[float] = None,
+        lane: Optional[str] = None,
+        retry: Optional[bool] = None,
+    ) -> None:
+        """
+        Asynchronously executes a stored procedure with the given name and parameters.
+        (This version does not return results.) Pass retry=True to retry transient failures, such as being chosen
+        as a deadlock victim, under the connector's retry_policy.
+        """
+        await self._execute(
+            "procedure",
+            proc_name,
+            procedure_call(proc_name, len(args)),
+            args,
+            fetch=False,
+            timeout=timeout,
+            lane=lane,
+            retry=retry,
+        )
+
+    async def async_execute_and_return_stored_procedure(
+        self,
+        proc_name: str,
+        *args: Any,
+        row_format: Optional[str] = None,
+        cache_ttl: Optional[float] = None,
+        cache_tags: Sequence[str] = (),
+        coalesce: Optional[bool] = None,
+        timeout: Optional[float] = None,
+        lane: Optional[str] = None,
+        converters: Optional[TypeConverters] = None,
+        retry: Optional[bool] = None,
+    ) -> List[Any]:
         """
-        conn = await self.get_connection()
+        Asynchronously executes a stored procedure and returns the result if available.
+        For procedures that return a result set, a rollback is issued afterward.
+
+        Pass coalesce=True for read-only procedures that are called with the same arguments by many tasks at once:
+        while one call is in flight, identical calls await its result instead of taking another connection.
+        Procedures are never coalesced by default, since they may write.
+        """
+        return await self._execute(
+            "procedure",
+            proc_name,
+            procedure_call(proc_name, len(args)),
+            args,
+            row_format,
+            cache_ttl=cache_ttl,
+            cache_tags=cache_tags,
+            coalesce=coalesce,
+            timeout=timeout,
+            lane=lane,
+            converters=converters,
+            retry=retry,
+        )
+
+    async def async_execute_many(
+        self,
+        query: str,
+        rows: Iterable[Sequence[Any]],
+        chunk_size: int = DEFAULT_BATCH_SIZE,
+        commit_per_chunk: bool = False,
+        fast_executemany: bool = True,
+        timeout: Optional[float] = None,
+        lane: Optional[str] = None,
+    ) -> int:
+        """
+        Asynchronously executes a parameterized statement once for every row of parameters, on one connection.
+        The whole chunked load runs in the executor, under timeout. See DatabaseConnector.execute_many.
+        """
+        return await self._execute_many(
+            "query", query, query, (), rows, chunk_size, commit_per_chunk, fast_executemany, timeout, lane
+        )
+
+    @instrumented_async(count_no_rows)
+    async def _execute_many(
+        self,
+        kind: str,
+        name: str,
+        query: str,
+        params: Sequence[Any],
+        rows: Iterable[Sequence[Any]],
+        chunk_size: int,
+        commit_per_chunk: bool,
+        fast_executemany: bool,
+        timeout: Optional[float] = None,
+        lane: Optional[str] = None,
+    ) -> int:
+        conn = await self.get_connection(lane=lane)
+        cancellation = self._cancellation(timeout)
+        lost = False
         try:
-            loop = asyncio.get_running_loop()
-            cursor = conn.cursor()
-            if params:
-                await loop.run_in_executor(None, cursor.execute, query, params)
-            else:
-                await loop.run_in_executor(None, cursor.execute, query)
+            return await self._run_cancellable(
+                conn,
+                cancellation,
+                functools.partial(
+                    execute_many_chunked,
+                    conn,
+                    query,
+                    rows,
+                    chunk_size,
+                    commit_per_chunk,
+                    fast_executemany,
+                    self._autocommits(conn),
+                    cancellation,
+                ),
+            )
+        except pyodbc.Error as e:
+            lost = connection_lost(e)
+            raise statement_error(e, kind, name, params, cancellation) from e
+        except asyncio.TimeoutError:
+            raise timeout_error(kind, name, cancellation) from None
+        finally:
+            await self._end_statement(conn, cancellation, lost)
 
-            if cursor.description:  # Query returned rows
-                columns = [col[0] for col in cursor.description]
-                result = await loop.run_in_executor(
-                    None, lambda: [dict(zip(columns, row)) for row in cursor.fetchall()]
-                )
-                # Clear the transaction so that subsequent queries on this connection are not affected.
-                await loop.run_in_executor(None, conn.rollback)
-                return result
-            else:
-                # For queries that do not return rows, commit the transaction.
-                await loop.run_in_executor(None, cursor.commit)
-                return []
-        except pyodbc.ProgrammingError as e:
-            raise ValueError(f"Query execution failed: {query}. Error: {str(e)}") from e
+    async def async_execute_tvf_and_fetch_results(
+        self,
+        tvf_name: str,
+        *parameters: Any,
+        row_format: Optional[str] = None,
+        cache_ttl: Optional[float] = None,
+        cache_tags: Sequence[str] = (),
+        coalesce: Optional[bool] = None,
+        timeout: Optional[float] = None,
+        lane: Optional[str] = None,
+        converters: Optional[TypeConverters] = None,
+        retry: Optional[bool] = None,
+    ) -> List[Any]:
+        """
+        Asynchronously executes a table-valued function (TVF) with optional parameters and returns the results.
+        The query prepends the 'dbo.' schema. A rollback is issued after fetching the result.
+        """
+        return await self._execute(
+            "tvf",
+            tvf_name,
+            tvf_query(tvf_name, len(parameters)),
+            parameters,
+            row_format,
+            cache_ttl=cache_ttl,
+            cache_tags=cache_tags,
+            coalesce=coalesce,
+            timeout=timeout,
+            lane=lane,
+            converters=converters,
+            retry=retry,
+        )
+
+    async def _execute(
+        self,
+        kind: str,
+        name: str,
+        query: str,
+        params: Optional[Sequence[Any]],
+        row_format: Optional[str] = None,
+        fetch: bool = True,
+        cache_ttl: Optional[float] = None,
+        cache_tags: Sequence[str] = (),
+        coalesce: Optional[bool] = None,
+        timeout: Optional[float] = None,
+        lane: Optional[str] = None,
+        converters: Optional[TypeConverters] = None,
+        retry: Optional[bool] = None,
+    ) -> List[Any]:
+        """
+        Runs one statement on a pooled (or pinned) connection, or serves it from the cache when cache_ttl is set.
+
+        Concurrent cache misses for the same key share one query: the first caller runs it and the others await
+        its result. Coalesced calls do the same without storing the result.
+        """
+        row_format = self._row_format(row_format)
+        key = self._cache_key(query, params, row_format, cache_ttl, converters)
+        statement = functools.partial(
+            self._run_statement, kind, name, query, params, row_format, fetch, timeout, lane, converters
+        )
+        run = functools.partial(self._retrying, query, retry, statement)
+        if key is not None:
+            result, generation = self.cache.get(key)
+            if result is None:
+
+                async def fetch_and_store() -> List[Any]:
+                    result = await run()
+                    self.cache.put(key, result, cache_ttl, cache_tags, generation)
+                    return result
+
+                result = await self._single_flight(key, fetch_and_store)
+            return copy_result(result)
+
+        key = self._coalesce_key(kind, query, params, row_format, coalesce, converters)
+        if key is not None:
+            return copy_result(await self._single_flight(key, run))
+        return await run()
+
+    def _cache_key(
+        self,
+        query: str,
+        params: Optional[Sequence[Any]],
+        row_format: str,
+        cache_ttl: Optional[float],
+        converters: Optional[TypeConverters] = None,
+    ):
+        """Returns the cache key of a call, or None if it is not to be cached."""
+        if cache_ttl is None:
+            return None
+        if self.cache is None:
+            raise ValueError("cache_ttl requires a connector created with a QueryCache")
+        # Inside a transaction reads may see uncommitted changes, which must not leak into the shared cache.
+        if self._transaction.get() is not None:
+            return None
+        return cache_key(query, params, row_format, self._converters_fingerprint(converters), self.cache_namespace)
+
+    def _coalesce_key(
+        self,
+        kind: str,
+        query: str,
+        params: Optional[Sequence[Any]],
+        row_format: str,
+        coalesce: Optional[bool],
+        converters: Optional[TypeConverters] = None,
+    ):
+        """Returns the key under which a call is coalesced, or None if it must run on its own."""
+        if coalesce is None:
+            # Procedures may write, so they are only coalesced when the caller asks for it explicitly.
+            coalesce = self.coalesce and kind != "procedure"
+        if not coalesce or self._transaction.get() is not None:
+            return None
+        if kind == "query" and not is_read_only(query):
+            return None
+        key = cache_key(query, params, row_format, self._converters_fingerprint(converters))
+        return None if key is None else ("coalesce", key)
+
+    def _converters_fingerprint(self, converters: Optional[TypeConverters]) -> Hashable:
+        """Identifies the output converters a call's result is decoded with, for its cache or coalescing key."""
+        return self._converters_key, converters.key() if converters else None
+
+    async def _retrying(self, query: str, retry: Optional[bool], run: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Awaits run(), and awaits it again after transient failures if the retry policy applies to the call.
+        See DatabaseConnector._retrying.
+        """
+        policy = self.retry_policy
+        if policy is None or retry is False or self._transaction.get() is not None:
+            return await run()
+        if not retry and not is_read_only(query):
+            return await run()
+        attempt = 1
+        while True:
+            try:
+                return await run()
+            except Exception as e:
+                delay = policy.next_delay(e, attempt)
+                if delay is None:
+                    raise
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    async def _single_flight(self, key: Hashable, factory: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Awaits factory(), unless a call with the same key is already in flight, in which case its result is awaited
+        instead.
+
+        The work runs in its own task, so cancelling one caller (even the first) does not cancel it for the others.
+        """
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(factory())
+            self._inflight[key] = task
+            self._flights += 1
+            task.add_done_callback(functools.partial(self._flight_done, key))
+        else:
+            self._joined += 1
+        return await asyncio.shield(task)
+
+    def _flight_done(self, key: Hashable, task: "asyncio.Future") -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            # Mark the exception as retrieved in case every caller was cancelled before it was raised.
+            task.exception()
+
+    @instrumented_async()
+    async def _run_statement(
+        self,
+        kind: str,
+        name: str,
+        query: str,
+        params: Optional[Sequence[Any]],
+        row_format: str,
+        fetch: bool,
+        timeout: Optional[float] = None,
+        lane: Optional[str] = None,
+        converters: Optional[TypeConverters] = None,
+    ) -> List[Any]:
+        """
+        Runs one statement and translates driver errors.
+
+        Execute, fetch, conversion and commit or rollback happen in a single executor call. What to commit or roll
+        back is decided here, in the caller's context, because the executor thread does not see the pinned
+        transaction.
+        """
+        conn = await self.get_connection(lane=lane)
+        cancellation = self._cancellation(timeout)
+        lost = False
+        try:
+            unpinned = self._pinned(conn) is None
+            query, input_sizes = await self._routine_call(conn, kind, name, query, params)
+            return await self._run_cancellable(
+                conn,
+                cancellation,
+                functools.partial(
+                    run_statement,
+                    conn,
+                    query,
+                    params,
+                    row_format,
+                    fetch=fetch,
+                    commit=self._autocommits(conn),
+                    rollback=unpinned,
+                    # Clear the read transaction so that subsequent queries on this connection are not affected.
+                    rollback_reads=unpinned,
+                    input_sizes=input_sizes,
+                    cancellation=cancellation,
+                    converters=converters,
+                ),
+            )
         except pyodbc.Error as e:
-            raise pyodbc.Error(f"Database error occurred: {str(e)}") from e
+            lost = connection_lost(e)
+            raise statement_error(e, kind, name, params, cancellation) from e
+        except asyncio.TimeoutError:
+            raise timeout_error(kind, name, cancellation) from None
         finally:
-            cursor.close()
+            await self._end_statement(conn, cancellation, lost)
+
+    def _cancellation(self, timeout: Optional[float]) -> Cancellation:
+        return Cancellation(self.query_timeout if timeout is None else check_timeout(timeout))
+
+    async def _run_cancellable(self, conn, cancellation: Cancellation, func: Callable[[], Any]) -> Any:
+        """
+        Runs a blocking statement call on conn in the executor, so that it can be stopped while it runs.
+
+        When the statement's timeout passes or the awaiting task is cancelled, the statement is cancelled on the
+        server with cursor.cancel() and, unless conn is pinned, the connection is abandoned to the executor thread,
+        which closes it once the driver call returns: _end_statement() then frees its pool slot without waiting.
+        A pinned connection cannot be replaced, so the call waits for the statement to stop instead.
+        """
+        future = asyncio.get_running_loop().run_in_executor(self._executor, cancellation.run, conn, func)
+        try:
+            if cancellation.timeout is None:
+                return await asyncio.shield(future)
+            return await asyncio.wait_for(asyncio.shield(future), cancellation.timeout)
+        except (asyncio.CancelledError, asyncio.TimeoutError) as e:
+            timed_out = isinstance(e, asyncio.TimeoutError)
+            if future.done():
+                if timed_out:
+                    return future.result()
+                raise
+            # The statement fails with HY008 once cancelled; nobody is left to read that error.
+            future.add_done_callback(_retrieve)
+            cancellation.cancel(timed_out=timed_out)
+            if self._pinned(conn) is not None or not cancellation.abandon():
+                await asyncio.wait([future])
+            raise
+
+    async def _end_statement(self, conn, cancellation: Cancellation, lost: bool = False) -> None:
+        """
+        Releases a statement's connection, discards it if the statement was cancelled or the connection was lost,
+        or detaches it if abandoned. A lost connection also makes the pool check its idle connections.
+        """
+        if cancellation.abandoned:
+            self._released(conn)
+            if self.pool is not None:
+                self.pool.detach(conn)
+        elif self._pinned(conn) is not None:
+            await self.release_connection(conn)
+        elif lost:
+            await self.discard_connection(conn)
+            if self.pool is not None:
+                self.pool.check_idle()
+        elif cancellation.cancelled:
+            await self.discard_connection(conn)
+        else:
             await self.release_connection(conn)
 
-    async def async_execute_stored_procedure(self, proc_name: str, *args: Any) -> None:
+    async def _routine_call(
+        self, conn, kind: str, name: str, query: str, params: Optional[Sequence[Any]]
+    ) -> Tuple[str, Optional[List[Any]]]:
         """
-        Asynchronously executes a stored procedure with the given name and parameters.
-        (This version does not return results.)
+        Returns the SQL text and parameter type declarations of a call. See DatabaseConnector._routine_call.
+        Only the first call of a routine pays an executor hop, to describe it.
+        """
+        if self.routines is None or kind == "query":
+            return query, None
+        signature = self.routines.get(kind, name)
+        if signature is None:
+            signature = await self.run_blocking(self.routines.signature, conn, kind, name)
+        return signature.bind(params)
+
+    async def async_describe_routine(self, name: str, kind: str = "procedure") -> RoutineSignature:
         """
-        conn = await self.get_connection()
+        Asynchronously returns the parameters and result columns of a stored procedure or TVF.
+        See DatabaseConnector.describe_routine.
+        """
+        async with self.connection() as conn:
+            unpinned = self._pinned(conn) is None
+
+            def describe() -> RoutineSignature:
+                if self.routines is not None:
+                    signature = self.routines.signature(conn, kind, name)
+                else:
+                    signature = describe_routine(conn, kind, name)
+                if unpinned:
+                    conn.rollback()
+                return signature
+
+            try:
+                return await self.run_blocking(describe)
+            except pyodbc.Error as e:
+                raise execution_error(e, kind, name, ()) from e
+
+    async def async_execute_batch(
+        self, specs: Iterable[QuerySpec], max_concurrency: Optional[int] = None
+    ) -> List[BatchResult]:
+        """
+        Runs many queries, stored procedures and TVF calls concurrently and returns their results in the order of
+        specs. At most max_concurrency calls (by default the pool size) run at once, and a failing call returns
+        its exception in its BatchResult instead of stopping the others. See DatabaseConnector.execute_batch.
+
+        Example:
+            results = await db.async_execute_batch([QuerySpec.procedure("sp_widget", n) for n in range(50)])
+        """
+        results = [result async for result in self.async_execute_batch_as_completed(specs, max_concurrency)]
+        results.sort(key=lambda result: result.index)
+        return results
+
+    def async_execute_batch_as_completed(
+        self, specs: Iterable[QuerySpec], max_concurrency: Optional[int] = None
+    ) -> AsyncIterator[BatchResult]:
+        """
+        Like async_execute_batch(), but yields each BatchResult as soon as its call finishes. Use BatchResult.index
+        to match results to specs. Closing the iterator early cancels the calls still running.
+
+        Inside transaction() or session() the calls start at once and run one after another on the pinned
+        connection, and the transaction waits for them before it commits or rolls back, so iterating after the
+        block has ended yields their results instead of running them outside of it. As with any statement in a
+        transaction, run nothing else on it until they have finished.
+        """
+        specs = check_specs(specs)
+        transaction = self._transaction.get()
+        if transaction is not None:
+            # The task copies the current context, so its calls use the pinned connection.
+            batch = asyncio.ensure_future(self._run_pinned(specs))
+            transaction.hold(batch)
+            return self._replay(batch)
+        return self._fan_out(specs, concurrency_limit(max_concurrency, self.pool_limit, len(specs)))
+
+    async def _run_pinned(self, specs: List[QuerySpec]) -> List[BatchResult]:
+        results = []
+        for index, spec in enumerate(specs):
+            try:
+                results.append(BatchResult(index, spec, rows=await spec_call(self, spec, "async_")))
+            except Exception as e:
+                results.append(BatchResult(index, spec, error=e))
+        return results
+
+    @staticmethod
+    async def _replay(batch: "asyncio.Future[List[BatchResult]]") -> AsyncIterator[BatchResult]:
+        for result in await batch:
+            yield result
+
+    async def _fan_out(self, specs: List[QuerySpec], limit: int) -> AsyncIterator[BatchResult]:
+        semaphore = asyncio.Semaphore(limit)
+
+        async def run(index: int, spec: QuerySpec) -> BatchResult:
+            async with semaphore:
+                try:
+                    return BatchResult(index, spec, rows=await spec_call(self, spec, "async_"))
+                except Exception as e:
+                    return BatchResult(index, spec, error=e)
+
+        tasks = [asyncio.ensure_future(run(index, spec)) for index, spec in enumerate(specs)]
         try:
-            loop = asyncio.get_running_loop()
-            cursor = conn.cursor()
-            param_placeholders = ", ".join(["?"] * len(args))
-            await loop.run_in_executor(
-                None, cursor.execute, f"EXEC {proc_name} {param_placeholders}", *args
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def async_execute_query_columnar(
+        self,
+        query: str,
+        params: Optional[tuple] = None,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        timeout: Optional[float] = None,
+        lane: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        Asynchronously executes the given SQL query and returns the result column by column as numpy masked arrays.
+        The batches are fetched and converted in the executor, under timeout. See
+        DatabaseConnector.execute_query_columnar.
+        """
+        require_numpy()
+        return await self._execute_columnar("query", query, query, params, batch_size, timeout, lane)
+
+    @instrumented_async(count_columnar_rows)
+    async def _execute_columnar(
+        self,
+        kind: str,
+        name: str,
+        query: str,
+        params: Optional[tuple],
+        batch_size: int,
+        timeout: Optional[float] = None,
+        lane: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        conn = await self.get_connection(lane=lane)
+        cancellation = self._cancellation(timeout)
+        lost = False
+        try:
+            unpinned = self._pinned(conn) is None
+            return await self._run_cancellable(
+                conn,
+                cancellation,
+                functools.partial(
+                    run_columnar,
+                    conn,
+                    query,
+                    params,
+                    batch_size,
+                    commit=self._autocommits(conn),
+                    rollback=unpinned,
+                    rollback_reads=unpinned,
+                    cancellation=cancellation,
+                ),
             )
-            await loop.run_in_executor(None, cursor.commit)
-        except pyodbc.ProgrammingError as e:
-            raise ValueError(
-                f"Stored procedure execution failed: '{proc_name}' with parameters {args}. Error: {str(e)}"
-            ) from e
         except pyodbc.Error as e:
-            await loop.run_in_executor(None, conn.rollback)
-            raise pyodbc.Error(
-                f"Database error while executing stored procedure: '{proc_name}' with parameters {args}. Error: {str(e)}"
-            ) from e
+            lost = connection_lost(e)
+            raise statement_error(e, kind, name, params, cancellation) from e
+        except asyncio.TimeoutError:
+            raise timeout_error(kind, name, cancellation) from None
         finally:
-            cursor.close()
-            await self.release_connection(conn)
+            await self._end_statement(conn, cancellation, lost)
 
-    async def async_execute_and_return_stored_procedure(self, proc_name: str, *args: Any) -> List[Dict[str, Any]]:
+    async def async_export_query(
+        self,
+        query: str,
+        params: Optional[tuple] = None,
+        path: Optional[str] = None,
+        format: str = "csv",
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        row_group_size: int = DEFAULT_ROW_GROUP_SIZE,
+        timeout: Optional[float] = None,
+        lane: Optional[str] = None,
+    ) -> Dict[str, Any]:
         """
-        Asynchronously executes a stored procedure and returns the result if available.
-        For procedures that return a result set, a rollback is issued afterward.
+        Asynchronously streams the result of a query straight into a CSV, Parquet or Arrow file. The whole export
+        (fetching and writing) runs in one executor call, under timeout. See DatabaseConnector.export_query.
         """
-        conn = await self.get_connection()
+        check_export_args(path, format, batch_size, row_group_size)
+        return await self._export(
+            "query", query, query, params, path, format, batch_size, row_group_size, timeout, lane
+        )
+
+    @instrumented_async(count_exported_rows)
+    async def _export(
+        self,
+        kind: str,
+        name: str,
+        query: str,
+        params: Optional[tuple],
+        path: str,
+        format: str,
+        batch_size: int,
+        row_group_size: int,
+        timeout: Optional[float] = None,
+        lane: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        conn = await self.get_connection(lane=lane)
+        cancellation = self._cancellation(timeout)
+        lost = False
         try:
-            loop = asyncio.get_running_loop()
-            cursor = conn.cursor()
-            param_placeholders = ", ".join(["?"] * len(args))
-            await loop.run_in_executor(
-                None, cursor.execute, f"EXEC {proc_name} {param_placeholders}", *args
+            return await self._run_cancellable(
+                conn,
+                cancellation,
+                functools.partial(
+                    export_statement,
+                    conn,
+                    query,
+                    params,
+                    path,
+                    format,
+                    batch_size,
+                    row_group_size,
+                    rollback=self._pinned(conn) is None,
+                    cancellation=cancellation,
+                ),
             )
+        except pyodbc.Error as e:
+            lost = connection_lost(e)
+            raise statement_error(e, kind, name, params, cancellation) from e
+        except asyncio.TimeoutError:
+            raise timeout_error(kind, name, cancellation) from None
+        finally:
+            await self._end_statement(conn, cancellation, lost)
 
-            if cursor.description:
-                columns = [col[0] for col in cursor.description]
-                result = await loop.run_in_executor(
-                    None, lambda: [dict(zip(columns, row)) for row in cursor.fetchall()]
-                )
-                await loop.run_in_executor(None, conn.rollback)
-                return result
+    def async_stream_query(
+        self,
+        query: str,
+        params: Optional[tuple] = None,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        row_format: Optional[str] = None,
+        lane: Optional[str] = None,
+    ) -> AsyncIterator[Any]:
+        """
+        Asynchronously executes the given SQL query and yields its rows one at a time, fetching them in batches.
+
+        Only one batch is held in memory at a time. The connection is checked out when iteration starts and released
+        when the iterator is exhausted, closed or its task is cancelled. Wrap the iterator in contextlib.aclosing()
+        to release the connection deterministically when breaking out of the loop early.
+
+        Example:
+            async for row in db.async_stream_query("SELECT * FROM events", batch_size=5000):
+                ...
+        """
+        return self._stream("query", query, query, params or (), batch_size, self._row_format(row_format), lane)
+
+    def async_stream_stored_procedure(
+        self,
+        proc_name: str,
+        *args: Any,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        row_format: Optional[str] = None,
+        lane: Optional[str] = None,
+    ) -> AsyncIterator[Any]:
+        """Asynchronously executes a stored procedure and yields the rows of its result set in batches. See async_stream_query."""
+        return self._stream(
+            "procedure",
+            proc_name,
+            procedure_call(proc_name, len(args)),
+            args,
+            batch_size,
+            self._row_format(row_format),
+            lane,
+        )
+
+    def async_stream_tvf_results(
+        self,
+        tvf_name: str,
+        *parameters: Any,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        row_format: Optional[str] = None,
+        lane: Optional[str] = None,
+    ) -> AsyncIterator[Any]:
+        """Asynchronously executes a table-valued function and yields its rows in batches. See async_stream_query."""
+        return self._stream(
+            "tvf",
+            tvf_name,
+            tvf_query(tvf_name, len(parameters)),
+            parameters,
+            batch_size,
+            self._row_format(row_format),
+            lane,
+        )
+
+    def async_paginate_query(
+        self,
+        source: str,
+        keys: Union[str, Sequence[str]],
+        page_size: int = DEFAULT_PAGE_SIZE,
+        params: Optional[tuple] = None,
+        after: Optional[Sequence[Any]] = None,
+        row_format: Optional[str] = None,
+        lane: Optional[str] = None,
+    ) -> AsyncIterator[List[Any]]:
+        """
+        Asynchronously reads a large table or query in key order, one page at a time, using keyset pagination.
+        Each page is one query on a connection checked out for that page only. See DatabaseConnector.paginate_query.
+
+        Example:
+            async for page in db.async_paginate_query("dbo.events", ["created_at", "id"], page_size=5000):
+                await load(page)
+        """
+        page_keys = parse_page_keys(keys)
+        return self._paginate(
+            source_query(source),
+            tuple(params or ()),
+            page_keys,
+            check_page_size(page_size),
+            page_start(page_keys, after),
+            self._row_format(row_format),
+            lane,
+        )
+
+    async def _paginate(
+        self,
+        query: str,
+        params: Tuple[Any, ...],
+        keys: List[PageKey],
+        page_size: int,
+        last: Any,
+        row_format: str,
+        lane: Optional[str] = None,
+    ) -> AsyncIterator[List[Any]]:
+        first_page = page_query(query, keys, page_size, continued=False)
+        next_page = page_query(query, keys, page_size, continued=True)
+        while True:
+            if last is None:
+                rows = await self._execute("query", first_page, first_page, params, fetch_format(row_format), lane=lane)
             else:
-                await loop.run_in_executor(None, cursor.commit)
-                return []
-        except pyodbc.ProgrammingError as e:
-            raise ValueError(
-                f"Stored procedure execution failed: '{proc_name}' with parameters {args}. Error: {str(e)}"
-            ) from e
+                page_args = params + page_params(keys, last)
+                rows = await self._execute(
+                    "query", next_page, next_page, page_args, fetch_format(row_format), lane=lane
+                )
+            if not rows:
+                return
+            last = last_key(keys, rows[-1])
+            yield as_row_format(rows, row_format)
+            if len(rows) < page_size:
+                return
+
+    async def _stream(
+        self,
+        kind: str,
+        name: str,
+        query: str,
+        params: Sequence[Any],
+        batch_size: int,
+        row_format: str,
+        lane: Optional[str] = None,
+    ) -> AsyncIterator[Any]:
+        if batch_size < 1:
+            raise ValueError("batch_size must be at least 1")
+        loop = asyncio.get_running_loop()
+        event = execute_started(self.hooks, kind, name, query, params) if self.hooks else None
+        conn = await self._stream_connection(event, lane)
+        cursor = None
+        pending = None
+        error = None
+        try:
+            query, input_sizes = await self._routine_call(conn, kind, name, query, params)
+            cursor = conn.cursor()
+            pending = loop.run_in_executor(self._executor, execute_statement, cursor, query, params, input_sizes)
+            await asyncio.shield(pending)
+
+            if not cursor.description:
+                if self._autocommits(conn):
+                    await self.run_blocking(conn.commit)
+                return
+            convert = row_converter([col[0] for col in cursor.description], row_format)
+            while True:
+                pending = loop.run_in_executor(self._executor, cursor.fetchmany, batch_size)
+                rows = await asyncio.shield(pending)
+                if not rows:
+                    break
+                if event is not None:
+                    rows_fetched(self.hooks, event, len(rows))
+                for row in convert(rows):
+                    yield row
         except pyodbc.Error as e:
-            await loop.run_in_executor(None, conn.rollback)
-            raise pyodbc.Error(
-                f"Database error while executing stored procedure: '{proc_name}' with parameters {args}. Error: {str(e)}"
-            ) from e
+            error = execution_error(e, kind, name, params)
+            raise error from e
+        except Exception as e:
+            error = e
+            raise
         finally:
-            cursor.close()
+            if event is not None:
+                execute_finished(self.hooks, event, error)
+            if pending is not None and not pending.done():
+                # Cancelled mid-call: the driver call keeps running in its thread, so abort the statement on the
+                # server and let the call return before touching the cursor again or handing the connection on.
+                pending.add_done_callback(_retrieve)
+                self._cancel_cursor(cursor)
+                await asyncio.wait([pending])
+            await loop.run_in_executor(self._executor, self._end_stream, conn, cursor, self._pinned(conn) is None)
             await self.release_connection(conn)
 
-    async def async_execute_tvf_and_fetch_results(self, tvf_name: str, *parameters: Any) -> List[Dict[str, Any]]:
+    async def _stream_connection(self, event: Optional[QueryEvent], lane: Optional[str]):
+        """Checks out a stream's connection, reporting a failed checkout as the end of the stream's event."""
+        try:
+            return await self.get_connection(lane=lane)
+        except BaseException as e:
+            if event is not None:
+                execute_finished(self.hooks, event, e)
+            raise
+
+    @staticmethod
+    def _cancel_cursor(cursor) -> None:
+        try:
+            cursor.cancel()
+        except pyodbc.Error:
+            pass
+
+    @staticmethod
+    def _end_stream(conn, cursor, rollback: bool) -> None:
+        try:
+            if cursor is not None:
+                cursor.close()
+            # Clear the read transaction, even after an early exit, so the connection goes back to the pool clean.
+            if rollback:
+                conn.rollback()
+        except pyodbc.Error:
+            pass
+
+    async def async_execute_query_sets(
+        self,
+        query: str,
+        params: Optional[tuple] = None,
+        row_format: Optional[str] = None,
+        timeout: Optional[float] = None,
+        lane: Optional[str] = None,
+        converters: Optional[TypeConverters] = None,
+        retry: Optional[bool] = None,
+    ) -> List[List[Any]]:
         """
-        Asynchronously executes a table-valued function (TVF) with optional parameters and returns the results.
-        The query prepends the 'dbo.' schema. A rollback is issued after fetching the result.
+        Asynchronously executes a query or batch and returns every result set it produces, one list of rows each.
+        All result sets are read in a single executor call. See DatabaseConnector.execute_query_sets.
+        """
+        return await self._retrying(
+            query,
+            retry,
+            functools.partial(self._execute_sets, "query", query, query, params, row_format, timeout, lane, converters),
+        )
+
+    async def async_execute_and_return_stored_procedure_sets(
+        self,
+        proc_name: str,
+        *args: Any,
+        row_format: Optional[str] = None,
+        timeout: Optional[float] = None,
+        lane: Optional[str] = None,
+        converters: Optional[TypeConverters] = None,
+        retry: Optional[bool] = None,
+    ) -> List[List[Any]]:
+        """Asynchronously executes a stored procedure and returns all of its result sets, one list of rows each."""
+        query = procedure_call(proc_name, len(args))
+        return await self._retrying(
+            query,
+            retry,
+            functools.partial(
+                self._execute_sets, "procedure", proc_name, query, args, row_format, timeout, lane, converters
+            ),
+        )
+
+    async def async_execute_statements(
+        self,
+        statements: Sequence[Union[str, Tuple[str, Sequence[Any]]]],
+        row_format: Optional[str] = None,
+        timeout: Optional[float] = None,
+        lane: Optional[str] = None,
+        converters: Optional[TypeConverters] = None,
+        retry: Optional[bool] = None,
+    ) -> List[List[Any]]:
+        """
+        Asynchronously sends several statements as one batch, in a single round trip, and returns the result sets
+        they produce. See DatabaseConnector.execute_statements.
+        """
+        query, params = combine_statements(statements)
+        return await self._retrying(
+            query,
+            retry,
+            functools.partial(self._execute_sets, "query", query, query, params, row_format, timeout, lane, converters),
+        )
+
+    def async_stream_query_sets(
+        self,
+        query: str,
+        params: Optional[tuple] = None,
+        row_format: Optional[str] = None,
+        lane: Optional[str] = None,
+    ) -> AsyncIterator[List[Any]]:
+        """
+        Asynchronously executes a query or batch and yields its result sets one at a time. The batch is committed
+        when the iterator is exhausted; closing it early rolls back instead. See DatabaseConnector.stream_query_sets.
         """
-        conn = await self.get_connection()
+        return self._stream_sets("query", query, query, params or (), self._row_format(row_format), lane)
+
+    def async_stream_stored_procedure_sets(
+        self, proc_name: str, *args: Any, row_format: Optional[str] = None, lane: Optional[str] = None
+    ) -> AsyncIterator[List[Any]]:
+        """Asynchronously executes a stored procedure and yields its result sets one at a time."""
+        return self._stream_sets(
+            "procedure", proc_name, procedure_call(proc_name, len(args)), args, self._row_format(row_format), lane
+        )
+
+    @instrumented_async(count_set_rows)
+    async def _execute_sets(
+        self,
+        kind: str,
+        name: str,
+        query: str,
+        params: Optional[Sequence[Any]],
+        row_format: Optional[str],
+        timeout: Optional[float] = None,
+        lane: Optional[str] = None,
+        converters: Optional[TypeConverters] = None,
+    ) -> List[List[Any]]:
+        row_format = self._row_format(row_format)
+        conn = await self.get_connection(lane=lane)
+        cancellation = self._cancellation(timeout)
+        lost = False
         try:
-            loop = asyncio.get_running_loop()
-            cursor = conn.cursor()
-            if parameters:
-                param_placeholders = ",".join(["?"] * len(parameters))
-                query = f"SELECT * FROM dbo.{tvf_name}({param_placeholders})"
-                await loop.run_in_executor(None, cursor.execute, query, parameters)
-            else:
-                query = f"SELECT * FROM dbo.{tvf_name}()"
-                await loop.run_in_executor(None, cursor.execute, query)
+            query, input_sizes = await self._routine_call(conn, kind, name, query, params)
+            return await self._run_cancellable(
+                conn,
+                cancellation,
+                functools.partial(
+                    run_result_sets,
+                    conn,
+                    query,
+                    params,
+                    row_format,
+                    commit=self._autocommits(conn),
+                    rollback=self._pinned(conn) is None,
+                    input_sizes=input_sizes,
+                    cancellation=cancellation,
+                    converters=converters,
+                ),
+            )
+        except pyodbc.Error as e:
+            lost = connection_lost(e)
+            raise statement_error(e, kind, name, params, cancellation) from e
+        except asyncio.TimeoutError:
+            raise timeout_error(kind, name, cancellation) from None
+        finally:
+            await self._end_statement(conn, cancellation, lost)
 
-            if cursor.description:
-                columns = [col[0] for col in cursor.description]
-                result = await loop.run_in_executor(
-                    None, lambda: [dict(zip(columns, row)) for row in cursor.fetchall()]
-                )
-                await loop.run_in_executor(None, conn.rollback)
-                return result
-            else:
-                return []
-        except pyodbc.ProgrammingError as e:
-            raise ValueError(
-                f"TVF execution failed: '{tvf_name}' with parameters {parameters}. Error: {str(e)}"
-            ) from e
+    async def _stream_sets(
+        self, kind: str, name: str, query: str, params: Sequence[Any], row_format: str, lane: Optional[str] = None
+    ) -> AsyncIterator[List[Any]]:
+        loop = asyncio.get_running_loop()
+        event = execute_started(self.hooks, kind, name, query, params) if self.hooks else None
+        conn = await self._stream_connection(event, lane)
+        commit = self._autocommits(conn)
+        unpinned = self._pinned(conn) is None
+        cursor = None
+        pending = None
+        completed = False
+        input_sizes = None
+        error = None
+
+        def first_set() -> Optional[List[Any]]:
+            execute_statement(cursor, query, params, input_sizes)
+            return next_result_set(cursor, row_format, advance=False)
+
+        try:
+            query, input_sizes = await self._routine_call(conn, kind, name, query, params)
+            cursor = conn.cursor()
+            # Executing and reading the first result set is one executor hop, and so is every further set.
+            pending = loop.run_in_executor(self._executor, first_set)
+            rows = await asyncio.shield(pending)
+            while rows is not None:
+                if event is not None:
+                    rows_fetched(self.hooks, event, len(rows))
+                yield rows
+                pending = loop.run_in_executor(self._executor, next_result_set, cursor, row_format)
+                rows = await asyncio.shield(pending)
+            if commit:
+                await self.run_blocking(conn.commit)
+            completed = True
         except pyodbc.Error as e:
-            raise pyodbc.Error(
-                f"Database error while executing TVF: '{tvf_name}' with parameters {parameters}. Error: {str(e)}"
-            ) from e
+            error = execution_error(e, kind, name, params)
+            raise error from e
+        except Exception as e:
+            error = e
+            raise
         finally:
-            cursor.close()
+            if event is not None:
+                execute_finished(self.hooks, event, error)
+            if pending is not None and not pending.done():
+                pending.add_done_callback(_retrieve)
+                self._cancel_cursor(cursor)
+                await asyncio.wait([pending])
+            await self.run_blocking(self._end_stream, conn, cursor, unpinned and not completed)
             await self.release_connection(conn)
 
     async def close(self) -> None:
-        """Closes all connections in the pool or, if not using a pool, nothing to close."""
-        if self.pool:
-            loop = asyncio.get_running_loop()
-            while not self.pool.empty():
-                conn = self.pool.get()
-                await loop.run_in_executor(None, conn.close)
\ No newline at end of file
+        """Closes all connections in the pool and shuts down the connector's executor, unless one was passed in."""
+        if self.pool is not None:
+            await self.pool.close()
+        if self._owns_executor:
+            self._executor.shutdown(wait=False)
+            self._pool_executor.shutdown(wait=False)
\ No newline at end of file
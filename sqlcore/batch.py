@@ -0,0 +1,118 @@
+from typing import Any, Iterable, List, Optional, Sequence
+
+QUERY_KINDS = ("query", "procedure", "tvf")
+
+
+class QuerySpec:
+    """
+    One call in a fan-out batch run by execute_batch() or async_execute_batch().
+
+    Build specs with the query(), procedure() and tvf() constructors. Keyword options (row_format, cache_ttl,
+    cache_tags and, for the async connector, coalesce) are passed through to the matching execute method.
+
+    Example:
+        specs = [
+            QuerySpec.query("SELECT * FROM users WHERE age > ?", (30,)),
+            QuerySpec.procedure("sp_get_orders", 42, row_format="tuple"),
+            QuerySpec.tvf("fn_get_users"),
+        ]
+    """
+
+    __slots__ = ("kind", "name", "params", "options")
+
+    def __init__(self, kind: str, name: str, params: Sequence[Any] = (), **options: Any) -> None:
+        if kind not in QUERY_KINDS:
+            raise ValueError(f"Unknown query kind '{kind}', expected one of {QUERY_KINDS}")
+        self.kind = kind
+        self.name = name
+        self.params = tuple(params or ())
+        self.options = options
+
+    @classmethod
+    def query(cls, query: str, params: Optional[Sequence[Any]] = None, **options: Any) -> "QuerySpec":
+        """A SQL query with optional parameters, run like execute_query()."""
+        return cls("query", query, params or (), **options)
+
+    @classmethod
+    def procedure(cls, proc_name: str, *args: Any, **options: Any) -> "QuerySpec":
+        """A stored procedure call whose result set is returned, run like execute_and_return_stored_procedure()."""
+        return cls("procedure", proc_name, args, **options)
+
+    @classmethod
+    def tvf(cls, tvf_name: str, *parameters: Any, **options: Any) -> "QuerySpec":
+        """A table-valued function call, run like execute_tvf_and_fetch_results()."""
+        return cls("tvf", tvf_name, parameters, **options)
+
+    def __repr__(self) -> str:
+        return f"QuerySpec({self.kind!r}, {self.name!r}, {self.params!r})"
+
+
+class BatchResult:
+    """
+    The outcome of one QuerySpec in a batch: its rows, or the exception it raised.
+
+    Attributes:
+        index (int): Position of the spec in the batch.
+        spec (QuerySpec): The spec that was run.
+        rows (Optional[List[Any]]): The returned rows, or None if the call failed.
+        error (Optional[BaseException]): The exception raised by the call, or None if it succeeded.
+    """
+
+    __slots__ = ("index", "spec", "rows", "error")
+
+    def __init__(
+        self, index: int, spec: QuerySpec, rows: Optional[List[Any]] = None, error: Optional[BaseException] = None
+    ) -> None:
+        self.index = index
+        self.spec = spec
+        self.rows = rows
+        self.error = error
+
+    @property
+    def ok(self) -> bool:
+        """Whether the call succeeded."""
+        return self.error is None
+
+    def result(self) -> List[Any]:
+        """Returns the rows, or raises the call's exception."""
+        if self.error is not None:
+            raise self.error
+        return self.rows
+
+    def __repr__(self) -> str:
+        outcome = f"error={self.error!r}" if self.error is not None else f"rows={len(self.rows)}"
+        return f"BatchResult(index={self.index}, spec={self.spec!r}, {outcome})"
+
+
+def check_specs(specs: Iterable[QuerySpec]) -> List[QuerySpec]:
+    """Materialises the specs and checks that every item is a QuerySpec."""
+    specs = list(specs)
+    for spec in specs:
+        if not isinstance(spec, QuerySpec):
+            raise TypeError(f"Expected QuerySpec, got {type(spec).__name__}")
+    return specs
+
+
+def concurrency_limit(max_concurrency: Optional[int], pool_limit: Optional[int], count: int) -> int:
+    """
+    Number of calls to run at once: max_concurrency if given, otherwise the pool size, and never more than count.
+
+    Going beyond the pool size only queues callers on the pool, so the pool is the natural default. Without a pool
+    (one connection per call) max_concurrency caps the number of open connections; it defaults to 10.
+    """
+    if max_concurrency is not None and max_concurrency < 1:
+        raise ValueError("max_concurrency must be at least 1")
+    limit = max_concurrency or pool_limit or 10
+    return max(1, min(limit, count))
+
+
+def spec_call(connector: Any, spec: QuerySpec, prefix: str = "") -> Any:
+    """Calls the connector method matching spec.kind ("async_" prefixed for the async connector)."""
+    if spec.kind == "query":
+        return getattr(connector, f"{prefix}execute_query")(spec.name, spec.params or None, **spec.options)
+    if spec.kind == "procedure":
+        return getattr(connector, f"{prefix}execute_and_return_stored_procedure")(
+            spec.name, *spec.params, **spec.options
+        )
+    return getattr(connector, f"{prefix}execute_tvf_and_fetch_results")(spec.name, *spec.params, **spec.options)
+
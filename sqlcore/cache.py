@@ -0,0 +1,219 @@
+import re
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Sequence, Set, Tuple
+
+# Single-quoted literals (with '' escapes) are kept verbatim when normalizing; whitespace elsewhere is collapsed.
+_STRING_LITERAL = re.compile(r"('(?:[^']|'')*')")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_query(query: str) -> str:
+    """Collapses runs of whitespace outside string literals, so formatting differences map to the same cache key."""
+    parts = _STRING_LITERAL.split(query.strip())
+    return "".join(part if index % 2 else _WHITESPACE.sub(" ", part) for index, part in enumerate(parts))
+
+
+def _freeze(value: Any) -> Hashable:
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    if isinstance(value, dict):
+        return tuple(sorted((key, _freeze(item)) for key, item in value.items()))
+    return value
+
+
+def cache_key(
+    query: str,
+    params: Optional[Sequence[Any]],
+    row_format: str,
+    converters: Hashable = None,
+    namespace: Hashable = None,
+) -> Optional[Hashable]:
+    """
+    Builds the cache key for a statement, or returns None if its parameters cannot be hashed.
+
+    Lists (e.g. TVP rows) are frozen into tuples. Parameters are compared with their types, so 1 and 1.0 or
+    True do not share an entry. converters identifies the output converters the result is decoded with, and
+    namespace the database the statement ran against.
+    """
+    frozen = _freeze(tuple(params or ()))
+    try:
+        types = _freeze(tuple(type(param).__qualname__ for param in params or ()))
+        key = (namespace, normalize_query(query), frozen, types, row_format, converters)
+        hash(key)
+    except TypeError:
+        return None
+    return key
+
+
+def estimate_size(result: List[Any]) -> int:
+    """Roughly estimates the memory held by a result list: the list, each row and each value, in bytes."""
+    size = sys.getsizeof(result)
+    for row in result:
+        size += sys.getsizeof(row)
+        for value in row.values() if isinstance(row, dict) else row:
+            size += sys.getsizeof(value)
+    return size
+
+
+def copy_result(result: List[Any]) -> List[Any]:
+    """Returns a copy of a result that callers may modify without affecting the cached entry."""
+    return [dict(row) if isinstance(row, dict) else row for row in result]
+
+
+class _Entry:
+    __slots__ = ("value", "expires_at", "tags", "size")
+
+    def __init__(self, value: List[Any], expires_at: float, tags: Tuple[str, ...], size: int) -> None:
+        self.value = value
+        self.expires_at = expires_at
+        self.tags = tags
+        self.size = size
+
+
+class QueryCache:
+    """
+    An in-memory, thread-safe LRU cache of query results with per-entry TTLs and tag-based invalidation.
+
+    The cache is bounded by a number of entries and, optionally, by the estimated memory of the cached rows. When
+    either limit is exceeded the least recently used entries are evicted. Entries carry user-supplied tags (for
+    example the tables they read) so that writers can drop every dependent entry with invalidate().
+
+    One cache can be shared by several connectors. Each keys its entries by its cache_namespace, its connection
+    string by default, so connectors to different databases never see each other's results. Connectors only use
+    the cache for calls that pass cache_ttl.
+
+    Example:
+        cache = QueryCache(max_entries=10_000, max_bytes=64 * 2**20)
+        db = DatabaseConnector(conn_string, cache=cache)
+        db.execute_query("SELECT * FROM countries", cache_ttl=300, cache_tags=("countries",))
+        cache.invalidate("countries")
+    """
+
+    def __init__(self, max_entries: int = 1024, max_bytes: Optional[int] = None) -> None:
+        """
+        Args:
+            max_entries (int): Maximum number of cached results.
+            max_bytes (Optional[int]): Maximum estimated size of all cached results, in bytes. None for no limit.
+                A single result larger than this is never cached.
+        """
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1")
+        if max_bytes is not None and max_bytes < 1:
+            raise ValueError("max_bytes must be at least 1")
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+        self._tags: Dict[str, Set[Hashable]] = {}
+        self._lock = threading.Lock()
+        self._bytes = 0
+        # Invalidations are numbered, so that a result fetched before an invalidation of one of its tags
+        # is not stored after it.
+        self._generation = 0
+        self._invalidated: Dict[str, int] = {}
+        self._cleared = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def get(self, key: Hashable) -> Tuple[Optional[List[Any]], int]:
+        """
+        Looks up a result and counts the hit or miss.
+
+        Returns:
+            Tuple[Optional[List[Any]], int]: The cached result (or None on a miss) and a generation to pass to put().
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires_at <= time.monotonic():
+                self._remove(key)
+                self.expirations += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None, self._generation
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry.value, self._generation
+
+    def put(self, key: Hashable, value: List[Any], ttl: float, tags: Iterable[str] = (), generation: int = 0) -> None:
+        """
+        Stores a result for ttl seconds, unless one of its tags was invalidated after generation was taken by get().
+        """
+        tags = tuple(tags)
+        size = estimate_size(value)
+        with self._lock:
+            if self._cleared > generation or any(self._invalidated.get(tag, 0) > generation for tag in tags):
+                return
+            if self.max_bytes is not None and size > self.max_bytes:
+                return
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = _Entry(value, time.monotonic() + ttl, tags, size)
+            self._bytes += size
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+            while len(self._entries) > self.max_entries or self._over_max_bytes():
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def invalidate(self, *tags: str) -> int:
+        """Drops every entry carrying any of the given tags. Returns the number of entries dropped."""
+        with self._lock:
+            self._generation += 1
+            removed = 0
+            for tag in tags:
+                self._invalidated[tag] = self._generation
+                for key in list(self._tags.get(tag, ())):
+                    self._remove(key)
+                    removed += 1
+            self.invalidations += removed
+            return removed
+
+    def clear(self) -> None:
+        """Drops every entry."""
+        with self._lock:
+            self._generation += 1
+            self._cleared = self._generation
+            self._entries.clear()
+            self._tags.clear()
+            self._invalidated.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns hit/miss counters, evictions, expirations, invalidations and the current size of the cache."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+            }
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _over_max_bytes(self) -> bool:
+        return self.max_bytes is not None and self._bytes > self.max_bytes
+
+    def _remove(self, key: Hashable) -> None:
+        entry = self._entries.pop(key)
+        self._bytes -= entry.size
+        for tag in entry.tags:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
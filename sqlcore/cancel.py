@@ -0,0 +1,199 @@
+import heapq
+import itertools
+import math
+import threading
+import time
+from typing import Any, Callable, List, Optional, Sequence
+
+import pyodbc
+
+from .statements import execution_error
+
+# SQLSTATEs of a statement stopped by the driver's query timeout and of one cancelled with SQLCancel.
+_TIMEOUT_SQLSTATES = ("HYT00", "HYT01")
+_CANCELLED_SQLSTATE = "HY008"
+
+
+def odbc_timeout(timeout: float) -> int:
+    """The ODBC query timeout for a timeout in seconds: whole seconds, rounded up, at least 1 (0 means none)."""
+    return max(1, math.ceil(timeout))
+
+
+def check_timeout(timeout: Optional[float]) -> Optional[float]:
+    if timeout is not None and timeout <= 0:
+        raise ValueError("timeout must be positive")
+    return timeout
+
+
+def is_timeout_error(error: BaseException) -> bool:
+    """Whether a driver error reports that the driver's query timeout expired."""
+    return isinstance(error, pyodbc.Error) and bool(error.args) and error.args[0] in _TIMEOUT_SQLSTATES
+
+
+def timeout_error(kind: str, name: str, cancellation: "Cancellation") -> TimeoutError:
+    return TimeoutError(f"Timed out after {cancellation.timeout}s running {kind} '{name}'")
+
+
+def statement_error(
+    error: pyodbc.Error, kind: str, name: str, params: Optional[Sequence[Any]], cancellation: Optional["Cancellation"]
+) -> Exception:
+    """Translates the driver error of a statement, reporting one stopped by its time limit as TimeoutError."""
+    if cancellation is not None:
+        if is_timeout_error(error):
+            cancellation.expired()
+        if cancellation.timed_out:
+            return timeout_error(kind, name, cancellation)
+    return execution_error(error, kind, name, params or ())
+
+
+def close_quietly(conn: Any) -> None:
+    try:
+        conn.close()
+    except Exception:
+        pass
+
+
+class Cancellation:
+    """
+    The cancellable state of one statement, shared between the thread running it and the thread cancelling it.
+
+    The running thread attaches its cursor before executing; cancel() may then be called from any other thread
+    (the watchdog, or the event loop when the awaiting task is cancelled) and calls cursor.cancel(), which makes
+    the driver abort the statement on the server and raise HY008 in the running thread. A statement cancelled
+    before it started fails as soon as it attaches.
+
+    When the caller gives up on a statement that is still running, it abandons the connection: the running
+    thread closes it once the statement has stopped, see run(). timeout is the statement's time limit in
+    seconds, if it has one.
+    """
+
+    __slots__ = ("timeout", "_lock", "_cursor", "cancelled", "timed_out", "abandoned", "finished")
+
+    def __init__(self, timeout: Optional[float] = None) -> None:
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._cursor: Any = None
+        self.cancelled = False
+        self.timed_out = False
+        self.abandoned = False
+        self.finished = False
+
+    def attach(self, cursor: Any) -> None:
+        """Registers the cursor that is about to run the statement. Raises if the statement was already cancelled."""
+        with self._lock:
+            if self.cancelled:
+                raise pyodbc.OperationalError(_CANCELLED_SQLSTATE, "Operation canceled before it started")
+            self._cursor = cursor
+
+    def cancel(self, timed_out: bool = False) -> None:
+        """Cancels the statement, if it has not finished yet. Does not block on the statement."""
+        with self._lock:
+            if self.cancelled or self.finished:
+                return
+            self.cancelled = True
+            self.timed_out = timed_out
+            cursor = self._cursor
+        if cursor is not None:
+            try:
+                cursor.cancel()
+            except pyodbc.Error:
+                pass
+
+    def expired(self) -> None:
+        """Records that the driver's query timeout stopped the statement."""
+        with self._lock:
+            self.cancelled = True
+            self.timed_out = True
+
+    def abandon(self) -> bool:
+        """
+        Hands the connection over to the running thread, which closes it when the statement stops. Returns False
+        if the statement has already finished, in which case the caller still owns the connection.
+        """
+        with self._lock:
+            if self.finished:
+                return False
+            self.abandoned = True
+            return True
+
+    def run(self, conn: Any, func: Callable[[], Any]) -> Any:
+        """
+        Runs func, the blocking statement call on conn, under the driver's query timeout if the statement has a
+        time limit. Closes conn afterwards if it was abandoned meanwhile.
+        """
+        if self.timeout is not None:
+            conn.timeout = odbc_timeout(self.timeout)
+        try:
+            return func()
+        finally:
+            with self._lock:
+                self.finished = True
+                self._cursor = None
+                abandoned = self.abandoned
+            if abandoned:
+                close_quietly(conn)
+            elif self.timeout is not None:
+                conn.timeout = 0
+
+
+class Watchdog:
+    """
+    A background thread that cancels statements running past their deadline, for the sync connector.
+
+    One thread serves every call of a connector: watch() puts a deadline on a heap and the thread sleeps until
+    the earliest one, so a call with a timeout costs a heap push rather than a timer thread. The thread is
+    started on demand and exits once no deadline is left.
+    """
+
+    def __init__(self) -> None:
+        self._condition = threading.Condition()
+        self._heap: List[List[Any]] = []
+        self._sequence = itertools.count()
+        self._unwatched = 0
+        self._running = False
+
+    def watch(self, cancellation: Cancellation, timeout: float) -> List[Any]:
+        """Cancels the statement with timed_out set if it is still running after timeout seconds."""
+        entry = [time.monotonic() + timeout, next(self._sequence), cancellation]
+        with self._condition:
+            heapq.heappush(self._heap, entry)
+            if not self._running:
+                self._running = True
+                threading.Thread(target=self._run, name="sqlcore-watchdog", daemon=True).start()
+            elif self._heap[0] is entry:
+                self._condition.notify()
+        return entry
+
+    def unwatch(self, entry: List[Any]) -> None:
+        """Stops watching a statement that finished. Entries are dropped lazily, and compacted when most are dead."""
+        with self._condition:
+            if entry[2] is None:
+                return
+            entry[2] = None
+            self._unwatched += 1
+            if self._unwatched > 64 and self._unwatched * 2 > len(self._heap):
+                self._heap = [live for live in self._heap if live[2] is not None]
+                heapq.heapify(self._heap)
+                self._unwatched = 0
+
+    def _run(self) -> None:
+        while True:
+            due = []
+            with self._condition:
+                while not due:
+                    now = time.monotonic()
+                    while self._heap and (self._heap[0][2] is None or self._heap[0][0] <= now):
+                        entry = heapq.heappop(self._heap)
+                        if entry[2] is None:
+                            self._unwatched -= 1
+                        else:
+                            due.append(entry[2])
+                            entry[2] = None
+                    if due:
+                        break
+                    if not self._heap:
+                        self._running = False
+                        return
+                    self._condition.wait(self._heap[0][0] - now)
+            for cancellation in due:
+                cancellation.cancel(timed_out=True)
@@ -0,0 +1,139 @@
+import datetime
+import decimal
+import pyodbc
+from typing import Any, Dict, List, Optional, Sequence
+
+from .statements import execute_statement
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional and only needed for columnar results
+    np = None
+
+# numpy dtypes and null fill values for the Python types pyodbc reports in cursor.description.
+# Anything not listed (str, bytes, uuid, time, ...) is kept in an object array.
+_COLUMN_TYPES = {
+    bool: ("bool", False),
+    int: ("int64", 0),
+    float: ("float64", 0.0),
+    decimal.Decimal: ("float64", 0.0),
+    datetime.datetime: ("datetime64[us]", None),
+    datetime.date: ("datetime64[D]", None),
+}
+
+
+def require_numpy() -> None:
+    """Raises ImportError with installation instructions if numpy is not available."""
+    if np is None:
+        raise ImportError("Columnar results require numpy. Install it with `pip install sqlcore[columnar]`.")
+
+
+class ColumnarResult:
+    """
+    Accumulates fetched row batches into one typed array per column.
+
+    Each batch is transposed and converted as soon as it arrives, so the row-wise representation of the whole
+    result set never exists in memory.
+    """
+
+    def __init__(self, description: Sequence[Sequence[Any]]) -> None:
+        require_numpy()
+        self.columns = [col[0] for col in description]
+        self._types = [_COLUMN_TYPES.get(col[1], ("object", None)) for col in description]
+        self._chunks: List[List[Any]] = [[] for _ in self.columns]
+        self._masks: List[List[Any]] = [[] for _ in self.columns]
+
+    def add_batch(self, rows: Sequence[Sequence[Any]]) -> None:
+        """Converts a batch of rows and appends it to the column arrays."""
+        if not rows:
+            return
+        for position, values in enumerate(zip(*rows)):
+            dtype, fill = self._types[position]
+            mask = np.fromiter((value is None for value in values), dtype=bool, count=len(values))
+            if dtype == "object":
+                array = np.empty(len(values), dtype=object)
+                array[:] = values
+            else:
+                if mask.any():
+                    values = [fill if value is None else value for value in values]
+                if dtype.startswith("datetime64"):
+                    array = np.array(values, dtype=dtype)
+                else:
+                    array = np.fromiter(values, dtype=dtype, count=len(values))
+            self._chunks[position].append(array)
+            self._masks[position].append(mask)
+
+    def build(self) -> Dict[str, Any]:
+        """Returns a dict mapping each column name to a numpy masked array, masked where the value was NULL."""
+        result = {}
+        for position, name in enumerate(self.columns):
+            dtype = self._types[position][0]
+            if self._chunks[position]:
+                values = np.concatenate(self._chunks[position])
+                mask = np.concatenate(self._masks[position])
+            else:
+                values = np.empty(0, dtype=dtype)
+                mask = np.empty(0, dtype=bool)
+            result[name] = np.ma.MaskedArray(values, mask=mask)
+        return result
+
+
+def fetch_columnar(cursor: Any, batch_size: int) -> Dict[str, Any]:
+    """
+    Fetches the cursor's remaining rows in batches and returns them column by column.
+
+    Args:
+        cursor (Any): A cursor positioned on a result set.
+        batch_size (int): Number of rows fetched per round trip.
+
+    Returns:
+        Dict[str, Any]: Column name to numpy masked array. Empty if the statement returned no result set.
+    """
+    if not cursor.description:
+        return {}
+    result = ColumnarResult(cursor.description)
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            break
+        result.add_batch(rows)
+    return result.build()
+
+
+def run_columnar(
+    conn: Any,
+    query: str,
+    params: Optional[Sequence[Any]],
+    batch_size: int,
+    commit: bool = True,
+    rollback: bool = True,
+    rollback_reads: bool = False,
+    cancellation: Optional[Any] = None,
+) -> Dict[str, Any]:
+    """
+    Executes a query on conn and fetches its result column by column, as a single blocking unit.
+
+    commit, rollback, rollback_reads and cancellation work as in sqlcore.statements.run_statement().
+    """
+    cursor = conn.cursor()
+    try:
+        if cancellation is not None:
+            cancellation.attach(cursor)
+        execute_statement(cursor, query, params)
+        if cursor.description:
+            result = fetch_columnar(cursor, batch_size)
+            if rollback_reads:
+                conn.rollback()
+            return result
+        if commit:
+            conn.commit()
+        return {}
+    except pyodbc.Error:
+        if rollback:
+            try:
+                conn.rollback()
+            except pyodbc.Error:
+                pass
+        raise
+    finally:
+        cursor.close()
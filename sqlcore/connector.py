@@ -1,185 +1,1590 @@
+import functools
+import multiprocessing
 import os
+import queue
+import time
 import pyodbc
-from queue import Queue
-from typing import Any, Dict, List, Optional
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from contextvars import ContextVar, copy_context
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+from .batch import BatchResult, QuerySpec, check_specs, concurrency_limit, spec_call
+from .cache import QueryCache, cache_key, copy_result
+from .cancel import Cancellation, Watchdog, check_timeout, close_quietly, statement_error
+from .columnar import require_numpy, run_columnar
+from .converters import TypeConverters
+from .export import DEFAULT_ROW_GROUP_SIZE, check_export_args, export_statement, validate_export_format
+from .hooks import (
+    QueryEvent,
+    QueryHooks,
+    connection_acquired,
+    connection_released,
+    count_columnar_rows,
+    count_exported_rows,
+    count_no_rows,
+    count_set_rows,
+    execute_finished,
+    execute_started,
+    instrumented,
+    rows_fetched,
+)
+from .pagination import (
+    DEFAULT_PAGE_SIZE,
+    PageKey,
+    as_row_format,
+    check_page_size,
+    fetch_format,
+    last_key,
+    page_params,
+    page_query,
+    page_start,
+    parse_page_keys,
+)
+from .partition import (
+    Partition,
+    bounds_query,
+    build_partitions,
+    check_partition_key,
+    extract_partition,
+    init_worker,
+    source_query,
+    split_range,
+)
+from .pool import ConnectionPool, PoolLane
+from .retry import RetryPolicy, connection_lost
+from .routines import RoutineCatalog, RoutineSignature, describe_routine
+from .rows import row_converter, row_type, validate_row_format
+from .statements import (
+    DEFAULT_BATCH_SIZE,
+    combine_statements,
+    execute_many_chunked,
+    execute_statement,
+    execution_error,
+    is_read_only,
+    iter_result_sets,
+    procedure_call,
+    run_result_sets,
+    run_statement,
+    tvf_query,
+)
+from .transaction import Transaction
 
 
 class DatabaseConnector:
     """A class to handle synchronous database connections, execute SQL queries, and manage connection pooling."""
 
-    def __init__(self, conn_string: Optional[str] = None, pool_limit: Optional[int] = 5) -> None:
-        """Initializes the DatabaseConnector with a connection string and an optional pool limit of connections."""
+    def __init__(
+        self,
+        conn_string: Optional[str] = None,
+        pool_limit: Optional[int] = 5,
+        min_size: Optional[int] = None,
+        idle_timeout: Optional[float] = None,
+        max_lifetime: Optional[float] = None,
+        health_check_interval: Optional[float] = 30.0,
+        acquire_timeout: Optional[float] = None,
+        row_format: str = "dict",
+        cache: Optional[QueryCache] = None,
+        routines: Optional[RoutineCatalog] = None,
+        hooks: Sequence[QueryHooks] = (),
+        query_timeout: Optional[float] = None,
+        lanes: Optional[Dict[str, PoolLane]] = None,
+        converters: Optional[TypeConverters] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        cache_namespace: Optional[str] = None,
+    ) -> None:
+        """
+        Initializes the DatabaseConnector with a connection string and an optional pool limit of connections.
+
+        Args:
+            conn_string (Optional[str]): ODBC connection string. Falls back to the SQL_CONN_STRING environment variable.
+            pool_limit (Optional[int]): Maximum number of pooled connections. None or 0 opens a new connection per query.
+            min_size (Optional[int]): Connections opened up front (in parallel) and kept open while idle. Defaults to 1.
+            idle_timeout (Optional[float]): Seconds after which idle connections above min_size are closed. None keeps them.
+            max_lifetime (Optional[float]): Seconds after which a connection is closed and replaced when it is released.
+            health_check_interval (Optional[float]): Connections idle for at least this many seconds are pinged before
+                being handed out, and replaced if they are dead. None disables the check.
+            acquire_timeout (Optional[float]): Default number of seconds to wait for a pooled connection. None waits indefinitely.
+            row_format (str): How result rows are returned: "dict" (the default), "tuple", or "row" for compact
+                sqlcore.rows.Row objects that support both name and position lookup. Can be overridden per call.
+            cache (Optional[QueryCache]): Result cache used by calls that pass cache_ttl. None disables caching.
+            routines (Optional[RoutineCatalog]): Cache of procedure and TVF signatures. When set, stored procedures
+                and TVFs are described once and then called through typed call templates, with their arguments
+                validated on the client. None builds untyped calls.
+            hooks (Sequence[QueryHooks]): Instrumentation hooks notified of connection checkouts, executions,
+                fetches and errors, e.g. a MetricsCollector. See add_hook().
+            query_timeout (Optional[float]): Default number of seconds a statement may run, including fetching its
+                result, before it is cancelled on the server and TimeoutError is raised. Applies to the execute_*
+                methods (execute_many and execute_query_columnar included), export_query and each page of
+                paginate_query, and can be overridden per call with their timeout argument. The stream_* methods
+                and partitioned extracts are not limited. None lets statements run indefinitely.
+            lanes (Optional[Dict[str, PoolLane]]): Named shares of the pool, each with a reserved minimum of
+                connections, a maximum it may borrow up to and a priority for its waiters, so that e.g. batch jobs
+                cannot take the connections interactive calls need. Calls choose one with lane() or their lane
+                argument; the others use the "default" lane. Requires a pool.
+            converters (Optional[TypeConverters]): Output converters installed on every connection the connector
+                opens, which decode values of their SQL types as rows are fetched, e.g. TypeConverters.fast().
+                The registry is copied, so changing it later has no effect. The fetching execute_* methods take
+                converters for a single call as well. None keeps pyodbc's default types.
+            retry_policy (Optional[RetryPolicy]): Runs calls again after transient failures such as deadlocks, lock
+                timeouts and dropped connections, with jittered exponential backoff. Reads are retried, writes and
+                procedures only when called with retry=True. A connection that was lost is replaced before the next
+                attempt. None raises every failure at once.
+            cache_namespace (Optional[str]): Identifies the database in the keys of the results this connector
+                caches, so that connectors sharing a cache only share results when they read the same data.
+                Defaults to the connection string.
+        """
         self.conn_string = conn_string or os.getenv("SQL_CONN_STRING")
         if not self.conn_string:
             raise ValueError("SQL connection string is not set")
 
         self.pool_limit = pool_limit
+        self.acquire_timeout = acquire_timeout
+        self.row_format = validate_row_format(row_format)
+        self.cache = cache
+        self.routines = routines
+        self.query_timeout = check_timeout(query_timeout)
+        self.converters = converters.copy() if converters else None
+        self._converters_key = self.converters.key() if self.converters else None
+        self.retry_policy = retry_policy
+        self.cache_namespace = self.conn_string if cache_namespace is None else cache_namespace
+        self._watchdog = Watchdog()
+        self.hooks: List[QueryHooks] = list(hooks)
+        # perf_counter_ns() at checkout of every connection handed out while hooks are registered, by id.
+        self._checked_out: Dict[int, int] = {}
         self.pool = None
+        self._transaction: ContextVar = ContextVar(f"sqlcore_transaction_{id(self)}", default=None)
+        self._lane: ContextVar = ContextVar(f"sqlcore_lane_{id(self)}", default=None)
 
         if pool_limit is not None and pool_limit > 0:
-            self.pool = Queue(maxsize=pool_limit)
-            for _ in range(pool_limit):
-                self.pool.put(pyodbc.connect(self.conn_string, autocommit=False))
-
-    def get_connection(self):
-        """Retrieve a connection from the pool or create a new one if the pool is unlimited."""
-        if self.pool:
-            return self.pool.get()
+            self.pool = ConnectionPool(
+                self._connect,
+                min_size=min(1, pool_limit) if min_size is None else min_size,
+                max_size=pool_limit,
+                idle_timeout=idle_timeout,
+                max_lifetime=max_lifetime,
+                health_check_interval=health_check_interval,
+                lanes=lanes,
+            )
+            self.pool.warm_up()
+        elif lanes:
+            raise ValueError("lanes require a connection pool (pool_limit)")
+
+    def _connect(self):
+        conn = pyodbc.connect(self.conn_string, autocommit=False)
+        if self.converters:
+            self.converters.install(conn)
+        return conn
+
+    def get_connection(self, timeout: Optional[float] = None, lane: Optional[str] = None):
+        """
+        Retrieve a connection from the pool or create a new one if the pool is unlimited.
+        Inside transaction() or session() this returns the connection pinned by the block.
+
+        Args:
+            timeout (Optional[float]): Seconds to wait for a pooled connection. Defaults to the connector's acquire_timeout.
+            lane (Optional[str]): Pool lane to check the connection out from. Defaults to the one chosen with lane().
+
+        Raises:
+            TimeoutError: If no pooled connection became available in time.
+            ValueError: If lane is not one of the pool's lanes.
+        """
+        transaction = self._transaction.get()
+        if transaction is not None:
+            return transaction.conn
+        if not self.hooks:
+            return self._checkout(timeout, lane)
+        started = time.perf_counter_ns()
+        conn = self._checkout(timeout, lane)
+        acquired = time.perf_counter_ns()
+        self._checked_out[id(conn)] = acquired
+        connection_acquired(self.hooks, acquired - started)
+        return conn
+
+    def _checkout(self, timeout: Optional[float], lane: Optional[str]):
+        if self.pool is not None:
+            return self.pool.acquire(
+                timeout if timeout is not None else self.acquire_timeout, self._lane.get() if lane is None else lane
+            )
         else:
-            return pyodbc.connect(self.conn_string, autocommit=False)
+            return self._connect()
 
     def release_connection(self, conn):
         """Release a connection back to the pool or close it if the pool is unlimited."""
-        if self.pool:
-            self.pool.put(conn)
+        if self._pinned(conn) is not None:
+            return
+        self._released(conn)
+        if self.pool is not None:
+            self.pool.release(conn)
         else:
             conn.close()
 
-    def execute_query(self, query: str, params: Optional[tuple] = None) -> List[Dict[str, Any]]:
+    def discard_connection(self, conn):
+        """
+        Closes a checked-out connection that must not be reused, e.g. after its statement was cancelled, and frees
+        its slot in the pool.
+        """
+        self._released(conn)
+        if self.pool is not None:
+            self.pool.discard(conn)
+        else:
+            close_quietly(conn)
+
+    def _released(self, conn) -> None:
+        if self._checked_out:
+            acquired = self._checked_out.pop(id(conn), None)
+            if acquired is not None and self.hooks:
+                connection_released(self.hooks, time.perf_counter_ns() - acquired)
+
+    @contextmanager
+    def connection(self, timeout: Optional[float] = None, lane: Optional[str] = None):
+        """
+        Context manager that checks out a connection and always releases it on exit.
+
+        Example:
+            with db.connection(timeout=5) as conn:
+                ...
+        """
+        conn = self.get_connection(timeout, lane)
+        try:
+            yield conn
+        finally:
+            self.release_connection(conn)
+
+    @contextmanager
+    def lane(self, name: str):
+        """
+        Context manager that makes every call inside it, in this thread or context, check its connection out from
+        the given pool lane. Calls that pass their own lane argument still use that one.
+
+        Example:
+            with db.lane("batch"):
+                db.export_query("SELECT * FROM events", None, "events.csv")
+
+        Raises:
+            ValueError: If name is not one of the pool's lanes.
+        """
+        if self.pool is not None:
+            self.pool.lane(name)
+        token = self._lane.set(name)
+        try:
+            yield
+        finally:
+            self._lane.reset(token)
+
+    def add_hook(self, hook: QueryHooks) -> None:
+        """
+        Registers an instrumentation hook. Without hooks, calls pay no instrumentation cost beyond one check.
+
+        Covered calls: the execute_* methods (including execute_many, batches, result sets and columnar results),
+        the stream_* methods, paginate_query and export_query. extract_partitioned and
+        extract_partitioned_to_files run in worker processes and are not reported. Every connection checkout and
+        release is reported, including those of transaction() and session().
+        """
+        self.hooks.append(hook)
+
+    def remove_hook(self, hook: QueryHooks) -> None:
+        """Unregisters a hook added with add_hook() or the hooks argument."""
+        self.hooks.remove(hook)
+
+    def pool_stats(self) -> Dict[str, Any]:
+        """Returns pool size and usage metrics such as the number of waiters and connections recycled or evicted."""
+        if self.pool is None:
+            return {}
+        return self.pool.stats()
+
+    def cache_stats(self) -> Dict[str, Any]:
+        """Returns the result cache's hit/miss counters and size, or an empty dict if no cache is configured."""
+        if self.cache is None:
+            return {}
+        return self.cache.stats()
+
+    def retry_stats(self) -> Dict[str, Any]:
+        """Returns the retry policy's retry and give-up counters, or an empty dict if no policy is configured."""
+        if self.retry_policy is None:
+            return {}
+        return self.retry_policy.stats()
+
+    def transaction(self) -> Transaction:
+        """
+        Returns a context manager that runs every call made inside it on one pinned connection, as one transaction.
+
+        Statements are not committed or rolled back individually: the block is committed once when it exits cleanly
+        and rolled back if it raises. Nested transaction() blocks become savepoints.
+
+        Example:
+            with db.transaction() as tx:
+                db.execute_query("UPDATE accounts SET balance = balance - ? WHERE id = ?", (10, 1))
+                sp = tx.savepoint()
+                db.execute_stored_procedure("sp_log_transfer", 1, 2, 10)
+        """
+        return Transaction(self, self._transaction, atomic=True)
+
+    def session(self) -> Transaction:
+        """
+        Returns a context manager that pins one connection for every call made inside it, without making the
+        block atomic: writes still commit as they run, but no connection checkout or per-read rollback is repeated.
+        Useful for chatty code and for session state such as temporary tables.
+        """
+        return Transaction(self, self._transaction, atomic=False)
+
+    def _pinned(self, conn) -> Optional[Transaction]:
+        """Returns the transaction or session that conn is pinned to in the current context, if any."""
+        transaction = self._transaction.get()
+        return transaction if transaction is not None and transaction.conn is conn else None
+
+    def _autocommits(self, conn) -> bool:
+        """Whether statements on conn commit individually, i.e. they are not part of an enclosing transaction."""
+        transaction = self._pinned(conn)
+        return transaction is None or not transaction.deferred
+
+    def _commit(self, conn) -> None:
+        if self._autocommits(conn):
+            conn.commit()
+
+    def _rollback(self, conn) -> None:
+        if self._pinned(conn) is None:
+            conn.rollback()
+
+    def _row_format(self, row_format: Optional[str]) -> str:
+        return self.row_format if row_format is None else validate_row_format(row_format)
+
+    def execute_query(
+        self,
+        query: str,
+        params: Optional[tuple] = None,
+        row_format: Optional[str] = None,
+        cache_ttl: Optional[float] = None,
+        cache_tags: Sequence[str] = (),
+        timeout: Optional[float] = None,
+        lane: Optional[str] = None,
+        converters: Optional[TypeConverters] = None,
+        retry: Optional[bool] = None,
+    ) -> List[Any]:
         """
         Synchronously executes the given SQL query with optional parameters and returns the result as a list of dictionaries.
 
         Args:
             query (str): The SQL query to execute.
             params (Optional[tuple]): Parameters to pass to the query.
+            row_format (Optional[str]): "dict", "tuple" or "row". Defaults to the connector's row_format.
+            cache_ttl (Optional[float]): Serve the result from the connector's cache, and cache it for this many seconds
+                on a miss. Only use it for reads. Ignored inside transaction() and session().
+            cache_tags (Sequence[str]): Tags to store the cached result under, for QueryCache.invalidate().
+            timeout (Optional[float]): Seconds the query may run. Defaults to the connector's query_timeout.
+            lane (Optional[str]): Pool lane to run on. Defaults to the one chosen with lane().
+            converters (Optional[TypeConverters]): Output converters for this call, over the connector's converters.
+            retry (Optional[bool]): Retry transient failures under the connector's retry_policy. None retries reads
+                only; pass True for writes and procedures that are safe to run again, False to never retry.
 
         Returns:
-            List[Dict[str, Any]]: Query result as a list of dictionaries.
+            List[Any]: Query result as a list of rows (dictionaries unless another row_format is chosen).
 
         Raises:
             ValueError: If the query fails or parameters are invalid.
+            TimeoutError: If the query ran out of time and was cancelled.
             pyodbc.Error: For any database-related errors.
         """
-        conn = self.get_connection()
-        try:
-            cursor = conn.cursor()
-            if params:
-                cursor.execute(query, params)
-            else:
-                cursor.execute(query)
+        return self._execute(
+            "query",
+            query,
+            query,
+            params,
+            row_format,
+            cache_ttl=cache_ttl,
+            cache_tags=cache_tags,
+            timeout=timeout,
+            lane=lane,
+            converters=converters,
+            retry=retry,
+        )
 
-            if cursor.description:
-                columns = [col[0] for col in cursor.description]
-                result = [dict(zip(columns, row)) for row in cursor.fetchall()]
-                return result
-            else:
-                cursor.commit()
-                return []
-        except pyodbc.ProgrammingError as e:
-            raise ValueError(f"Query execution failed: {query}. Error: {str(e)}") from e
-        except pyodbc.Error as e:
-            raise pyodbc.Error(f"Database error occurred: {str(e)}") from e
-        finally:
-            cursor.close()
-            self.release_connection(conn)
-            
-    def execute_stored_procedure(self, proc_name: str, *args: Any) -> None:
+    def execute_stored_procedure(
+        self,
+        proc_name: str,
+        *args: Any,
+        timeout: Optional[float] = None,
+        lane: Optional[str] = None,
+        retry: Optional[bool] = None,
+    ) -> None:
         """
         Synchronously executes a stored procedure with the given name and parameters.
 
+        Args:
+            proc_name (str): The name of the stored procedure to execute.
+            args (Any): Parameters to pass to the stored procedure. Use table_valued_parameter() to pass a set of rows
+                to a table-valued parameter in a single round trip.
+            timeout (Optional[float]): Seconds the procedure may run. Defaults to the connector's query_timeout.
+            lane (Optional[str]): Pool lane to run on. Defaults to the one chosen with lane().
+            retry (Optional[bool]): Retry transient failures, such as being chosen as a deadlock victim, under the
+                connector's retry_policy. Procedures may write, so they are only retried when this is True.
+
+        Raises:
+            ValueError: If the stored procedure execution fails due to an invalid name or parameters.
+            TimeoutError: If the procedure ran out of time and was cancelled.
+            pyodbc.Error: For any database-related errors.
+        """
+        self._execute(
+            "procedure",
+            proc_name,
+            procedure_call(proc_name, len(args)),
+            args,
+            fetch=False,
+            timeout=timeout,
+            lane=lane,
+            retry=retry,
+        )
+
+    def execute_and_return_stored_procedure(
+        self,
+        proc_name: str,
+        *args: Any,
+        row_format: Optional[str] = None,
+        cache_ttl: Optional[float] = None,
+        cache_tags: Sequence[str] = (),
+        timeout: Optional[float] = None,
+        lane: Optional[str] = None,
+        converters: Optional[TypeConverters] = None,
+        retry: Optional[bool] = None,
+    ) -> List[Any]:
+        """
+        Executes a stored procedure and returns the result if available.
+
         Args:
             proc_name (str): The name of the stored procedure to execute.
             args (Any): Parameters to pass to the stored procedure.
+            row_format (Optional[str]): "dict", "tuple" or "row". Defaults to the connector's row_format.
+            cache_ttl (Optional[float]): Serve the result from the connector's cache, and cache it for this many seconds
+                on a miss. Only use it for reads. Ignored inside transaction() and session().
+            cache_tags (Sequence[str]): Tags to store the cached result under, for QueryCache.invalidate().
+            timeout (Optional[float]): Seconds the procedure may run. Defaults to the connector's query_timeout.
+            lane (Optional[str]): Pool lane to run on. Defaults to the one chosen with lane().
+            converters (Optional[TypeConverters]): Output converters for this call, over the connector's converters.
+            retry (Optional[bool]): Retry transient failures under the connector's retry_policy. None retries reads
+                only; pass True for writes and procedures that are safe to run again, False to never retry.
+
+        Returns:
+            List[Any]: Result of the stored procedure as a list of rows (dictionaries unless another row_format is chosen).
 
         Raises:
             ValueError: If the stored procedure execution fails due to an invalid name or parameters.
+            TimeoutError: If the procedure ran out of time and was cancelled.
+            pyodbc.Error: For any database-related errors.
+        """
+        return self._execute(
+            "procedure",
+            proc_name,
+            procedure_call(proc_name, len(args)),
+            args,
+            row_format,
+            cache_ttl=cache_ttl,
+            cache_tags=cache_tags,
+            timeout=timeout,
+            lane=lane,
+            converters=converters,
+            retry=retry,
+        )
+
+    def execute_many(
+        self,
+        query: str,
+        rows: Iterable[Sequence[Any]],
+        chunk_size: int = DEFAULT_BATCH_SIZE,
+        commit_per_chunk: bool = False,
+        fast_executemany: bool = True,
+        timeout: Optional[float] = None,
+        lane: Optional[str] = None,
+    ) -> int:
+        """
+        Executes a parameterized statement once for every row of parameters, on one connection.
+
+        Rows are sent in chunks of chunk_size using pyodbc's fast_executemany, which binds a whole chunk as a
+        parameter array and sends it in a single round trip. rows may be any iterable, including a generator,
+        and is consumed one chunk at a time.
+
+        Args:
+            query (str): The parameterized statement, e.g. "INSERT INTO users (name, age) VALUES (?, ?)".
+            rows (Iterable[Sequence[Any]]): One sequence of parameters per execution.
+            chunk_size (int): Number of rows sent per round trip.
+            commit_per_chunk (bool): Commit after every chunk instead of once after all rows. Bounds the size of the
+                transaction, at the cost of a partial load if a later chunk fails.
+            fast_executemany (bool): Use pyodbc's parameter-array binding. Disable for drivers that do not support it.
+            timeout (Optional[float]): Seconds the whole load may take. Defaults to the connector's query_timeout.
+                With commit_per_chunk the chunks committed before the deadline stay committed.
+            lane (Optional[str]): Pool lane to run on. Defaults to the one chosen with lane().
+
+        Returns:
+            int: The number of rows sent.
+
+        Raises:
+            ValueError: If the statement fails or parameters are invalid.
+            TimeoutError: If the load took longer than the timeout and was cancelled.
             pyodbc.Error: For any database-related errors.
         """
-        conn = self.get_connection()
+        return self._execute_many(
+            "query", query, query, (), rows, chunk_size, commit_per_chunk, fast_executemany, timeout, lane
+        )
+
+    @instrumented(count_no_rows)
+    def _execute_many(
+        self,
+        kind: str,
+        name: str,
+        query: str,
+        params: Sequence[Any],
+        rows: Iterable[Sequence[Any]],
+        chunk_size: int,
+        commit_per_chunk: bool,
+        fast_executemany: bool,
+        timeout: Optional[float] = None,
+        lane: Optional[str] = None,
+    ) -> int:
+        conn = self.get_connection(lane=lane)
+        cancellation = self._cancellation(timeout)
+        lost = False
         try:
-            cursor = conn.cursor()
-            param_placeholders = ", ".join(["?"] * len(args))
-            query = f"EXEC {proc_name} {param_placeholders}"
-
-            cursor.execute(query, *args)
-            cursor.commit()
-        except pyodbc.ProgrammingError as e:
-            raise ValueError(
-                f"Stored procedure execution failed: '{proc_name}' with parameters {args}. Error: {str(e)}"
-            ) from e
+            run = functools.partial(
+                execute_many_chunked,
+                conn,
+                query,
+                rows,
+                chunk_size,
+                commit_per_chunk,
+                fast_executemany,
+                self._autocommits(conn),
+                cancellation,
+            )
+            return run() if cancellation is None else self._run_timed(conn, cancellation, run)
         except pyodbc.Error as e:
-            raise pyodbc.Error(
-                f"Database error while executing stored procedure: '{proc_name}' with parameters {args}. Error: {str(e)}"
-            ) from e
+            lost = connection_lost(e)
+            raise statement_error(e, kind, name, params, cancellation) from e
+        finally:
+            self._end_statement(conn, cancellation, lost)
+
+    def execute_tvf_and_fetch_results(
+        self,
+        tvf_name: str,
+        *parameters: Any,
+        row_format: Optional[str] = None,
+        cache_ttl: Optional[float] = None,
+        cache_tags: Sequence[str] = (),
+        timeout: Optional[float] = None,
+        lane: Optional[str] = None,
+        converters: Optional[TypeConverters] = None,
+        retry: Optional[bool] = None,
+    ) -> List[Any]:
+        return self._execute(
+            "tvf",
+            tvf_name,
+            tvf_query(tvf_name, len(parameters)),
+            parameters,
+            row_format,
+            cache_ttl=cache_ttl,
+            cache_tags=cache_tags,
+            timeout=timeout,
+            lane=lane,
+            converters=converters,
+            retry=retry,
+        )
+
+    def _execute(
+        self,
+        kind: str,
+        name: str,
+        query: str,
+        params: Optional[Sequence[Any]],
+        row_format: Optional[str] = None,
+        fetch: bool = True,
+        cache_ttl: Optional[float] = None,
+        cache_tags: Sequence[str] = (),
+        timeout: Optional[float] = None,
+        lane: Optional[str] = None,
+        converters: Optional[TypeConverters] = None,
+        retry: Optional[bool] = None,
+    ) -> List[Any]:
+        """Runs one statement on a pooled (or pinned) connection, or serves it from the cache when cache_ttl is set."""
+        row_format = self._row_format(row_format)
+        key = self._cache_key(query, params, row_format, cache_ttl, converters)
+        run = functools.partial(
+            self._run_statement, kind, name, query, params, row_format, fetch, timeout, lane, converters
+        )
+        if key is None:
+            return self._retrying(query, retry, run)
+
+        result, generation = self.cache.get(key)
+        if result is None:
+            result = self._retrying(query, retry, run)
+            self.cache.put(key, result, cache_ttl, cache_tags, generation)
+        return copy_result(result)
+
+    def _cache_key(
+        self,
+        query: str,
+        params: Optional[Sequence[Any]],
+        row_format: str,
+        cache_ttl: Optional[float],
+        converters: Optional[TypeConverters] = None,
+    ):
+        """Returns the cache key of a call, or None if it is not to be cached."""
+        if cache_ttl is None:
+            return None
+        if self.cache is None:
+            raise ValueError("cache_ttl requires a connector created with a QueryCache")
+        # Inside a transaction reads may see uncommitted changes, which must not leak into the shared cache.
+        if self._transaction.get() is not None:
+            return None
+        return cache_key(query, params, row_format, self._converters_fingerprint(converters), self.cache_namespace)
+
+    def _converters_fingerprint(self, converters: Optional[TypeConverters]) -> Any:
+        """Identifies the output converters a call's result is decoded with, for its cache key."""
+        return self._converters_key, converters.key() if converters else None
+
+    def _retrying(self, query: str, retry: Optional[bool], run: Callable[[], Any]) -> Any:
+        """
+        Runs a call, and runs it again after transient failures if the retry policy applies to it: reads, and
+        calls passed retry=True. Never inside transaction() or session(), where a deadlock victim's whole
+        transaction was rolled back and only the caller can run it again.
+        """
+        policy = self.retry_policy
+        if policy is None or retry is False or self._transaction.get() is not None:
+            return run()
+        if not retry and not is_read_only(query):
+            return run()
+        attempt = 1
+        while True:
+            try:
+                return run()
+            except Exception as e:
+                delay = policy.next_delay(e, attempt)
+                if delay is None:
+                    raise
+            time.sleep(delay)
+            attempt += 1
+
+    @instrumented()
+    def _run_statement(
+        self,
+        kind: str,
+        name: str,
+        query: str,
+        params: Optional[Sequence[Any]],
+        row_format: str,
+        fetch: bool,
+        timeout: Optional[float] = None,
+        lane: Optional[str] = None,
+        converters: Optional[TypeConverters] = None,
+    ) -> List[Any]:
+        conn = self.get_connection(lane=lane)
+        cancellation = self._cancellation(timeout)
+        lost = False
+        try:
+            query, input_sizes = self._routine_call(conn, kind, name, query, params)
+            run = functools.partial(
+                run_statement,
+                conn,
+                query,
+                params,
+                row_format,
+                fetch=fetch,
+                commit=self._autocommits(conn),
+                rollback=self._pinned(conn) is None,
+                input_sizes=input_sizes,
+                cancellation=cancellation,
+                converters=converters,
+            )
+            return run() if cancellation is None else self._run_timed(conn, cancellation, run)
+        except pyodbc.Error as e:
+            lost = connection_lost(e)
+            raise statement_error(e, kind, name, params, cancellation) from e
+        finally:
+            self._end_statement(conn, cancellation, lost)
+
+    def _cancellation(self, timeout: Optional[float]) -> Optional[Cancellation]:
+        """Returns the Cancellation of a statement that runs under a timeout, or None if it has none."""
+        timeout = self.query_timeout if timeout is None else check_timeout(timeout)
+        return None if timeout is None else Cancellation(timeout)
+
+    def _run_timed(self, conn, cancellation: Cancellation, run) -> Any:
+        """
+        Runs a statement under its timeout, enforced twice: by the driver's query timeout (whole seconds, execution
+        only) and by the watchdog thread, which cancels it with cursor.cancel() at the deadline, fetching included.
+        """
+        entry = self._watchdog.watch(cancellation, cancellation.timeout)
+        try:
+            return cancellation.run(conn, run)
         finally:
-            cursor.close()
+            self._watchdog.unwatch(entry)
+
+    def _end_statement(self, conn, cancellation: Optional[Cancellation], lost: bool = False) -> None:
+        """
+        Releases a statement's connection, or discards it if the statement was cancelled or the connection was
+        lost. A lost connection also makes the pool check its idle connections before handing them out.
+        """
+        if self._pinned(conn) is not None:
+            self.release_connection(conn)
+        elif lost:
+            self.discard_connection(conn)
+            if self.pool is not None:
+                self.pool.check_idle()
+        elif cancellation is not None and cancellation.cancelled:
+            self.discard_connection(conn)
+        else:
             self.release_connection(conn)
 
-    def execute_and_return_stored_procedure(self, proc_name: str, *args: Any) -> List[Dict[str, Any]]:
+    def _routine_call(
+        self, conn, kind: str, name: str, query: str, params: Optional[Sequence[Any]]
+    ) -> Tuple[str, Optional[List[Any]]]:
         """
-        Executes a stored procedure and returns the result if available.
+        Returns the SQL text and parameter type declarations of a call. Procedures and TVFs go through their cached
+        signature when the connector has a RoutineCatalog, which validates the arguments; everything else is
+        sent as is.
+        """
+        if self.routines is None or kind == "query":
+            return query, None
+        return self.routines.signature(conn, kind, name).bind(params)
+
+    def describe_routine(self, name: str, kind: str = "procedure") -> RoutineSignature:
+        """
+        Returns the parameters and result columns of a stored procedure (kind="procedure") or a table-valued
+        function in the dbo schema (kind="tvf"), from the connector's RoutineCatalog if it has one.
+
+        Raises:
+            ValueError: If the routine does not exist or is not of the given kind.
+            pyodbc.Error: For any database-related errors.
+        """
+        with self.connection() as conn:
+            try:
+                if self.routines is not None:
+                    signature = self.routines.signature(conn, kind, name)
+                else:
+                    signature = describe_routine(conn, kind, name)
+                self._rollback(conn)
+                return signature
+            except pyodbc.Error as e:
+                raise execution_error(e, kind, name, ()) from e
+
+    def execute_batch(self, specs: Iterable[QuerySpec], max_concurrency: Optional[int] = None) -> List[BatchResult]:
+        """
+        Runs many queries, stored procedures and TVF calls concurrently on worker threads and returns their results
+        in the order of specs.
+
+        At most max_concurrency calls run at once, so a batch never oversubscribes the pool, and the whole batch
+        takes roughly as long as its slowest calls rather than the sum of all of them. A failing call does not
+        stop the others: its exception is returned in its BatchResult.
+
+        Example:
+            results = db.execute_batch([QuerySpec.tvf("fn_sales", region) for region in regions])
+            rows = [result.result() for result in results]
 
         Args:
-            proc_name (str): The name of the stored procedure to execute.
-            args (Any): Parameters to pass to the stored procedure.
+            specs (Iterable[QuerySpec]): The calls to run.
+            max_concurrency (Optional[int]): Maximum number of calls running at once. Defaults to the pool size.
 
         Returns:
-            List[Dict[str, Any]]: Result of the stored procedure as a list of dictionaries.
+            List[BatchResult]: One result per spec, holding either its rows or its exception.
 
         Raises:
-            ValueError: If the stored procedure execution fails due to an invalid name or parameters.
+            TypeError: If an item of specs is not a QuerySpec.
+        """
+        return sorted(self.execute_batch_as_completed(specs, max_concurrency), key=lambda result: result.index)
+
+    def execute_batch_as_completed(
+        self, specs: Iterable[QuerySpec], max_concurrency: Optional[int] = None
+    ) -> Iterator[BatchResult]:
+        """
+        Like execute_batch(), but yields each BatchResult as soon as its call finishes. Use BatchResult.index to
+        match results to specs. Closing the iterator early cancels the calls that have not started yet.
+
+        Inside transaction() or session() the calls run one after another on the pinned connection, before this
+        method returns, so that iterating after the transaction has ended cannot run them outside of it.
+        """
+        specs = check_specs(specs)
+        if self._transaction.get() is not None:
+            return iter([self._run_spec(index, spec) for index, spec in enumerate(specs)])
+        return self._fan_out(specs, concurrency_limit(max_concurrency, self.pool_limit, len(specs)))
+
+    def _fan_out(self, specs: List[QuerySpec], limit: int) -> Iterator[BatchResult]:
+        if not specs:
+            return
+        executor = ThreadPoolExecutor(max_workers=limit, thread_name_prefix="sqlcore-batch")
+        try:
+            # Each call runs in a copy of the caller's context, so that it uses the caller's lane.
+            futures = [
+                executor.submit(copy_context().run, self._run_spec, index, spec) for index, spec in enumerate(specs)
+            ]
+            for future in as_completed(futures):
+                yield future.result()
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def _run_spec(self, index: int, spec: QuerySpec) -> BatchResult:
+        try:
+            return BatchResult(index, spec, rows=spec_call(self, spec))
+        except Exception as e:
+            return BatchResult(index, spec, error=e)
+
+    def execute_query_columnar(
+        self,
+        query: str,
+        params: Optional[tuple] = None,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        timeout: Optional[float] = None,
+        lane: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        Executes the given SQL query and returns the result column by column instead of row by row.
+
+        Rows are fetched in batches and each batch is converted straight into per-column numpy arrays, so analytics
+        code can skip building and then transposing a list of dictionaries. Requires numpy.
+
+        Args:
+            query (str): The SQL query to execute.
+            params (Optional[tuple]): Parameters to pass to the query.
+            batch_size (int): Number of rows fetched per round trip.
+            timeout (Optional[float]): Seconds the query may take, fetching included. Defaults to the connector's
+                query_timeout.
+            lane (Optional[str]): Pool lane to run on. Defaults to the one chosen with lane().
+
+        Returns:
+            Dict[str, Any]: Column name to numpy masked array. Numeric, boolean and date/time columns get typed arrays
+            (DECIMAL becomes float64), other columns object arrays; the mask is set where the value was NULL.
+
+        Raises:
+            ImportError: If numpy is not installed.
+            ValueError: If the query fails or parameters are invalid.
+            TimeoutError: If the query took longer than the timeout and was cancelled.
             pyodbc.Error: For any database-related errors.
         """
-        conn = self.get_connection()
+        require_numpy()
+        return self._execute_columnar("query", query, query, params, batch_size, timeout, lane)
+
+    @instrumented(count_columnar_rows)
+    def _execute_columnar(
+        self,
+        kind: str,
+        name: str,
+        query: str,
+        params: Optional[tuple],
+        batch_size: int,
+        timeout: Optional[float] = None,
+        lane: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        conn = self.get_connection(lane=lane)
+        cancellation = self._cancellation(timeout)
+        lost = False
         try:
-            cursor = conn.cursor()
-            param_placeholders = ", ".join(["?"] * len(args))
-            query = f"EXEC {proc_name} {param_placeholders}"
+            run = functools.partial(
+                run_columnar,
+                conn,
+                query,
+                params,
+                batch_size,
+                commit=self._autocommits(conn),
+                rollback=self._pinned(conn) is None,
+                cancellation=cancellation,
+            )
+            return run() if cancellation is None else self._run_timed(conn, cancellation, run)
+        except pyodbc.Error as e:
+            lost = connection_lost(e)
+            raise statement_error(e, kind, name, params, cancellation) from e
+        finally:
+            self._end_statement(conn, cancellation, lost)
+
+    def stream_query(
+        self,
+        query: str,
+        params: Optional[tuple] = None,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        row_format: Optional[str] = None,
+        lane: Optional[str] = None,
+    ) -> Iterator[Any]:
+        """
+        Executes the given SQL query and yields its rows one at a time, fetching them from the server in batches.
+
+        Only one batch is held in memory at a time, so memory use stays flat regardless of the size of the result set.
+        The connection is checked out when iteration starts and released when the generator is exhausted or closed,
+        e.g. by breaking out of the loop. Use contextlib.closing() to release it deterministically on an early exit.
+
+        Args:
+            query (str): The SQL query to execute.
+            params (Optional[tuple]): Parameters to pass to the query.
+            batch_size (int): Number of rows fetched per round trip.
+            row_format (Optional[str]): "dict", "tuple" or "row". Defaults to the connector's row_format.
+            lane (Optional[str]): Pool lane to run on. Defaults to the one chosen with lane().
+
+        Yields:
+            Any: One row of the result, in the requested row format.
+
+        Raises:
+            ValueError: If the query fails or parameters are invalid.
+            pyodbc.Error: For any database-related errors.
+        """
+        return self._stream("query", query, query, params or (), batch_size, self._row_format(row_format), lane)
+
+    def stream_stored_procedure(
+        self,
+        proc_name: str,
+        *args: Any,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        row_format: Optional[str] = None,
+        lane: Optional[str] = None,
+    ) -> Iterator[Any]:
+        """
+        Executes a stored procedure and yields the rows of its result set in batches. See stream_query.
+
+        Args:
+            proc_name (str): The name of the stored procedure to execute.
+            args (Any): Parameters to pass to the stored procedure.
+            batch_size (int): Number of rows fetched per round trip.
+            row_format (Optional[str]): "dict", "tuple" or "row". Defaults to the connector's row_format.
+            lane (Optional[str]): Pool lane to run on. Defaults to the one chosen with lane().
+        """
+        return self._stream(
+            "procedure",
+            proc_name,
+            procedure_call(proc_name, len(args)),
+            args,
+            batch_size,
+            self._row_format(row_format),
+            lane,
+        )
+
+    def stream_tvf_results(
+        self,
+        tvf_name: str,
+        *parameters: Any,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        row_format: Optional[str] = None,
+        lane: Optional[str] = None,
+    ) -> Iterator[Any]:
+        """
+        Executes a table-valued function and yields its rows in batches. See stream_query.
+
+        Args:
+            tvf_name (str): The name of the table-valued function in the dbo schema.
+            parameters (Any): Parameters to pass to the function.
+            batch_size (int): Number of rows fetched per round trip.
+            row_format (Optional[str]): "dict", "tuple" or "row". Defaults to the connector's row_format.
+            lane (Optional[str]): Pool lane to run on. Defaults to the one chosen with lane().
+        """
+        return self._stream(
+            "tvf",
+            tvf_name,
+            tvf_query(tvf_name, len(parameters)),
+            parameters,
+            batch_size,
+            self._row_format(row_format),
+            lane,
+        )
+
+    def paginate_query(
+        self,
+        source: str,
+        keys: Union[str, Sequence[str]],
+        page_size: int = DEFAULT_PAGE_SIZE,
+        params: Optional[tuple] = None,
+        after: Optional[Sequence[Any]] = None,
+        row_format: Optional[str] = None,
+        lane: Optional[str] = None,
+    ) -> Iterator[List[Any]]:
+        """
+        Reads a large table or query in key order, one page at a time, using keyset pagination.
+
+        Every page is a separate query, "the next page_size rows after the last key seen", run on a connection
+        checked out for that page only, so a long scan does not hold a pooled connection between pages and,
+        with an index on the keys, every page costs the same however deep the scan is (unlike OFFSET paging).
+        Pages are fetched lazily, as the iterator is advanced.
+
+        The keys must be non-NULL and unique together (end them with a unique column, e.g. the primary key);
+        rows with duplicate keys at a page boundary would otherwise be skipped. Rows inserted or changed during
+        the scan are seen or not depending on where they fall relative to the current page.
+
+        Example:
+            for page in db.paginate_query("dbo.events", ["created_at", "id"], page_size=5000):
+                load(page)
+
+        Args:
+            source (str): A table name (e.g. "dbo.events") or a SELECT query. Queries must not end in ORDER BY.
+            keys (Union[str, Sequence[str]]): The ordering column, or columns, each optionally followed by
+                ASC or DESC. They must be columns of the result.
+            page_size (int): Rows per page.
+            params (Optional[tuple]): Parameters of the source query.
+            after (Optional[Sequence[Any]]): Key values to resume after, e.g. those of the last row of an
+                earlier scan. None starts at the beginning.
+            row_format (Optional[str]): "dict", "tuple" or "row". Defaults to the connector's row_format.
+            lane (Optional[str]): Pool lane every page runs on. Defaults to the one chosen with lane().
+
+        Yields:
+            List[Any]: One page of rows. The last page may be shorter; no empty page is yielded.
 
-            cursor.execute(query, *args)
+        Raises:
+            ValueError: If a key is invalid or NULL, a page query fails or parameters are invalid.
+            pyodbc.Error: For any database-related errors.
+        """
+        page_keys = parse_page_keys(keys)
+        return self._paginate(
+            source_query(source),
+            tuple(params or ()),
+            page_keys,
+            check_page_size(page_size),
+            page_start(page_keys, after),
+            self._row_format(row_format),
+            lane,
+        )
 
-            if cursor.description:
-                columns = [col[0] for col in cursor.description]
-                result = [dict(zip(columns, row)) for row in cursor.fetchall()]
-                return result
+    def _paginate(
+        self,
+        query: str,
+        params: Tuple[Any, ...],
+        keys: List[PageKey],
+        page_size: int,
+        last: Any,
+        row_format: str,
+        lane: Optional[str] = None,
+    ) -> Iterator[List[Any]]:
+        first_page = page_query(query, keys, page_size, continued=False)
+        next_page = page_query(query, keys, page_size, continued=True)
+        while True:
+            if last is None:
+                rows = self._execute("query", first_page, first_page, params, fetch_format(row_format), lane=lane)
             else:
-                cursor.commit()
-                return []
-        except pyodbc.ProgrammingError as e:
-            raise ValueError(
-                f"Stored procedure execution failed: '{proc_name}' with parameters {args}. Error: {str(e)}"
-            ) from e
+                page_args = params + page_params(keys, last)
+                rows = self._execute("query", next_page, next_page, page_args, fetch_format(row_format), lane=lane)
+            if not rows:
+                return
+            last = last_key(keys, rows[-1])
+            yield as_row_format(rows, row_format)
+            if len(rows) < page_size:
+                return
+
+    def _stream(
+        self,
+        kind: str,
+        name: str,
+        query: str,
+        params: Sequence[Any],
+        batch_size: int,
+        row_format: str,
+        lane: Optional[str] = None,
+    ) -> Iterator[Any]:
+        if batch_size < 1:
+            raise ValueError("batch_size must be at least 1")
+        event = execute_started(self.hooks, kind, name, query, params) if self.hooks else None
+        conn = self._stream_connection(event, lane)
+        cursor = None
+        error = None
+        try:
+            query, input_sizes = self._routine_call(conn, kind, name, query, params)
+            cursor = conn.cursor()
+            execute_statement(cursor, query, params, input_sizes)
+
+            if not cursor.description:
+                self._commit(conn)
+                return
+            convert = row_converter([col[0] for col in cursor.description], row_format)
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                if event is not None:
+                    rows_fetched(self.hooks, event, len(rows))
+                for row in convert(rows):
+                    yield row
         except pyodbc.Error as e:
-            raise pyodbc.Error(
-                f"Database error while executing stored procedure: '{proc_name}' with parameters {args}. Error: {str(e)}"
-            ) from e
+            error = execution_error(e, kind, name, params)
+            raise error from e
+        except Exception as e:
+            error = e
+            raise
         finally:
-            cursor.close()
+            if event is not None:
+                execute_finished(self.hooks, event, error)
+            try:
+                if cursor is not None:
+                    cursor.close()
+                # Clear the read transaction, even after an early exit, so the connection goes back to the pool clean.
+                self._rollback(conn)
+            except pyodbc.Error:
+                pass
             self.release_connection(conn)
 
-    def execute_tvf_and_fetch_results(self, tvf_name: str, *parameters: Any) -> List[Dict[str, Any]]:
-        conn = self.get_connection()
+    def _stream_connection(self, event: Optional[QueryEvent], lane: Optional[str]):
+        """Checks out a stream's connection, reporting a failed checkout as the end of the stream's event."""
+        try:
+            return self.get_connection(lane=lane)
+        except BaseException as e:
+            if event is not None:
+                execute_finished(self.hooks, event, e)
+            raise
+
+    def execute_query_sets(
+        self,
+        query: str,
+        params: Optional[tuple] = None,
+        row_format: Optional[str] = None,
+        timeout: Optional[float] = None,
+        lane: Optional[str] = None,
+        converters: Optional[TypeConverters] = None,
+        retry: Optional[bool] = None,
+    ) -> List[List[Any]]:
+        """
+        Executes a query or batch and returns every result set it produces, walking them with cursor.nextset().
+
+        Row counts of statements that return no rows (INSERT, UPDATE, ...) are skipped. The batch is committed
+        once all result sets have been read.
+
+        Args:
+            query (str): The SQL query or batch to execute.
+            params (Optional[tuple]): Parameters to pass to the query.
+            row_format (Optional[str]): "dict", "tuple" or "row". Defaults to the connector's row_format.
+            timeout (Optional[float]): Seconds the batch may run. Defaults to the connector's query_timeout.
+            lane (Optional[str]): Pool lane to run on. Defaults to the one chosen with lane().
+            converters (Optional[TypeConverters]): Output converters for this call, over the connector's converters.
+            retry (Optional[bool]): Retry transient failures under the connector's retry_policy. None retries reads
+                only; pass True for writes and procedures that are safe to run again, False to never retry.
+
+        Returns:
+            List[List[Any]]: One list of rows per result set, in order.
+
+        Raises:
+            ValueError: If the query fails or parameters are invalid.
+            TimeoutError: If the batch ran out of time and was cancelled.
+            pyodbc.Error: For any database-related errors.
+        """
+        return self._retrying(
+            query,
+            retry,
+            functools.partial(self._execute_sets, "query", query, query, params, row_format, timeout, lane, converters),
+        )
+
+    def execute_and_return_stored_procedure_sets(
+        self,
+        proc_name: str,
+        *args: Any,
+        row_format: Optional[str] = None,
+        timeout: Optional[float] = None,
+        lane: Optional[str] = None,
+        converters: Optional[TypeConverters] = None,
+        retry: Optional[bool] = None,
+    ) -> List[List[Any]]:
+        """
+        Executes a stored procedure and returns all of its result sets, one list of rows each.
+        See execute_query_sets.
+        """
+        query = procedure_call(proc_name, len(args))
+        return self._retrying(
+            query,
+            retry,
+            functools.partial(
+                self._execute_sets, "procedure", proc_name, query, args, row_format, timeout, lane, converters
+            ),
+        )
+
+    def execute_statements(
+        self,
+        statements: Sequence[Union[str, Tuple[str, Sequence[Any]]]],
+        row_format: Optional[str] = None,
+        timeout: Optional[float] = None,
+        lane: Optional[str] = None,
+        converters: Optional[TypeConverters] = None,
+        retry: Optional[bool] = None,
+    ) -> List[List[Any]]:
+        """
+        Sends several statements to the server as one batch, in a single round trip, and returns the result sets
+        they produce.
+
+        Example:
+            users, orders = db.execute_statements([
+                ("UPDATE users SET last_seen = GETDATE() WHERE id = ?", (user_id,)),
+                ("SELECT * FROM users WHERE id = ?", (user_id,)),
+                ("SELECT * FROM orders WHERE user_id = ?", (user_id,)),
+            ])
+
+        Args:
+            statements (Sequence[Union[str, Tuple[str, Sequence[Any]]]]): SQL strings, or (sql, params) pairs.
+            row_format (Optional[str]): "dict", "tuple" or "row". Defaults to the connector's row_format.
+            timeout (Optional[float]): Seconds the batch may run. Defaults to the connector's query_timeout.
+            lane (Optional[str]): Pool lane to run on. Defaults to the one chosen with lane().
+            converters (Optional[TypeConverters]): Output converters for this call, over the connector's converters.
+            retry (Optional[bool]): Retry transient failures under the connector's retry_policy. None retries reads
+                only; pass True for writes and procedures that are safe to run again, False to never retry.
+
+        Returns:
+            List[List[Any]]: One list of rows per result set. Statements that return no rows add none.
+
+        Raises:
+            ValueError: If a statement fails or parameters are invalid.
+            TimeoutError: If the batch ran out of time and was cancelled.
+            pyodbc.Error: For any database-related errors.
+        """
+        query, params = combine_statements(statements)
+        return self._retrying(
+            query,
+            retry,
+            functools.partial(self._execute_sets, "query", query, query, params, row_format, timeout, lane, converters),
+        )
+
+    def stream_query_sets(
+        self,
+        query: str,
+        params: Optional[tuple] = None,
+        row_format: Optional[str] = None,
+        lane: Optional[str] = None,
+    ) -> Iterator[List[Any]]:
+        """
+        Executes a query or batch and yields its result sets one at a time, so only one is held in memory.
+
+        The batch is committed when the iterator is exhausted; closing it early rolls back instead. Use
+        combine_statements() from sqlcore.statements to stream the results of several statements. lane picks the
+        pool lane to run on, as in execute_query().
+        """
+        return self._stream_sets("query", query, query, params or (), self._row_format(row_format), lane)
+
+    def stream_stored_procedure_sets(
+        self, proc_name: str, *args: Any, row_format: Optional[str] = None, lane: Optional[str] = None
+    ) -> Iterator[List[Any]]:
+        """Executes a stored procedure and yields its result sets one at a time. See stream_query_sets."""
+        return self._stream_sets(
+            "procedure", proc_name, procedure_call(proc_name, len(args)), args, self._row_format(row_format), lane
+        )
+
+    @instrumented(count_set_rows)
+    def _execute_sets(
+        self,
+        kind: str,
+        name: str,
+        query: str,
+        params: Optional[Sequence[Any]],
+        row_format: Optional[str],
+        timeout: Optional[float] = None,
+        lane: Optional[str] = None,
+        converters: Optional[TypeConverters] = None,
+    ) -> List[List[Any]]:
+        row_format = self._row_format(row_format)
+        conn = self.get_connection(lane=lane)
+        cancellation = self._cancellation(timeout)
+        lost = False
         try:
+            query, input_sizes = self._routine_call(conn, kind, name, query, params)
+            run = functools.partial(
+                run_result_sets,
+                conn,
+                query,
+                params,
+                row_format,
+                commit=self._autocommits(conn),
+                rollback=self._pinned(conn) is None,
+                input_sizes=input_sizes,
+                cancellation=cancellation,
+                converters=converters,
+            )
+            return run() if cancellation is None else self._run_timed(conn, cancellation, run)
+        except pyodbc.Error as e:
+            lost = connection_lost(e)
+            raise statement_error(e, kind, name, params, cancellation) from e
+        finally:
+            self._end_statement(conn, cancellation, lost)
+
+    def _stream_sets(
+        self, kind: str, name: str, query: str, params: Sequence[Any], row_format: str, lane: Optional[str] = None
+    ) -> Iterator[List[Any]]:
+        event = execute_started(self.hooks, kind, name, query, params) if self.hooks else None
+        conn = self._stream_connection(event, lane)
+        cursor = None
+        completed = False
+        error = None
+        try:
+            query, input_sizes = self._routine_call(conn, kind, name, query, params)
             cursor = conn.cursor()
-            if parameters:
-                param_placeholders = ",".join(["?" for _ in parameters])
-                query = f"SELECT * FROM dbo.{tvf_name}({param_placeholders})"
-                cursor.execute(query, parameters)
-            else:
-                query = f"SELECT * FROM dbo.{tvf_name}()"
-                cursor.execute(query)
-    
-            if cursor.description:
-                columns = [col[0] for col in cursor.description]
-                result = [dict(zip(columns, row)) for row in cursor.fetchall()]
-                return result
-            else:
-                return []
-        except pyodbc.ProgrammingError as e:
-            raise ValueError(
-                f"TVF execution failed: '{tvf_name}' with parameters {parameters}. Error: {str(e)}"
-            ) from e
+            execute_statement(cursor, query, params, input_sizes)
+            for rows in iter_result_sets(cursor, row_format):
+                if event is not None:
+                    rows_fetched(self.hooks, event, len(rows))
+                yield rows
+            self._commit(conn)
+            completed = True
         except pyodbc.Error as e:
-            raise pyodbc.Error(
-                f"Database error while executing TVF: '{tvf_name}' with parameters {parameters}. Error: {str(e)}"
-            ) from e
+            error = execution_error(e, kind, name, params)
+            raise error from e
+        except Exception as e:
+            error = e
+            raise
         finally:
-            cursor.close()
+            if event is not None:
+                execute_finished(self.hooks, event, error)
+            try:
+                if cursor is not None:
+                    cursor.close()
+                if not completed:
+                    self._rollback(conn)
+            except pyodbc.Error:
+                pass
             self.release_connection(conn)
 
+    def export_query(
+        self,
+        query: str,
+        params: Optional[tuple] = None,
+        path: Optional[str] = None,
+        format: str = "csv",
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        row_group_size: int = DEFAULT_ROW_GROUP_SIZE,
+        timeout: Optional[float] = None,
+        lane: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        Streams the result of a query straight into a CSV, Parquet or Arrow file.
+
+        Rows are fetched batch_size at a time and written as they arrive, so memory stays bounded and results
+        larger than RAM can be exported. Parquet and Arrow files get a typed schema from the result's column types
+        and are written in row groups of row_group_size rows. Parquet and Arrow require pyarrow.
+
+        Example:
+            stats = db.export_query("SELECT * FROM events WHERE day = ?", ("2024-01-01",), "events.parquet",
+                                    format="parquet")
+
+        Args:
+            query (str): The SQL query to export.
+            params (Optional[tuple]): Parameters to pass to the query.
+            path (str): The file to write. It is overwritten if it exists.
+            format (str): "csv" (with a header row), "parquet" or "arrow" (Arrow IPC file).
+            batch_size (int): Number of rows fetched per round trip.
+            row_group_size (int): Rows per Parquet row group or Arrow record batch, i.e. rows buffered in memory.
+            timeout (Optional[float]): Seconds the export may take, writing included. Defaults to the connector's
+                query_timeout. A cancelled export leaves no file behind.
+            lane (Optional[str]): Pool lane to run on. Defaults to the one chosen with lane().
+
+        Returns:
+            Dict[str, Any]: path, format, rows written and bytes written.
+
+        Raises:
+            ImportError: If format needs pyarrow and it is not installed.
+            ValueError: If the query fails, returns no result set, or parameters are invalid.
+            TimeoutError: If the export took longer than the timeout and was cancelled.
+            pyodbc.Error: For any database-related errors.
+        """
+        check_export_args(path, format, batch_size, row_group_size)
+        return self._export("query", query, query, params, path, format, batch_size, row_group_size, timeout, lane)
+
+    @instrumented(count_exported_rows)
+    def _export(
+        self,
+        kind: str,
+        name: str,
+        query: str,
+        params: Optional[tuple],
+        path: str,
+        format: str,
+        batch_size: int,
+        row_group_size: int,
+        timeout: Optional[float] = None,
+        lane: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        conn = self.get_connection(lane=lane)
+        cancellation = self._cancellation(timeout)
+        lost = False
+        try:
+            run = functools.partial(
+                export_statement,
+                conn,
+                query,
+                params,
+                path,
+                format,
+                batch_size,
+                row_group_size,
+                rollback=self._pinned(conn) is None,
+                cancellation=cancellation,
+            )
+            return run() if cancellation is None else self._run_timed(conn, cancellation, run)
+        except pyodbc.Error as e:
+            lost = connection_lost(e)
+            raise statement_error(e, kind, name, params, cancellation) from e
+        finally:
+            self._end_statement(conn, cancellation, lost)
+
+    def plan_partitions(
+        self,
+        source: str,
+        partition_key: str,
+        partitions: Optional[int] = None,
+        ranges: Optional[Sequence[Tuple[Any, Any]]] = None,
+        params: Optional[tuple] = None,
+    ) -> List[Partition]:
+        """
+        Splits a table or query into key ranges for extract_partitioned().
+
+        With partitions, the smallest and largest key are looked up and the range between them is split into
+        that many ranges of equal width (integer, decimal, float and date/time keys). With ranges, each
+        (lower, upper) pair selects lower <= key < upper; use None for an open bound.
+
+        Args:
+            source (str): A table name (e.g. "dbo.events") or a SELECT query. Queries must not end in ORDER BY.
+            partition_key (str): The column to split on, ideally indexed.
+            partitions (Optional[int]): Number of ranges to compute. Defaults to the number of CPUs.
+            ranges (Optional[Sequence[Tuple[Any, Any]]]): Explicit ranges, used instead of partitions.
+            params (Optional[tuple]): Parameters of the source query.
+
+        Returns:
+            List[Partition]: One partition per range, each holding its filtered query.
+        """
+        query = source_query(source)
+        check_partition_key(partition_key)
+        if ranges is None:
+            bounds = self.execute_query(bounds_query(query, partition_key), params, row_format="tuple")
+            lowest, highest = bounds[0] if bounds else (None, None)
+            ranges = split_range(lowest, highest, partitions or os.cpu_count() or 1)
+        return build_partitions(query, params or (), partition_key, ranges)
+
+    def extract_partitioned(
+        self,
+        source: str,
+        partition_key: str,
+        partitions: Optional[int] = None,
+        ranges: Optional[Sequence[Tuple[Any, Any]]] = None,
+        params: Optional[tuple] = None,
+        workers: Optional[int] = None,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        row_format: Optional[str] = None,
+    ) -> Iterator[Tuple[int, List[Any]]]:
+        """
+        Reads a large table or query in parallel: every key range runs on its own connection in a pool of worker
+        processes, which fetch and convert the rows, and the batches are streamed back as they arrive.
+
+        Batches from different partitions are interleaved. At most a few batches per worker are buffered, so
+        memory stays bounded when the consumer is slower than the workers. Closing the iterator stops the workers.
+
+        Example:
+            for partition, rows in db.extract_partitioned("dbo.events", "id", partitions=16, workers=8):
+                load(rows)
+
+        Args:
+            source (str): A table name or a SELECT query. See plan_partitions.
+            partition_key (str): The column to split on.
+            partitions (Optional[int]): Number of ranges to compute. Defaults to the number of CPUs.
+            ranges (Optional[Sequence[Tuple[Any, Any]]]): Explicit (lower, upper) ranges, used instead of partitions.
+            params (Optional[tuple]): Parameters of the source query.
+            workers (Optional[int]): Number of worker processes. Defaults to the number of CPUs, at most one per
+                partition.
+            batch_size (int): Number of rows fetched per round trip and yielded per batch.
+            row_format (Optional[str]): "dict", "tuple" or "row". Defaults to the connector's row_format.
+
+        Returns:
+            Iterator[Tuple[int, List[Any]]]: (partition index, batch of rows) pairs.
+
+        Raises:
+            ValueError: If a partition query fails or parameters are invalid.
+            pyodbc.Error: For any database-related errors.
+        """
+        if batch_size < 1:
+            raise ValueError("batch_size must be at least 1")
+        plan = self.plan_partitions(source, partition_key, partitions, ranges, params)
+        return self._extract(plan, workers, batch_size, self._row_format(row_format))
+
+    def extract_partitioned_to_files(
+        self,
+        source: str,
+        partition_key: str,
+        output_dir: str,
+        partitions: Optional[int] = None,
+        ranges: Optional[Sequence[Tuple[Any, Any]]] = None,
+        params: Optional[tuple] = None,
+        workers: Optional[int] = None,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        format: str = "csv",
+        row_group_size: int = DEFAULT_ROW_GROUP_SIZE,
+    ) -> List[Dict[str, Any]]:
+        """
+        Like extract_partitioned(), but every worker writes its partition straight to its own file
+        (output_dir/part-00000.csv, ...), so the rows never pass through this process. See export_query for the
+        formats.
+
+        Returns:
+            List[Dict[str, Any]]: One summary per partition, in order: partition, lower, upper, path, rows, bytes.
+        """
+        if batch_size < 1:
+            raise ValueError("batch_size must be at least 1")
+        validate_export_format(format)
+        plan = self.plan_partitions(source, partition_key, partitions, ranges, params)
+        os.makedirs(output_dir, exist_ok=True)
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=self._workers(workers, plan), mp_context=context) as executor:
+            futures = [
+                executor.submit(
+                    extract_partition,
+                    self.conn_string,
+                    partition,
+                    batch_size,
+                    "tuple",
+                    output_dir,
+                    format,
+                    row_group_size,
+                )
+                for partition in plan
+            ]
+            try:
+                return [self._partition_result(future, partition) for future, partition in zip(futures, plan)]
+            finally:
+                for future in futures:
+                    future.cancel()
+
+    def _extract(
+        self, plan: List[Partition], workers: Optional[int], batch_size: int, row_format: str
+    ) -> Iterator[Tuple[int, List[Any]]]:
+        # Workers are spawned rather than forked so that they do not inherit this process's open connections.
+        context = multiprocessing.get_context("spawn")
+        workers = self._workers(workers, plan)
+        batches = context.Queue(maxsize=workers * 2)
+        stop = context.Event()
+        executor = ProcessPoolExecutor(
+            max_workers=workers, mp_context=context, initializer=init_worker, initargs=(batches, stop)
+        )
+        futures = []
+        try:
+            futures = [
+                executor.submit(extract_partition, self.conn_string, partition, batch_size, row_format)
+                for partition in plan
+            ]
+            remaining = len(futures)
+            row_class = None
+            while remaining:
+                try:
+                    index, columns, rows = batches.get(timeout=0.5)
+                except queue.Empty:
+                    # A worker that died (e.g. a crashed process) never sends its end marker.
+                    for future, partition in zip(futures, plan):
+                        if future.done() and future.exception() is not None:
+                            self._partition_result(future, partition)
+                    continue
+                if rows is None:
+                    remaining -= 1
+                    self._partition_result(futures[index], plan[index])
+                    continue
+                if row_format == "row":
+                    if row_class is None:
+                        row_class = row_type(columns)
+                    rows = list(map(row_class, rows))
+                yield index, rows
+        finally:
+            stop.set()
+            for future in futures:
+                future.cancel()
+            executor.shutdown(wait=True)
+
+    @staticmethod
+    def _workers(workers: Optional[int], plan: List[Partition]) -> int:
+        if workers is not None and workers < 1:
+            raise ValueError("workers must be at least 1")
+        return max(1, min(workers or os.cpu_count() or 1, len(plan)))
+
+    @staticmethod
+    def _partition_result(future: Any, partition: Partition) -> Dict[str, Any]:
+        try:
+            return future.result()
+        except pyodbc.Error as e:
+            raise execution_error(e, "query", partition.query, partition.params) from e
+
     def close(self) -> None:
         """Closes all connections in the pool."""
-        if self.pool:
-            while not self.pool.empty():
-                conn = self.pool.get()
-                conn.close()
\ No newline at end of file
+        if self.pool is not None:
+            self.pool.close()
\ No newline at end of file
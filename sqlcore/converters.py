@@ -0,0 +1,150 @@
+import datetime
+import struct
+import uuid
+from typing import Any, Callable, Dict, Hashable, Iterator, Optional, Tuple
+
+import pyodbc
+
+# ODBC type codes of the columns the built-in converters decode. SQL_SS_TIMESTAMPOFFSET is SQL Server's
+# DATETIMEOFFSET, which pyodbc cannot return without a converter.
+SQL_NUMERIC = 2
+SQL_DECIMAL = 3
+SQL_GUID = -11
+SQL_SS_TIMESTAMPOFFSET = -155
+
+# SQL_SS_TIMESTAMPOFFSET_STRUCT: year, month, day, hour, minute, second, fraction (ns), timezone hour and minute.
+_DATETIMEOFFSET = struct.Struct("<6hI2h")
+_TIMEZONES: Dict[Tuple[int, int], datetime.timezone] = {}
+# An SQL_NUMERIC_STRUCT starts with the precision, 1 to 38, below the first character of any number's text ("+").
+_NUMERIC_TEXT_START = 0x2B
+
+OutputConverter = Callable[[bytes], Any]
+
+
+def decimal_to_float(value: bytes) -> float:
+    """
+    Decodes a DECIMAL or NUMERIC value to a float, skipping the decimal.Decimal pyodbc builds by default.
+
+    Drivers hand the value over either as its text or as an SQL_NUMERIC_STRUCT (precision, scale, sign and a
+    16-byte little-endian integer), told apart by their first byte.
+    """
+    if value[0] >= _NUMERIC_TEXT_START:
+        return float(value)
+    unscaled = int.from_bytes(value[3:19], "little") / 10 ** value[1]
+    return unscaled if value[2] else -unscaled
+
+
+def datetimeoffset_to_datetime(value: bytes) -> datetime.datetime:
+    """Decodes a DATETIMEOFFSET value to a timezone-aware datetime (microsecond precision)."""
+    year, month, day, hour, minute, second, fraction, tz_hour, tz_minute = _DATETIMEOFFSET.unpack(value)
+    tz = _TIMEZONES.get((tz_hour, tz_minute))
+    if tz is None:
+        tz = _TIMEZONES.setdefault(
+            (tz_hour, tz_minute), datetime.timezone(datetime.timedelta(hours=tz_hour, minutes=tz_minute))
+        )
+    return datetime.datetime(year, month, day, hour, minute, second, fraction // 1000, tz)
+
+
+def guid_to_uuid(value: bytes) -> uuid.UUID:
+    """Decodes a UNIQUEIDENTIFIER value, which the driver sends as a little-endian SQLGUID, to a uuid.UUID."""
+    return uuid.UUID(bytes_le=value)
+
+
+class TypeConverters:
+    """
+    A registry of pyodbc output converters by ODBC SQL type, installed on connections with
+    add_output_converter().
+
+    A converter receives the raw bytes of a non-NULL value of its type and returns the Python value; the driver
+    calls it inside its own fetch loop, so values are decoded once, as rows are built, instead of in a second
+    pass over every row. NULLs are returned as None without calling it. Registering None for a type restores
+    the driver's default decoding of that type, which is how a per-call registry switches off a conversion
+    the connector applies.
+
+    Example:
+        converters = TypeConverters.fast()
+        converters.add_output_converter(SQL_DECIMAL, decimal.Decimal)
+    """
+
+    __slots__ = ("_converters",)
+
+    def __init__(self, converters: Optional[Dict[int, Optional[OutputConverter]]] = None) -> None:
+        self._converters: Dict[int, Optional[OutputConverter]] = {}
+        for sql_type, func in (converters or {}).items():
+            self.add_output_converter(sql_type, func)
+
+    @classmethod
+    def fast(cls) -> "TypeConverters":
+        """
+        The built-in converters: DECIMAL and NUMERIC to float, DATETIMEOFFSET to an aware datetime and
+        UNIQUEIDENTIFIER to uuid.UUID. float trades the exactness of decimal.Decimal for speed; only use it
+        where binary floating point is acceptable, e.g. not for money.
+        """
+        return cls(
+            {
+                SQL_DECIMAL: decimal_to_float,
+                SQL_NUMERIC: decimal_to_float,
+                SQL_SS_TIMESTAMPOFFSET: datetimeoffset_to_datetime,
+                SQL_GUID: guid_to_uuid,
+            }
+        )
+
+    def add_output_converter(self, sql_type: int, func: Optional[OutputConverter]) -> None:
+        """
+        Registers func for values of sql_type, replacing any converter registered for it.
+
+        Raises:
+            ValueError: If sql_type is not an int or func is neither callable nor None.
+        """
+        if not isinstance(sql_type, int) or isinstance(sql_type, bool):
+            raise ValueError(f"Invalid SQL type {sql_type!r}: expected an ODBC type code such as pyodbc.SQL_DECIMAL")
+        if func is not None and not callable(func):
+            raise ValueError(f"Output converter for SQL type {sql_type} must be callable or None")
+        self._converters[sql_type] = func
+
+    def remove_output_converter(self, sql_type: int) -> None:
+        """Unregisters the converter of sql_type, if any."""
+        self._converters.pop(sql_type, None)
+
+    def get_output_converter(self, sql_type: int) -> Optional[OutputConverter]:
+        return self._converters.get(sql_type)
+
+    def copy(self) -> "TypeConverters":
+        return TypeConverters(self._converters)
+
+    def install(self, conn: Any) -> None:
+        """Installs the converters on a pyodbc connection, for every cursor it creates from now on."""
+        for sql_type, func in self._converters.items():
+            conn.add_output_converter(sql_type, func)
+
+    def key(self) -> Hashable:
+        """A hashable identity of the registered converters, for cache keys."""
+        return tuple(sorted(self._converters.items(), key=lambda item: item[0]))
+
+    def __len__(self) -> int:
+        return len(self._converters)
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self._converters)
+
+    def __repr__(self) -> str:
+        return f"TypeConverters({sorted(self._converters)})"
+
+
+def install_converters(conn: Any, converters: TypeConverters) -> Dict[int, Optional[OutputConverter]]:
+    """
+    Installs a call's converters on a connection for the duration of one statement. Returns the converters
+    they replaced, for restore_converters().
+    """
+    previous = {sql_type: conn.get_output_converter(sql_type) for sql_type in converters}
+    converters.install(conn)
+    return previous
+
+
+def restore_converters(conn: Any, previous: Dict[int, Optional[OutputConverter]]) -> None:
+    """Reinstalls the converters a call replaced. A connection closed meanwhile is left alone."""
+    try:
+        for sql_type, func in previous.items():
+            conn.add_output_converter(sql_type, func)
+    except pyodbc.Error:
+        pass
@@ -0,0 +1,225 @@
+import csv
+import datetime
+import decimal
+import os
+from typing import Any, Dict, List, Optional, Sequence
+
+import pyodbc
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow is optional and only needed for Parquet and Arrow exports
+    pa = None
+    pq = None
+
+EXPORT_FORMATS = ("csv", "parquet", "arrow")
+DEFAULT_ROW_GROUP_SIZE = 100_000
+
+
+def require_pyarrow() -> None:
+    """Raises ImportError with installation instructions if pyarrow is not available."""
+    if pa is None:
+        raise ImportError("Parquet and Arrow exports require pyarrow. Install it with `pip install sqlcore[arrow]`.")
+
+
+def validate_export_format(file_format: str) -> str:
+    """Checks that file_format is one of EXPORT_FORMATS, and that pyarrow is installed if it needs it."""
+    if file_format not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format '{file_format}', expected one of {EXPORT_FORMATS}")
+    if file_format != "csv":
+        require_pyarrow()
+    return file_format
+
+
+def check_export_args(path: Optional[str], file_format: str, batch_size: int, row_group_size: int) -> None:
+    """Validates the arguments of export_query() before a connection is checked out."""
+    if not path:
+        raise ValueError("path is required")
+    validate_export_format(file_format)
+    if batch_size < 1:
+        raise ValueError("batch_size must be at least 1")
+    if row_group_size < 1:
+        raise ValueError("row_group_size must be at least 1")
+
+
+def _arrow_type(column: Sequence[Any]) -> Any:
+    """Maps a cursor.description entry (name, type_code, display_size, internal_size, precision, scale, ...)."""
+    type_code = column[1]
+    if type_code is bool:
+        return pa.bool_()
+    if type_code is int:
+        return pa.int64()
+    if type_code is float:
+        return pa.float64()
+    if type_code is decimal.Decimal:
+        precision, scale = column[4], column[5]
+        if precision and 0 < precision <= 38:
+            return pa.decimal128(precision, scale or 0)
+        return pa.float64()
+    if type_code is datetime.datetime:
+        return pa.timestamp("us")
+    if type_code is datetime.date:
+        return pa.date32()
+    if type_code is datetime.time:
+        return pa.time64("us")
+    if type_code in (bytes, bytearray):
+        return pa.binary()
+    return pa.string()
+
+
+class CsvExportWriter:
+    """Writes batches of rows to a CSV file with a header row. NULLs are written as empty fields."""
+
+    def __init__(self, path: str, description: Sequence[Sequence[Any]]) -> None:
+        self._file = open(path, "w", newline="", encoding="utf-8")
+        self._writer = csv.writer(self._file)
+        self._writer.writerow([col[0] for col in description])
+
+    def write_batch(self, rows: Sequence[Sequence[Any]]) -> None:
+        self._writer.writerows(rows)
+
+    def close(self) -> None:
+        self._file.close()
+
+    def abort(self) -> None:
+        self._file.close()
+
+
+class ArrowExportWriter:
+    """
+    Writes batches of rows to a Parquet file or an Arrow IPC file, with a schema taken from cursor.description.
+
+    Rows are buffered until row_group_size rows have arrived and then written as one Parquet row group (or Arrow
+    record batch), so at most one row group is held in memory.
+    """
+
+    def __init__(
+        self, path: str, description: Sequence[Sequence[Any]], file_format: str, row_group_size: int
+    ) -> None:
+        require_pyarrow()
+        self.schema = pa.schema([pa.field(col[0], _arrow_type(col)) for col in description])
+        # Types without an Arrow equivalent (GUIDs, SQL_VARIANT, ...) are written as text, and decimals too wide
+        # for decimal128 as floats.
+        self._casts = [
+            (position, str if pa.types.is_string(field.type) else float)
+            for position, (field, col) in enumerate(zip(self.schema, description))
+            if pa.types.is_string(field.type) or (col[1] is decimal.Decimal and pa.types.is_floating(field.type))
+        ]
+        self._row_group_size = row_group_size
+        self._pending: List[Sequence[Any]] = []
+        if file_format == "parquet":
+            self._writer = pq.ParquetWriter(path, self.schema)
+        else:
+            self._writer = pa.ipc.new_file(path, self.schema)
+
+    def write_batch(self, rows: Sequence[Sequence[Any]]) -> None:
+        self._pending.extend(rows)
+        while len(self._pending) >= self._row_group_size:
+            self._flush(self._pending[: self._row_group_size])
+            del self._pending[: self._row_group_size]
+
+    def close(self) -> None:
+        if self._pending:
+            self._flush(self._pending)
+            self._pending = []
+        self._writer.close()
+
+    def abort(self) -> None:
+        """Closes the file without writing the buffered rows."""
+        self._pending = []
+        self._writer.close()
+
+    def _flush(self, rows: Sequence[Sequence[Any]]) -> None:
+        columns = [list(values) for values in zip(*rows)]
+        for position, cast in self._casts:
+            columns[position] = [value if value is None else cast(value) for value in columns[position]]
+        batch = pa.record_batch(
+            [pa.array(values, type=field.type) for values, field in zip(columns, self.schema)], schema=self.schema
+        )
+        if isinstance(self._writer, pq.ParquetWriter):
+            self._writer.write_batch(batch, row_group_size=len(rows))
+        else:
+            self._writer.write_batch(batch)
+
+
+def open_export_writer(
+    path: str, description: Sequence[Sequence[Any]], file_format: str, row_group_size: int = DEFAULT_ROW_GROUP_SIZE
+) -> Any:
+    """Creates the writer for file_format ("csv", "parquet" or "arrow")."""
+    if file_format == "csv":
+        return CsvExportWriter(path, description)
+    return ArrowExportWriter(path, description, file_format, row_group_size)
+
+
+def export_cursor(
+    cursor: Any,
+    path: str,
+    file_format: str,
+    batch_size: int,
+    row_group_size: int = DEFAULT_ROW_GROUP_SIZE,
+) -> Dict[str, Any]:
+    """
+    Streams the cursor's result set into a file, fetchmany batch by batch. The file is removed if the export fails.
+
+    Returns:
+        Dict[str, Any]: path, format, rows written and bytes written.
+
+    Raises:
+        ValueError: If the statement returned no result set.
+    """
+    if not cursor.description:
+        raise ValueError("The statement did not return a result set to export")
+    writer = open_export_writer(path, cursor.description, file_format, row_group_size)
+    rows_written = 0
+    try:
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            writer.write_batch(rows)
+            rows_written += len(rows)
+        writer.close()
+    except BaseException:
+        # Do not leave a truncated file behind that looks like a complete export.
+        try:
+            writer.abort()
+        finally:
+            os.remove(path)
+        raise
+    return {"path": path, "format": file_format, "rows": rows_written, "bytes": os.path.getsize(path)}
+
+
+def export_statement(
+    conn: Any,
+    query: str,
+    params: Optional[Sequence[Any]],
+    path: str,
+    file_format: str,
+    batch_size: int,
+    row_group_size: int = DEFAULT_ROW_GROUP_SIZE,
+    rollback: bool = True,
+    cancellation: Optional[Any] = None,
+) -> Dict[str, Any]:
+    """
+    Executes a query on conn and streams its result into a file, as a single blocking unit.
+
+    The read transaction is rolled back afterwards unless rollback is False (the connection is pinned).
+    cancellation lets another thread cancel the statement, see sqlcore.cancel.
+    """
+    cursor = conn.cursor()
+    try:
+        if cancellation is not None:
+            cancellation.attach(cursor)
+        if params:
+            cursor.execute(query, params)
+        else:
+            cursor.execute(query)
+        return export_cursor(cursor, path, file_format, batch_size, row_group_size)
+    finally:
+        cursor.close()
+        if rollback:
+            try:
+                conn.rollback()
+            except pyodbc.Error:
+                pass
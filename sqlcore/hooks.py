@@ -0,0 +1,208 @@
+import functools
+import re
+import time
+from typing import Any, Callable, Dict, Optional, Sequence
+
+# String literals (including N'...'), hex and numeric literals are replaced by ? in fingerprints.
+_LITERAL = re.compile(r"N?'(?:[^']|'')*'|\b0x[0-9A-Fa-f]+\b|(?<![\w@#$.])\d+(?:\.\d+)?(?:[eE][-+]?\d+)?\b")
+_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def fingerprint(query: str) -> str:
+    """
+    Reduces a statement to its shape: literals become ?, IN lists collapse to (?) and whitespace is normalized,
+    so that statements that only differ in inlined values are aggregated together.
+    """
+    text = _LITERAL.sub("?", query)
+    text = _IN_LIST.sub("(?)", text)
+    return _WHITESPACE.sub(" ", text).strip()
+
+
+class QueryEvent:
+    """
+    One statement executed by a connector, as passed to QueryHooks.
+
+    Attributes:
+        kind (str): One of "query", "procedure" or "tvf".
+        name (str): The query text, procedure name or TVF name.
+        query (str): The SQL text sent to the server.
+        params (Sequence[Any]): The parameters of the statement.
+        start_ns (int): time.perf_counter_ns() when the call started, before its connection was checked out.
+        end_ns (Optional[int]): time.perf_counter_ns() when the last row was fetched or the call failed. The
+            duration is the latency seen by the caller; the part spent waiting for a connection is reported
+            separately by on_acquire().
+        rows (int): Number of rows fetched so far.
+        error (Optional[BaseException]): The exception the call raised, if any.
+    """
+
+    __slots__ = ("kind", "name", "query", "params", "start_ns", "end_ns", "rows", "error", "_fingerprint")
+
+    def __init__(self, kind: str, name: str, query: str, params: Optional[Sequence[Any]]) -> None:
+        self.kind = kind
+        self.name = name
+        self.query = query
+        self.params = params or ()
+        self.start_ns = time.perf_counter_ns()
+        self.end_ns: Optional[int] = None
+        self.rows = 0
+        self.error: Optional[BaseException] = None
+        self._fingerprint: Optional[str] = None
+
+    @property
+    def duration_ns(self) -> Optional[int]:
+        """Nanoseconds from the start of the call until it finished, or None while it is running."""
+        return None if self.end_ns is None else self.end_ns - self.start_ns
+
+    @property
+    def fingerprint(self) -> str:
+        """The statement's fingerprint (see fingerprint()), computed on first access."""
+        if self._fingerprint is None:
+            self._fingerprint = fingerprint(self.query)
+        return self._fingerprint
+
+    def __repr__(self) -> str:
+        return f"QueryEvent({self.kind!r}, {self.name!r}, rows={self.rows}, duration_ns={self.duration_ns})"
+
+
+class QueryHooks:
+    """
+    Base class for connector instrumentation. Subclass it, override the events you need and register the
+    instance with the connector's hooks argument or add_hook(); the other events are no-ops.
+
+    Hooks are called synchronously, in the thread that runs the call (the event loop thread for the async
+    connector), so they should be cheap and must not block. Exceptions raised by a hook propagate to the caller.
+    Timings are taken with time.perf_counter_ns().
+
+    Example:
+        class PrintSlowQueries(QueryHooks):
+            def on_execute_end(self, event):
+                if event.duration_ns > 100_000_000:
+                    print(event.fingerprint, event.duration_ns / 1e6, "ms")
+
+        db = DatabaseConnector(conn_string, hooks=[PrintSlowQueries()])
+    """
+
+    def on_acquire(self, wait_ns: int) -> None:
+        """A connection was checked out after waiting wait_ns (including opening it, without a pool)."""
+
+    def on_execute_start(self, event: QueryEvent) -> None:
+        """A statement is about to be sent."""
+
+    def on_fetch(self, event: QueryEvent, rows: int) -> None:
+        """rows rows were fetched: once per call, or once per batch or result set when streaming."""
+
+    def on_error(self, event: QueryEvent, error: BaseException) -> None:
+        """The call failed with error. on_execute_end() follows."""
+
+    def on_execute_end(self, event: QueryEvent) -> None:
+        """The call finished, successfully or not (see event.error)."""
+
+    def on_release(self, held_ns: int) -> None:
+        """A connection was released after being held for held_ns."""
+
+
+def execute_started(
+    hooks: Sequence[QueryHooks], kind: str, name: str, query: str, params: Optional[Sequence[Any]]
+) -> QueryEvent:
+    event = QueryEvent(kind, name, query, params)
+    for hook in hooks:
+        hook.on_execute_start(event)
+    return event
+
+
+def rows_fetched(hooks: Sequence[QueryHooks], event: QueryEvent, rows: int) -> None:
+    event.rows += rows
+    for hook in hooks:
+        hook.on_fetch(event, rows)
+
+
+def execute_finished(hooks: Sequence[QueryHooks], event: QueryEvent, error: Optional[BaseException] = None) -> None:
+    event.end_ns = time.perf_counter_ns()
+    if error is not None:
+        event.error = error
+        for hook in hooks:
+            hook.on_error(event, error)
+    for hook in hooks:
+        hook.on_execute_end(event)
+
+
+def connection_acquired(hooks: Sequence[QueryHooks], wait_ns: int) -> None:
+    for hook in hooks:
+        hook.on_acquire(wait_ns)
+
+
+def connection_released(hooks: Sequence[QueryHooks], held_ns: int) -> None:
+    for hook in hooks:
+        hook.on_release(held_ns)
+
+
+def instrumented(count_rows: Callable[[Any], int] = len) -> Callable:
+    """
+    Decorates a connector method taking (kind, name, query, params, ...) so that it reports execute, fetch and
+    error events to the connector's hooks. Without hooks the method is called directly.
+    """
+
+    def decorate(method: Callable) -> Callable:
+        @functools.wraps(method)
+        def wrapper(self, kind: str, name: str, query: str, params: Optional[Sequence[Any]], *args: Any) -> Any:
+            if not self.hooks:
+                return method(self, kind, name, query, params, *args)
+            hooks = list(self.hooks)
+            event = execute_started(hooks, kind, name, query, params)
+            try:
+                result = method(self, kind, name, query, params, *args)
+            except BaseException as e:
+                execute_finished(hooks, event, e)
+                raise
+            rows_fetched(hooks, event, count_rows(result))
+            execute_finished(hooks, event)
+            return result
+
+        return wrapper
+
+    return decorate
+
+
+def instrumented_async(count_rows: Callable[[Any], int] = len) -> Callable:
+    """The coroutine version of instrumented()."""
+
+    def decorate(method: Callable) -> Callable:
+        @functools.wraps(method)
+        async def wrapper(self, kind: str, name: str, query: str, params: Optional[Sequence[Any]], *args: Any) -> Any:
+            if not self.hooks:
+                return await method(self, kind, name, query, params, *args)
+            hooks = list(self.hooks)
+            event = execute_started(hooks, kind, name, query, params)
+            try:
+                result = await method(self, kind, name, query, params, *args)
+            except BaseException as e:
+                execute_finished(hooks, event, e)
+                raise
+            rows_fetched(hooks, event, count_rows(result))
+            execute_finished(hooks, event)
+            return result
+
+        return wrapper
+
+    return decorate
+
+
+def count_set_rows(result_sets: Sequence[Sequence[Any]]) -> int:
+    """Total number of rows in a list of result sets."""
+    return sum(len(rows) for rows in result_sets)
+
+
+def count_columnar_rows(columns: Dict[str, Any]) -> int:
+    """Number of rows in a columnar result (column name to array)."""
+    return len(next(iter(columns.values()))) if columns else 0
+
+
+def count_exported_rows(summary: Dict[str, Any]) -> int:
+    """Number of rows an export wrote to its file."""
+    return summary["rows"]
+
+
+def count_no_rows(result: Any) -> int:
+    """For calls that send rows rather than fetch them, like execute_many."""
+    return 0
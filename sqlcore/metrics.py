@@ -0,0 +1,198 @@
+import bisect
+import logging
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Sequence
+
+from .hooks import QueryEvent, QueryHooks
+
+logger = logging.getLogger("sqlcore.slow_queries")
+
+# Upper bounds of the latency buckets, in milliseconds. Slower calls land in a final overflow bucket.
+DEFAULT_BUCKETS_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+OTHER_FINGERPRINT = "<other>"
+
+
+def _ms(duration_ns: Optional[int]) -> Optional[float]:
+    return None if duration_ns is None else duration_ns / 1_000_000
+
+
+class LatencyHistogram:
+    """A fixed-bucket latency histogram with count, sum, min and max, fed with nanosecond durations."""
+
+    __slots__ = ("bounds", "counts", "count", "total_ns", "min_ns", "max_ns")
+
+    def __init__(self, buckets_ms: Sequence[float] = DEFAULT_BUCKETS_MS) -> None:
+        self.bounds = [int(bound * 1_000_000) for bound in buckets_ms]
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.total_ns = 0
+        self.min_ns: Optional[int] = None
+        self.max_ns: Optional[int] = None
+
+    def record(self, duration_ns: int) -> None:
+        self.counts[bisect.bisect_left(self.bounds, duration_ns)] += 1
+        self.count += 1
+        self.total_ns += duration_ns
+        if self.min_ns is None or duration_ns < self.min_ns:
+            self.min_ns = duration_ns
+        if self.max_ns is None or duration_ns > self.max_ns:
+            self.max_ns = duration_ns
+
+    def percentile(self, fraction: float) -> Optional[float]:
+        """
+        Estimates a percentile (fraction between 0 and 1) in milliseconds, as the upper bound of the bucket it
+        falls in, capped at the largest recorded value. None if nothing was recorded.
+        """
+        if not self.count:
+            return None
+        rank = max(1, round(fraction * self.count))
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                bound = self.bounds[index] if index < len(self.bounds) else self.max_ns
+                return min(bound, self.max_ns) / 1_000_000
+        return self.max_ns / 1_000_000
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Returns the count, mean, min, max and p50/p95/p99 in milliseconds, and the bucket counts."""
+        buckets = {f"le_{bound / 1_000_000:g}ms": count for bound, count in zip(self.bounds, self.counts)}
+        buckets["overflow"] = self.counts[-1]
+        return {
+            "count": self.count,
+            "mean_ms": self.total_ns / self.count / 1_000_000 if self.count else None,
+            "min_ms": _ms(self.min_ns),
+            "max_ms": _ms(self.max_ns),
+            "p50_ms": self.percentile(0.50),
+            "p95_ms": self.percentile(0.95),
+            "p99_ms": self.percentile(0.99),
+            "buckets": buckets,
+        }
+
+
+class _QueryStats:
+    __slots__ = ("kind", "latency", "rows", "errors")
+
+    def __init__(self, kind: str, buckets_ms: Sequence[float]) -> None:
+        self.kind = kind
+        self.latency = LatencyHistogram(buckets_ms)
+        self.rows = 0
+        self.errors = 0
+
+
+class MetricsCollector(QueryHooks):
+    """
+    In-memory metrics for one or more connectors: latency histograms and row and error counts per query
+    fingerprint, connection wait and hold times, and a log of slow queries.
+
+    Register it like any other hook. It is thread-safe, so one collector can be shared by sync and async
+    connectors. Calls slower than slow_query_ms are kept in a bounded slow-query log and logged as warnings to
+    the "sqlcore.slow_queries" logger.
+
+    Example:
+        metrics = MetricsCollector(slow_query_ms=500)
+        db = DatabaseConnector(conn_string, hooks=[metrics])
+        ...
+        print(metrics.snapshot()["queries"])
+    """
+
+    def __init__(
+        self,
+        slow_query_ms: Optional[float] = None,
+        slow_log_size: int = 100,
+        max_fingerprints: int = 1000,
+        buckets_ms: Sequence[float] = DEFAULT_BUCKETS_MS,
+    ) -> None:
+        """
+        Args:
+            slow_query_ms (Optional[float]): Calls taking at least this many milliseconds are recorded in the
+                slow-query log. None disables the log.
+            slow_log_size (int): Number of most recent slow queries kept.
+            max_fingerprints (int): Maximum number of distinct fingerprints tracked; further ones are aggregated
+                under "<other>", so that statements with inlined values cannot grow the collector without bound.
+            buckets_ms (Sequence[float]): Upper bounds of the histogram buckets, in milliseconds.
+        """
+        if max_fingerprints < 1:
+            raise ValueError("max_fingerprints must be at least 1")
+        self.slow_query_ms = slow_query_ms
+        self.max_fingerprints = max_fingerprints
+        self.buckets_ms = tuple(sorted(buckets_ms))
+        self._slow_threshold_ns = None if slow_query_ms is None else int(slow_query_ms * 1_000_000)
+        self._slow: Deque[Dict[str, Any]] = deque(maxlen=slow_log_size)
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        """Clears every metric and the slow-query log."""
+        with self._lock:
+            self._queries: Dict[str, _QueryStats] = {}
+            self._acquire_wait = LatencyHistogram(self.buckets_ms)
+            self._connection_hold = LatencyHistogram(self.buckets_ms)
+            self._slow.clear()
+
+    def on_acquire(self, wait_ns: int) -> None:
+        with self._lock:
+            self._acquire_wait.record(wait_ns)
+
+    def on_release(self, held_ns: int) -> None:
+        with self._lock:
+            self._connection_hold.record(held_ns)
+
+    def on_execute_end(self, event: QueryEvent) -> None:
+        duration_ns = event.duration_ns
+        key = event.fingerprint
+        with self._lock:
+            stats = self._queries.get(key)
+            if stats is None:
+                if len(self._queries) >= self.max_fingerprints:
+                    key = OTHER_FINGERPRINT
+                    stats = self._queries.get(key)
+                if stats is None:
+                    stats = self._queries[key] = _QueryStats(event.kind, self.buckets_ms)
+            stats.latency.record(duration_ns)
+            stats.rows += event.rows
+            if event.error is not None:
+                stats.errors += 1
+            slow = self._slow_threshold_ns is not None and duration_ns >= self._slow_threshold_ns
+            if slow:
+                entry = {
+                    "at": time.time(),
+                    "fingerprint": event.fingerprint,
+                    "kind": event.kind,
+                    "name": event.name,
+                    "duration_ms": duration_ns / 1_000_000,
+                    "rows": event.rows,
+                    "error": None if event.error is None else repr(event.error),
+                }
+                self._slow.append(entry)
+        if slow:
+            logger.warning(
+                "Slow %s (%.1f ms, %d rows): %s", event.kind, entry["duration_ms"], event.rows, event.fingerprint
+            )
+
+    def slow_queries(self) -> List[Dict[str, Any]]:
+        """Returns the slow-query log, oldest first."""
+        with self._lock:
+            return list(self._slow)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Returns the collected metrics:
+
+        - queries: per fingerprint, the kind, rows, errors and latency histogram (see LatencyHistogram.snapshot)
+        - acquire_wait: time spent waiting for a connection
+        - connection_hold: time connections were held between checkout and release
+        - slow_queries: the slow-query log
+        """
+        with self._lock:
+            return {
+                "queries": {
+                    key: {"kind": stats.kind, "rows": stats.rows, "errors": stats.errors, **stats.latency.snapshot()}
+                    for key, stats in self._queries.items()
+                },
+                "acquire_wait": self._acquire_wait.snapshot(),
+                "connection_hold": self._connection_hold.snapshot(),
+                "slow_queries": list(self._slow),
+            }
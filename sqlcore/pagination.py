@@ -0,0 +1,122 @@
+import re
+from typing import Any, List, Optional, Sequence, Tuple, Union
+
+from .statements import NAME_PART
+
+DEFAULT_PAGE_SIZE = 1000
+
+# A key column with an optional direction, e.g. "id", "[created at] DESC".
+_KEY = re.compile(rf"^\s*({NAME_PART})(?:\s+(ASC|DESC))?\s*$", re.I)
+
+
+class PageKey:
+    """One ordering column of a keyset pagination: its SQL name, result column name and direction."""
+
+    __slots__ = ("sql", "column", "descending")
+
+    def __init__(self, sql: str, column: str, descending: bool) -> None:
+        self.sql = sql
+        self.column = column
+        self.descending = descending
+
+    def __repr__(self) -> str:
+        return f"PageKey({self.sql!r}, descending={self.descending})"
+
+
+def parse_page_keys(keys: Union[str, Sequence[str]]) -> List[PageKey]:
+    """
+    Parses the ordering keys of a keyset pagination: one column name, or several, each optionally followed by
+    ASC or DESC. The names are interpolated into the SQL text, so anything else is rejected.
+
+    Raises:
+        ValueError: If there is no key or a key is not a plain or [bracketed] column name.
+    """
+    if isinstance(keys, str):
+        keys = [keys]
+    parsed = []
+    for key in keys:
+        match = _KEY.match(key)
+        if not match:
+            raise ValueError(f"Invalid page key '{key}': expected a column name, optionally followed by ASC or DESC")
+        name = match.group(1)
+        column = name[1:-1] if name.startswith("[") else name
+        parsed.append(PageKey(name, column, (match.group(2) or "").upper() == "DESC"))
+    if not parsed:
+        raise ValueError("At least one page key is required")
+    return parsed
+
+
+def page_query(query: str, keys: Sequence[PageKey], page_size: int, continued: bool) -> str:
+    """
+    Builds the query of one page: the next page_size rows of query in key order, after the last key seen when
+    continued is set.
+
+    The continuation predicate is the expansion of (k1, k2, ...) > (v1, v2, ...), which T-SQL has no syntax for,
+    with a leading k1 >= v1 so that an index on the keys is used for a seek. Its parameters come from
+    page_params(), after those of query.
+    """
+    order = ", ".join(f"{key.sql} {'DESC' if key.descending else 'ASC'}" for key in keys)
+    sql = f"SELECT TOP ({int(page_size)}) * FROM ({query}) AS sqlcore_page"
+    if continued:
+        branches = []
+        for index, key in enumerate(keys):
+            equal = [f"{previous.sql} = ?" for previous in keys[:index]]
+            branches.append(" AND ".join([*equal, f"{key.sql} {'<' if key.descending else '>'} ?"]))
+        where = " OR ".join(f"({branch})" for branch in branches)
+        if len(keys) > 1:
+            where = f"{keys[0].sql} {'<=' if keys[0].descending else '>='} ? AND ({where})"
+        sql += f" WHERE {where}"
+    return f"{sql} ORDER BY {order}"
+
+
+def page_params(keys: Sequence[PageKey], last: Sequence[Any]) -> Tuple[Any, ...]:
+    """Returns the parameters of page_query()'s continuation predicate for the last key seen."""
+    if len(last) != len(keys):
+        raise ValueError(f"Expected {len(keys)} key values to continue after, got {len(last)}")
+    params: List[Any] = [last[0]] if len(keys) > 1 else []
+    for index in range(len(keys)):
+        params.extend(last[: index + 1])
+    return tuple(params)
+
+
+def last_key(keys: Sequence[PageKey], row: Any) -> Tuple[Any, ...]:
+    """
+    Returns the key values of a row returned as a dict or Row.
+
+    Raises:
+        ValueError: If a key column is missing from the result or NULL, which keyset pagination cannot continue from.
+    """
+    values = []
+    for key in keys:
+        try:
+            value = row[key.column]
+        except KeyError:
+            raise ValueError(f"Page key '{key.column}' is not a column of the query's result") from None
+        if value is None:
+            raise ValueError(f"Page key '{key.column}' is NULL; keyset pagination requires non-NULL keys")
+        values.append(value)
+    return tuple(values)
+
+
+def check_page_size(page_size: int) -> int:
+    if page_size < 1:
+        raise ValueError("page_size must be at least 1")
+    return page_size
+
+
+def fetch_format(row_format: str) -> str:
+    """Row format pages are fetched in: tuples carry no column names, so they are fetched as Row and converted."""
+    return "row" if row_format == "tuple" else row_format
+
+
+def as_row_format(rows: List[Any], row_format: str) -> List[Any]:
+    return [tuple(row) for row in rows] if row_format == "tuple" else rows
+
+
+def page_start(keys: Sequence[PageKey], after: Optional[Sequence[Any]]) -> Optional[Tuple[Any, ...]]:
+    """Checks the key values a pagination resumes after, if any."""
+    if after is None:
+        return None
+    after = tuple(after)
+    page_params(keys, after)
+    return after
@@ -0,0 +1,205 @@
+import os
+import queue
+import re
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import pyodbc
+
+from .export import DEFAULT_ROW_GROUP_SIZE, export_cursor
+from .rows import convert_rows
+from .statements import NAME_PART
+
+# A column, or a table name with up to two qualifiers.
+_COLUMN = re.compile(rf"^{NAME_PART}$")
+_TABLE = re.compile(rf"^{NAME_PART}(?:\.{NAME_PART}){{0,2}}$")
+
+
+class Partition:
+    """
+    One key range of a partitioned extraction: lower <= key < upper, where a None bound is open.
+
+    The partition whose lower bound is open also holds the rows whose key is NULL.
+    """
+
+    __slots__ = ("index", "lower", "upper", "query", "params")
+
+    def __init__(self, index: int, lower: Any, upper: Any, query: str, params: Tuple[Any, ...]) -> None:
+        self.index = index
+        self.lower = lower
+        self.upper = upper
+        self.query = query
+        self.params = params
+
+    def __repr__(self) -> str:
+        return f"Partition(index={self.index}, lower={self.lower!r}, upper={self.upper!r})"
+
+
+def source_query(source: str) -> str:
+    """Returns source itself if it is a query, or a SELECT of the whole table if it is a table name."""
+    source = source.strip()
+    if _TABLE.match(source):
+        return f"SELECT * FROM {source}"
+    return source
+
+
+def check_partition_key(partition_key: str) -> str:
+    """Checks that the partition key is a single column name, since it is interpolated into the SQL text."""
+    if not _COLUMN.match(partition_key):
+        raise ValueError(f"Invalid partition key '{partition_key}': expected a single column name")
+    return partition_key
+
+
+def bounds_query(query: str, partition_key: str) -> str:
+    """Builds the query that returns the smallest and largest partition key of the source."""
+    return f"SELECT MIN({partition_key}), MAX({partition_key}) FROM ({query}) AS sqlcore_bounds"
+
+
+def split_range(lowest: Any, highest: Any, count: int) -> List[Tuple[Any, Any]]:
+    """
+    Splits [lowest, highest] into up to count contiguous ranges of roughly equal width.
+
+    Works for integer, decimal, float and date/time keys. The first range has an open lower bound and the last
+    an open upper bound, so rows added outside the observed bounds are not lost.
+
+    Raises:
+        ValueError: If the key type does not support arithmetic; pass explicit ranges for such keys.
+    """
+    if count < 1:
+        raise ValueError("partitions must be at least 1")
+    if lowest is None or count == 1:
+        return [(None, None)]
+    try:
+        if isinstance(lowest, int) and not isinstance(lowest, bool):
+            step = max(1, -(-(highest - lowest + 1) // count))
+            boundaries = [lowest + step * i for i in range(1, count)]
+        else:
+            boundaries = [lowest + (highest - lowest) * i / count for i in range(1, count)]
+    except TypeError as e:
+        raise ValueError(
+            f"Cannot split partition key values of type {type(lowest).__name__}; pass ranges explicitly"
+        ) from e
+    edges = [None]
+    for boundary in boundaries:
+        if lowest < boundary <= highest and (edges[-1] is None or boundary > edges[-1]):
+            edges.append(boundary)
+    edges.append(None)
+    return list(zip(edges, edges[1:]))
+
+
+def build_partitions(
+    query: str, params: Sequence[Any], partition_key: str, ranges: Sequence[Tuple[Any, Any]]
+) -> List[Partition]:
+    """Builds the filtered query of every range. The source query's parameters come first."""
+    partitions = []
+    for index, (lower, upper) in enumerate(ranges):
+        conditions = []
+        range_params = []
+        if lower is not None:
+            conditions.append(f"{partition_key} >= ?")
+            range_params.append(lower)
+        if upper is not None:
+            conditions.append(f"{partition_key} < ?")
+            range_params.append(upper)
+        where = " AND ".join(conditions) or "1 = 1"
+        if lower is None:
+            where = f"({where}) OR {partition_key} IS NULL"
+        partitions.append(
+            Partition(
+                index,
+                lower,
+                upper,
+                f"SELECT * FROM ({query}) AS sqlcore_partition WHERE {where}",
+                tuple(params) + tuple(range_params),
+            )
+        )
+    return partitions
+
+
+# Set in each worker process by init_worker() when batches are streamed back to the parent.
+_queue: Any = None
+_stop: Any = None
+
+
+class _Stopped(Exception):
+    pass
+
+
+def init_worker(batches: Any, stop: Any) -> None:
+    global _queue, _stop
+    _queue = batches
+    _stop = stop
+
+
+def _put(item: Any) -> None:
+    # Blocks while the parent is behind (bounding memory), but gives up as soon as it stops consuming.
+    while True:
+        if _stop.is_set():
+            # Do not wait for unread batches to be flushed to the parent when the process exits.
+            _queue.cancel_join_thread()
+            raise _Stopped()
+        try:
+            _queue.put(item, timeout=0.1)
+            return
+        except queue.Full:
+            continue
+
+
+def extract_partition(
+    conn_string: str,
+    partition: Partition,
+    batch_size: int,
+    row_format: str,
+    output_dir: Optional[str] = None,
+    file_format: str = "csv",
+    row_group_size: int = DEFAULT_ROW_GROUP_SIZE,
+) -> Dict[str, Any]:
+    """
+    Runs one partition on its own connection, in a worker process.
+
+    Batches are converted to row_format in the worker and either put on the stream queue as (index, columns,
+    rows), followed by an (index, None, None) end marker, or written to a file in output_dir in file_format ("csv", "parquet" or "arrow").
+
+    Returns:
+        Dict[str, Any]: The partition index, bounds, row count and, for file output, the path and bytes written.
+    """
+    summary: Dict[str, Any] = {"partition": partition.index, "lower": partition.lower, "upper": partition.upper}
+    rows_read = 0
+    conn = pyodbc.connect(conn_string, autocommit=False)
+    try:
+        cursor = conn.cursor()
+        if partition.params:
+            cursor.execute(partition.query, partition.params)
+        else:
+            cursor.execute(partition.query)
+        if output_dir is not None:
+            path = os.path.join(output_dir, f"part-{partition.index:05d}.{file_format}")
+            written = export_cursor(cursor, path, file_format, batch_size, row_group_size)
+            rows_read = written["rows"]
+            summary.update(path=path, bytes=written["bytes"])
+        else:
+            columns = [col[0] for col in cursor.description]
+            # Rows are sent as tuples and turned into Row objects by the consumer, which then creates one Row
+            # class for the whole extract instead of pickling the column names with every row.
+            wire_format = "tuple" if row_format == "row" else row_format
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                _put((partition.index, columns, convert_rows(columns, rows, wire_format)))
+                rows_read += len(rows)
+        cursor.close()
+    except _Stopped:
+        pass
+    finally:
+        try:
+            conn.rollback()
+            conn.close()
+        except pyodbc.Error:
+            pass
+        if output_dir is None:
+            try:
+                _put((partition.index, None, None))
+            except _Stopped:
+                pass
+    summary["rows"] = rows_read
+    return summary
@@ -0,0 +1,775 @@
+import abc
+import asyncio
+import functools
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+# Handed to a waiter instead of a connection when a pool slot has been freed and the waiter should open a new one.
+_OPEN_NEW = object()
+# Handed to the waiters still queued when the pool is closed.
+_CLOSED = object()
+
+# The lane of checkouts that do not name one. It always exists, and can be configured like any other lane.
+DEFAULT_LANE = "default"
+
+
+def _ping(conn: Any) -> bool:
+    """Runs a trivial query to check that a connection is still usable."""
+    try:
+        cursor = conn.cursor()
+        try:
+            cursor.execute("SELECT 1")
+            cursor.fetchall()
+        finally:
+            cursor.close()
+        conn.rollback()
+        return True
+    except Exception:
+        return False
+
+
+def _close_quietly(conn: Any) -> None:
+    try:
+        conn.close()
+    except Exception:
+        pass
+
+
+class PoolLane:
+    """
+    A named share of a pool's connections, for one class of work.
+
+    reserved connections of the pool are kept for the lane: other lanes cannot check them out, even when the lane
+    leaves them unused. max_size caps how many connections the lane may hold at once, its reservation plus what it
+    borrows from the unreserved rest. When connections are scarce, waiters of the lane with the highest priority
+    are served first, and waiters of one priority in FIFO order.
+    """
+
+    __slots__ = ("reserved", "max_size", "priority")
+
+    def __init__(self, reserved: int = 0, max_size: Optional[int] = None, priority: int = 0) -> None:
+        """
+        Args:
+            reserved (int): Connections kept for this lane. The reservations of all lanes must fit in the pool.
+            max_size (Optional[int]): Most connections the lane may hold at once. Defaults to the pool's max_size.
+            priority (int): Waiters of lanes with a higher priority are served first.
+        """
+        self.reserved = reserved
+        self.max_size = max_size
+        self.priority = priority
+
+    def __repr__(self) -> str:
+        return f"PoolLane(reserved={self.reserved}, max_size={self.max_size}, priority={self.priority})"
+
+
+class _Lane:
+    """The state of one lane of a pool: its limits, checkouts, waiters and wait metrics."""
+
+    __slots__ = (
+        "name",
+        "reserved",
+        "max_size",
+        "priority",
+        "in_use",
+        "waiters",
+        "acquired",
+        "waited",
+        "timeouts",
+        "total_wait_time",
+        "max_wait_time",
+    )
+
+    def __init__(self, name: str, reserved: int, max_size: int, priority: int) -> None:
+        self.name = name
+        self.reserved = reserved
+        self.max_size = max_size
+        self.priority = priority
+        # Connections checked out (or being opened or checked) for this lane.
+        self.in_use = 0
+        # (sequence, waiter) pairs, in arrival order.
+        self.waiters: Deque[tuple] = deque()
+        self.acquired = 0
+        self.waited = 0
+        self.timeouts = 0
+        self.total_wait_time = 0.0
+        self.max_wait_time = 0.0
+
+    def stats(self, live_waiters: int) -> Dict[str, Any]:
+        return {
+            "reserved": self.reserved,
+            "max_size": self.max_size,
+            "priority": self.priority,
+            "in_use": self.in_use,
+            "waiters": live_waiters,
+            "acquired": self.acquired,
+            "waited": self.waited,
+            "timeouts": self.timeouts,
+            "total_wait_time": self.total_wait_time,
+            "max_wait_time": self.max_wait_time,
+        }
+
+
+def _build_lanes(lanes: Optional[Dict[str, PoolLane]], max_size: int) -> Dict[str, _Lane]:
+    configs = dict(lanes or {})
+    configs.setdefault(DEFAULT_LANE, PoolLane())
+    built = {}
+    for name, config in configs.items():
+        lane_max = max_size if config.max_size is None else config.max_size
+        if config.reserved < 0:
+            raise ValueError(f"Lane '{name}': reserved must not be negative")
+        if lane_max < max(config.reserved, 1) or lane_max > max_size:
+            raise ValueError(f"Lane '{name}': max_size must be between max(reserved, 1) and the pool's max_size")
+        built[name] = _Lane(name, config.reserved, lane_max, config.priority)
+    if sum(lane.reserved for lane in built.values()) > max_size:
+        raise ValueError("The lanes reserve more connections than the pool's max_size")
+    # Highest priority first; sorted() is stable, so lanes of one priority keep their declaration order.
+    return dict(sorted(built.items(), key=lambda item: -item[1].priority))
+
+
+class _PoolBase(abc.ABC):
+    """
+    Bookkeeping shared by the sync and async pools.
+
+    None of these methods block or lock; the sync pool calls them while holding its lock and the async pool
+    calls them from the event loop thread.
+    """
+
+    def __init__(
+        self,
+        connect: Callable[[], Any],
+        min_size: int = 1,
+        max_size: int = 5,
+        idle_timeout: Optional[float] = None,
+        max_lifetime: Optional[float] = None,
+        health_check_interval: Optional[float] = 30.0,
+        lanes: Optional[Dict[str, PoolLane]] = None,
+    ) -> None:
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1")
+        if min_size < 0 or min_size > max_size:
+            raise ValueError("min_size must be between 0 and max_size")
+
+        self._connect = connect
+        self.min_size = min_size
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.max_lifetime = max_lifetime
+        self.health_check_interval = health_check_interval
+
+        # Number of open connections, including checked-out ones and ones that are still being opened.
+        self.size = 0
+        # (connection, released_at) pairs; the most recently released connection is on the right.
+        self._idle: Deque[tuple] = deque()
+        self._lanes = _build_lanes(lanes, max_size)
+        self._default_lane = self._lanes[DEFAULT_LANE]
+        self._configured_lanes = bool(lanes)
+        # With a single lane, admission is a check of its own max_size.
+        self._shared = len(self._lanes) > 1
+        # The lane every checked-out connection was acquired for, by id.
+        self._claims: Dict[int, _Lane] = {}
+        self._sequence = 0
+        self._created: Dict[int, float] = {}
+        # Connections released before this time.monotonic() value are pinged before being handed out, see check_idle().
+        self._suspect_before = float("-inf")
+        self._closed = False
+
+        self._acquired = 0
+        self._waited = 0
+        self._timeouts = 0
+        self._total_wait_time = 0.0
+        self._max_wait_time = 0.0
+        self._opened = 0
+        self._recycled = 0
+        self._evicted = 0
+        self._reaped = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Returns a snapshot of the pool's size and usage metrics. Pools configured with lanes add the limits, usage
+        and wait metrics of each lane under "lanes".
+        """
+        stats = {
+            "size": self.size,
+            "min_size": self.min_size,
+            "max_size": self.max_size,
+            "idle": len(self._idle),
+            "in_use": self.size - len(self._idle),
+            "waiters": self._live_waiters(),
+            "acquired": self._acquired,
+            "waited": self._waited,
+            "timeouts": self._timeouts,
+            "total_wait_time": self._total_wait_time,
+            "max_wait_time": self._max_wait_time,
+            "opened": self._opened,
+            "recycled": self._recycled,
+            "evicted": self._evicted,
+            "reaped": self._reaped,
+        }
+        if self._configured_lanes:
+            stats["lanes"] = {
+                name: lane.stats(self._live_lane_waiters(lane)) for name, lane in self._lanes.items()
+            }
+        return stats
+
+    def lane(self, name: Optional[str]) -> _Lane:
+        """Returns the lane called name, or the default lane for None. Raises ValueError for an unknown lane."""
+        if name is None:
+            return self._default_lane
+        try:
+            return self._lanes[name]
+        except KeyError:
+            raise ValueError(f"Unknown pool lane '{name}'") from None
+
+    def _live_waiters(self) -> int:
+        return sum(self._live_lane_waiters(lane) for lane in self._lanes.values())
+
+    def _live_lane_waiters(self, lane: _Lane) -> int:
+        return sum(1 for _, waiter in lane.waiters if self._is_waiting(waiter))
+
+    @abc.abstractmethod
+    def _is_waiting(self, waiter: Any) -> bool:
+        """Whether a queued waiter is still waiting for a connection."""
+
+    @abc.abstractmethod
+    def _wake(self, waiter: Any, item: Any) -> bool:
+        """Delivers an item to a waiter, returning False if the waiter has already given up."""
+
+    def _admits(self, lane: _Lane) -> bool:
+        """
+        Whether lane may check out one more connection: it is below its max_size, and the pool still has room for
+        it beside the connections of the other lanes and their unused reservations.
+        """
+        if lane.in_use >= lane.max_size:
+            return False
+        if not self._shared:
+            return True
+        held = lane.in_use
+        for other in self._lanes.values():
+            if other is not lane:
+                held += max(other.in_use, other.reserved)
+        return held < self.max_size
+
+    def _reserve(self, lane: _Lane) -> Any:
+        """
+        Claims a connection for lane: returns an idle (connection, released_at) pair, _OPEN_NEW if the pool may
+        grow, or None if the caller must wait. Raises RuntimeError once the pool is closed.
+        """
+        if self._closed:
+            raise _closed_error()
+        if lane.waiters or lane.in_use >= lane.max_size or (self._shared and not self._admits(lane)):
+            return None
+        lane.in_use += 1
+        if self._idle:
+            return self._idle.pop()
+        self.size += 1
+        return _OPEN_NEW
+
+    def _fail_waiters(self) -> None:
+        """Wakes every queued waiter with _CLOSED, so that it raises instead of waiting for a connection forever."""
+        for lane in self._lanes.values():
+            while lane.waiters:
+                _, waiter = lane.waiters.popleft()
+                self._wake(waiter, _CLOSED)
+
+    def _enqueue(self, lane: _Lane, waiter: Any) -> tuple:
+        self._sequence += 1
+        entry = (self._sequence, waiter)
+        lane.waiters.append(entry)
+        return entry
+
+    def _pass_on(self, item: Any) -> None:
+        """
+        Hands a connection or a free slot to the next live waiter that its lane admits: the longest-waiting one of
+        the highest priority. Puts it back if there is none.
+        """
+        while self._shared or self._default_lane.waiters:
+            lane = self._serving_lane()
+            if lane is None:
+                break
+            _, waiter = lane.waiters.popleft()
+            lane.in_use += 1
+            if self._wake(waiter, item):
+                return
+            lane.in_use -= 1
+        if item is _OPEN_NEW:
+            self.size -= 1
+        else:
+            self._idle.append(item)
+
+    def _serving_lane(self) -> Optional[_Lane]:
+        """Returns the lane whose first waiter is served next, or None if no lane with waiters is admitted."""
+        if not self._shared:
+            lane = self._default_lane
+            return lane if lane.waiters and lane.in_use < lane.max_size else None
+        chosen = None
+        for lane in self._lanes.values():
+            if chosen is not None and lane.priority < chosen.priority:
+                break
+            while lane.waiters and not self._is_waiting(lane.waiters[0][1]):
+                lane.waiters.popleft()
+            if lane.waiters and self._admits(lane) and (chosen is None or lane.waiters[0][0] < chosen.waiters[0][0]):
+                chosen = lane
+        return chosen
+
+    def _free(self, lane: Optional[_Lane], item: Any) -> None:
+        """Ends a checkout of lane and passes on what it held: its connection, or _OPEN_NEW for its slot."""
+        if lane is not None:
+            lane.in_use -= 1
+        self._pass_on(item)
+
+    def _register(self, conn: Any) -> None:
+        self._created[id(conn)] = time.monotonic()
+        self._opened += 1
+
+    def _evict(self, conn: Any) -> None:
+        """Forgets a checked-out connection that is being closed and frees its slot."""
+        self._created.pop(id(conn), None)
+        self._evicted += 1
+        self._free(self._claims.pop(id(conn), None), _OPEN_NEW)
+
+    def _checkin(self, conn: Any) -> bool:
+        """Returns a released connection to the pool. Returns False if it must be closed instead."""
+        lane = self._claims.pop(id(conn), None)
+        if self._closed:
+            if lane is not None:
+                lane.in_use -= 1
+            self._created.pop(id(conn), None)
+            self.size -= 1
+            return False
+        if self._is_expired(conn):
+            self._created.pop(id(conn), None)
+            self._recycled += 1
+            self._free(lane, _OPEN_NEW)
+            return False
+        self._free(lane, (conn, time.monotonic()))
+        return True
+
+    def _reap(self) -> List[Any]:
+        """Removes connections that have been idle longer than idle_timeout, keeping at least min_size open."""
+        if self.idle_timeout is None:
+            return []
+        stale = []
+        now = time.monotonic()
+        while self._idle and self.size > self.min_size and now - self._idle[0][1] > self.idle_timeout:
+            conn, _ = self._idle.popleft()
+            self._created.pop(id(conn), None)
+            self.size -= 1
+            self._reaped += 1
+            stale.append(conn)
+        return stale
+
+    def _is_expired(self, conn: Any) -> bool:
+        if self.max_lifetime is None:
+            return False
+        created = self._created.get(id(conn))
+        return created is not None and time.monotonic() - created > self.max_lifetime
+
+    def _needs_check(self, conn: Any, released_at: float) -> bool:
+        """Whether a connection should be pinged before it is handed out."""
+        if getattr(conn, "closed", False) or released_at <= self._suspect_before:
+            return True
+        return self.health_check_interval is not None and time.monotonic() - released_at >= self.health_check_interval
+
+    def check_idle(self) -> None:
+        """
+        Makes the pool ping every connection that is idle now before handing it out, and replace it if it is dead.
+        Called when a checked-out connection was found dead, since the server dropping one usually drops them all.
+        """
+        self._suspect_before = time.monotonic()
+
+    def _is_usable(self, conn: Any) -> bool:
+        return not getattr(conn, "closed", False) and _ping(conn)
+
+    def _record_wait(self, lane: _Lane, elapsed: float) -> None:
+        self._waited += 1
+        self._total_wait_time += elapsed
+        self._max_wait_time = max(self._max_wait_time, elapsed)
+        lane.waited += 1
+        lane.total_wait_time += elapsed
+        lane.max_wait_time = max(lane.max_wait_time, elapsed)
+
+    def _record_acquire(self, lane: _Lane) -> None:
+        self._acquired += 1
+        lane.acquired += 1
+
+    def _open_many(self, count: int) -> List[Any]:
+        """Opens connections in parallel threads. Closes the ones that did open and re-raises if any attempt fails."""
+        if count <= 0:
+            return []
+        with ThreadPoolExecutor(max_workers=count, thread_name_prefix="sqlcore-warmup") as executor:
+            futures = [executor.submit(self._connect) for _ in range(count)]
+        errors = [future.exception() for future in futures if future.exception() is not None]
+        conns = [future.result() for future in futures if future.exception() is None]
+        if errors:
+            for conn in conns:
+                _close_quietly(conn)
+            raise errors[0]
+        return conns
+
+
+def _closed_error() -> RuntimeError:
+    return RuntimeError("The connection pool is closed")
+
+
+class _Waiter:
+    __slots__ = ("event", "item", "abandoned")
+
+    def __init__(self) -> None:
+        self.event = threading.Event()
+        self.item = None
+        self.abandoned = False
+
+
+class ConnectionPool(_PoolBase):
+    """
+    A thread-safe, elastic connection pool.
+
+    The pool keeps between min_size and max_size connections open. It grows on demand, closes connections that
+    stay idle longer than idle_timeout, recycles connections older than max_lifetime and pings connections that
+    have been idle for health_check_interval seconds before handing them out. Waiting threads are served in FIFO order.
+
+    Connections can be shared out between lanes, see PoolLane: acquire() then takes the lane to check out for,
+    and waiting threads are served by lane priority first.
+    """
+
+    def __init__(self, connect: Callable[[], Any], **kwargs: Any) -> None:
+        """Initializes the pool. See _PoolBase for the sizing and recycling options."""
+        super().__init__(connect, **kwargs)
+        self._lock = threading.Lock()
+
+    def warm_up(self) -> None:
+        """Opens connections in parallel until the pool holds min_size of them."""
+        with self._lock:
+            count = max(self.min_size - self.size, 0)
+            self.size += count
+        try:
+            conns = self._open_many(count)
+        except BaseException:
+            with self._lock:
+                self.size -= count
+            raise
+        with self._lock:
+            for conn in conns:
+                self._register(conn)
+                self._pass_on((conn, time.monotonic()))
+
+    def acquire(self, timeout: Optional[float] = None, lane: Optional[str] = None) -> Any:
+        """
+        Checks out a connection, opening a new one if the pool is below max_size.
+
+        Args:
+            timeout (Optional[float]): Maximum number of seconds to wait. Waits indefinitely if None.
+            lane (Optional[str]): The lane to check the connection out for. Defaults to the default lane.
+
+        Returns:
+            Any: A healthy connection.
+
+        Raises:
+            TimeoutError: If no connection became available within the timeout.
+            ValueError: If lane is not one of the pool's lanes.
+        """
+        pool_lane = self._default_lane if lane is None else self.lane(lane)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            item = self._next(pool_lane, timeout, deadline)
+            if item is _OPEN_NEW:
+                conn = self._open(pool_lane)
+            else:
+                conn, released_at = item
+                if self._needs_check(conn, released_at) and not self._is_usable(conn):
+                    self.discard(conn)
+                    continue
+            with self._lock:
+                self._record_acquire(pool_lane)
+            return conn
+
+    def release(self, conn: Any) -> None:
+        """Returns a connection to the pool, handing it straight to the longest-waiting thread if there is one."""
+        with self._lock:
+            keep = self._checkin(conn)
+            stale = self._reap()
+        if not keep:
+            stale.append(conn)
+        for conn in stale:
+            _close_quietly(conn)
+
+    def discard(self, conn: Any) -> None:
+        """Closes a checked-out connection that must not be reused and frees its slot in the pool."""
+        with self._lock:
+            self._evict(conn)
+        _close_quietly(conn)
+
+    @contextmanager
+    def connection(self, timeout: Optional[float] = None, lane: Optional[str] = None):
+        """Context manager that acquires a connection and releases it on exit."""
+        conn = self.acquire(timeout, lane)
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def close(self) -> None:
+        """
+        Closes every idle connection. Connections that are checked out are closed when they are released. Threads
+        waiting for a connection, and later calls to acquire(), raise RuntimeError.
+        """
+        with self._lock:
+            idle = [conn for conn, _ in self._idle]
+            self._idle.clear()
+            self.size -= len(idle)
+            self._closed = True
+            self._fail_waiters()
+        for conn in idle:
+            _close_quietly(conn)
+
+    def _is_waiting(self, waiter: _Waiter) -> bool:
+        return not waiter.abandoned
+
+    def _wake(self, waiter: _Waiter, item: Any) -> bool:
+        if waiter.abandoned:
+            return False
+        waiter.item = item
+        waiter.event.set()
+        return True
+
+    def _next(self, lane: _Lane, timeout: Optional[float], deadline: Optional[float]) -> Any:
+        """Claims a connection or a free slot for lane, waiting for one if necessary. See _reserve()."""
+        with self._lock:
+            stale = self._reap()
+            item = self._reserve(lane)
+            if item is None:
+                waiter = _Waiter()
+                entry = self._enqueue(lane, waiter)
+            elif item is not _OPEN_NEW:
+                self._claims[id(item[0])] = lane
+        for conn in stale:
+            _close_quietly(conn)
+        if item is not None:
+            return item
+
+        start = time.perf_counter()
+        waiter.event.wait(None if deadline is None else max(deadline - time.monotonic(), 0))
+        with self._lock:
+            self._record_wait(lane, time.perf_counter() - start)
+            if waiter.item is None:
+                waiter.abandoned = True
+                lane.waiters.remove(entry)
+                self._timeouts += 1
+                lane.timeouts += 1
+                raise TimeoutError(f"Timed out after {timeout}s waiting for a pooled connection")
+            if waiter.item is _CLOSED:
+                raise _closed_error()
+            if waiter.item is not _OPEN_NEW:
+                self._claims[id(waiter.item[0])] = lane
+        return waiter.item
+
+    def _open(self, lane: _Lane) -> Any:
+        try:
+            conn = self._connect()
+        except BaseException:
+            with self._lock:
+                self._free(lane, _OPEN_NEW)
+            raise
+        with self._lock:
+            self._register(conn)
+            self._claims[id(conn)] = lane
+        return conn
+
+
+class AsyncConnectionPool(_PoolBase):
+    """
+    An asyncio-native version of ConnectionPool.
+
+    Waiting coroutines are served in FIFO order (by lane priority first, with lanes) without blocking the event
+    loop, and every blocking driver call (connect, ping, close) runs in the given executor.
+    """
+
+    def __init__(self, connect: Callable[[], Any], executor: Any = None, **kwargs: Any) -> None:
+        """Initializes the pool. See _PoolBase for the sizing and recycling options."""
+        super().__init__(connect, **kwargs)
+        self._executor = executor
+
+    def warm_up(self) -> None:
+        """Opens connections in parallel until the pool holds min_size of them. Blocks, so call it before the loop is busy."""
+        count = max(self.min_size - self.size, 0)
+        for conn in self._open_many(count):
+            self.size += 1
+            self._register(conn)
+            self._pass_on((conn, time.monotonic()))
+
+    async def acquire(self, timeout: Optional[float] = None, lane: Optional[str] = None) -> Any:
+        """
+        Waits for a connection, opening a new one if the pool is below max_size.
+
+        Args:
+            timeout (Optional[float]): Maximum number of seconds to wait. Waits indefinitely if None.
+            lane (Optional[str]): The lane to check the connection out for. Defaults to the default lane.
+
+        Returns:
+            Any: A healthy connection.
+
+        Raises:
+            TimeoutError: If no connection became available within the timeout.
+            ValueError: If lane is not one of the pool's lanes.
+        """
+        pool_lane = self._default_lane if lane is None else self.lane(lane)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            stale = self._reap()
+            if stale:
+                await self._run(self._close_all, stale)
+            item = self._reserve(pool_lane)
+            if item is None:
+                item = await self._wait(pool_lane, timeout, deadline)
+
+            if item is _OPEN_NEW:
+                conn = await self._open(pool_lane)
+            else:
+                conn, released_at = item
+                self._claims[id(conn)] = pool_lane
+                if self._needs_check(conn, released_at) and not await self._check(conn):
+                    continue
+            self._record_acquire(pool_lane)
+            return conn
+
+    async def release(self, conn: Any) -> None:
+        """Returns a connection to the pool, handing it straight to the longest-waiting coroutine if there is one."""
+        stale = self._reap()
+        if not self._checkin(conn):
+            stale.append(conn)
+        if stale:
+            await self._run(self._close_all, stale)
+
+    async def discard(self, conn: Any) -> None:
+        """Closes a checked-out connection that must not be reused and frees its slot in the pool."""
+        self._evict(conn)
+        await self._run(_close_quietly, conn)
+
+    def detach(self, conn: Any) -> None:
+        """
+        Frees the slot of a checked-out connection that is being closed elsewhere, e.g. by the thread still running
+        its cancelled statement, without waiting for it to close.
+        """
+        self._evict(conn)
+
+    @asynccontextmanager
+    async def connection(self, timeout: Optional[float] = None, lane: Optional[str] = None):
+        """Async context manager that acquires a connection and releases it on exit."""
+        conn = await self.acquire(timeout, lane)
+        try:
+            yield conn
+        finally:
+            await self.release(conn)
+
+    async def close(self) -> None:
+        """
+        Closes every idle connection. Connections that are checked out are closed when they are released.
+        Coroutines waiting for a connection, and later calls to acquire(), raise RuntimeError.
+        """
+        idle = [conn for conn, _ in self._idle]
+        self._idle.clear()
+        self.size -= len(idle)
+        self._closed = True
+        self._fail_waiters()
+        await self._run(self._close_all, idle)
+
+    def _is_waiting(self, waiter: asyncio.Future) -> bool:
+        return not waiter.done()
+
+    def _wake(self, waiter: asyncio.Future, item: Any) -> bool:
+        if waiter.done():
+            return False
+        waiter.set_result(item)
+        return True
+
+    async def _wait(self, lane: _Lane, timeout: Optional[float], deadline: Optional[float]) -> Any:
+        waiter = asyncio.get_running_loop().create_future()
+        entry = self._enqueue(lane, waiter)
+        start = time.perf_counter()
+        try:
+            item = await asyncio.wait_for(waiter, None if deadline is None else max(deadline - time.monotonic(), 0))
+        except BaseException as e:
+            self._abandon(lane, entry)
+            if isinstance(e, asyncio.TimeoutError):
+                self._timeouts += 1
+                lane.timeouts += 1
+                raise TimeoutError(f"Timed out after {timeout}s waiting for a pooled connection") from None
+            raise
+        finally:
+            self._record_wait(lane, time.perf_counter() - start)
+        if item is _CLOSED:
+            raise _closed_error()
+        return item
+
+    def _abandon(self, lane: _Lane, entry: tuple) -> None:
+        """Removes a waiter that gave up, passing on anything that was handed to it in the meantime."""
+        try:
+            lane.waiters.remove(entry)
+        except ValueError:
+            pass
+        waiter = entry[1]
+        if waiter.done() and not waiter.cancelled() and waiter.result() is not _CLOSED:
+            self._free(lane, waiter.result())
+
+    async def _open(self, lane: _Lane) -> Any:
+        future = asyncio.get_running_loop().run_in_executor(self._executor, self._connect)
+        try:
+            conn = await asyncio.shield(future)
+        except asyncio.CancelledError:
+            # The connect call keeps running in its thread; adopt or free the slot once it finishes.
+            future.add_done_callback(functools.partial(self._adopt, lane))
+            raise
+        except BaseException:
+            self._free(lane, _OPEN_NEW)
+            raise
+        self._register(conn)
+        self._claims[id(conn)] = lane
+        return conn
+
+    def _adopt(self, lane: _Lane, future: asyncio.Future) -> None:
+        if future.cancelled() or future.exception() is not None:
+            self._free(lane, _OPEN_NEW)
+            return
+        conn = future.result()
+        self._register(conn)
+        self._claims[id(conn)] = lane
+        # Parks the connection, or closes it if the pool was closed or it has already expired meanwhile.
+        if not self._checkin(conn):
+            self._close_soon(conn)
+
+    async def _check(self, conn: Any) -> bool:
+        """Pings a connection, evicting it if it is dead. Returns whether it can be handed out."""
+        future = asyncio.get_running_loop().run_in_executor(self._executor, self._is_usable, conn)
+        try:
+            usable = await asyncio.shield(future)
+        except asyncio.CancelledError:
+            future.add_done_callback(lambda f: self._settle_check(conn, f))
+            raise
+        if not usable:
+            self._evict(conn)
+            await self._run(_close_quietly, conn)
+        return usable
+
+    def _settle_check(self, conn: Any, future: asyncio.Future) -> None:
+        if not future.cancelled() and future.exception() is None and future.result():
+            if self._checkin(conn):
+                return
+        else:
+            self._evict(conn)
+        self._close_soon(conn)
+
+    def _close_soon(self, conn: Any) -> None:
+        """Closes a connection in the executor without waiting for it, from a callback on the event loop thread."""
+        asyncio.get_running_loop().run_in_executor(self._executor, _close_quietly, conn)
+
+    async def _run(self, func: Callable, *args: Any) -> Any:
+        return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+
+    @staticmethod
+    def _close_all(conns: List[Any]) -> None:
+        for conn in conns:
+            _close_quietly(conn)
@@ -0,0 +1,149 @@
+import random
+import re
+import threading
+from typing import Any, Dict, FrozenSet, Iterable, Iterator, Optional
+
+import pyodbc
+
+# SQLSTATEs of failures that say nothing about the statement itself: a serialization failure (deadlock victim),
+# a lost or refused connection, and a login or connection timeout.
+DEFAULT_RETRY_SQLSTATES = frozenset({"40001", "08S01", "08001", "HYT00", "HYT01"})
+# SQL Server error numbers of transient failures: deadlock victim, lock request timeout, and the Azure SQL
+# errors for a database that is failing over, being moved or throttling.
+DEFAULT_RETRY_NATIVE_ERRORS = frozenset({1205, 1222, 40197, 40501, 40613, 49918, 49919, 49920, 10928, 10929})
+
+# pyodbc formats each diagnostic record as "[SQLSTATE] message (native error) (ODBC function)".
+_NATIVE_ERROR = re.compile(r"\((-?\d+)\) \(SQL\w+\)")
+
+
+def _driver_errors(error: BaseException) -> Iterator[pyodbc.Error]:
+    """The error and the errors it was raised from, since the connectors re-raise driver errors translated."""
+    while error is not None:
+        if isinstance(error, pyodbc.Error):
+            yield error
+        error = error.__cause__
+
+
+def sqlstate(error: BaseException) -> Optional[str]:
+    """
+    The SQLSTATE of a driver error, also when the connectors re-raised it as ValueError or pyodbc.Error with a
+    message naming the statement. None if the error did not come from the driver.
+    """
+    for driver_error in _driver_errors(error):
+        if len(driver_error.args) > 1 and isinstance(driver_error.args[0], str) and len(driver_error.args[0]) == 5:
+            return driver_error.args[0]
+    return None
+
+
+def native_errors(error: BaseException) -> FrozenSet[int]:
+    """The server's native error numbers reported by a driver error (e.g. 1205 for a deadlock victim)."""
+    for driver_error in _driver_errors(error):
+        codes = frozenset(int(code) for code in _NATIVE_ERROR.findall(str(driver_error)))
+        if codes:
+            return codes
+    return frozenset()
+
+
+def connection_lost(error: BaseException) -> bool:
+    """Whether a statement failed because its connection is gone (SQLSTATE class 08), so it must not be reused."""
+    state = sqlstate(error)
+    return state is not None and state.startswith("08")
+
+
+class RetryPolicy:
+    """
+    Decides which failed calls the connectors run again, and how long they wait before each new attempt.
+
+    A failure is transient when its SQLSTATE or one of its native SQL Server error numbers is in the policy's
+    sets, e.g. a deadlock victim (40001 / 1205), a lock timeout (1222) or a dropped connection (08S01). Other
+    errors, and time limits the caller set with timeout, are raised at once. Attempt n waits a random delay
+    between 0 and min(max_delay, base_delay * 2 ** (n - 1)) seconds ("full jitter"), so that the callers
+    caught in one deadlock or failover do not all come back at the same moment.
+
+    One policy may be shared by several connectors; its counters then add up. They are read with stats():
+    retries (new attempts made, also by SQLSTATE or error number under "reasons") and give_ups (calls that
+    still failed transiently after max_attempts).
+
+    Args:
+        max_attempts (int): Attempts per call, the first one included.
+        base_delay (float): Upper bound of the first delay, in seconds, doubled for each further attempt.
+        max_delay (float): Cap of the upper bound, in seconds.
+        sqlstates (Iterable[str]): SQLSTATEs to retry.
+        native_errors (Iterable[int]): SQL Server error numbers to retry.
+    """
+
+    __slots__ = (
+        "max_attempts",
+        "base_delay",
+        "max_delay",
+        "sqlstates",
+        "native_errors",
+        "_random",
+        "_lock",
+        "retries",
+        "give_ups",
+        "_reasons",
+    )
+
+    def __init__(
+        self,
+        max_attempts: int = 4,
+        base_delay: float = 0.05,
+        max_delay: float = 2.0,
+        sqlstates: Iterable[str] = DEFAULT_RETRY_SQLSTATES,
+        native_errors: Iterable[int] = DEFAULT_RETRY_NATIVE_ERRORS,
+    ) -> None:
+        if max_attempts < 1:
+            raise ValueError("max_attempts must be at least 1")
+        if base_delay < 0 or max_delay < base_delay:
+            raise ValueError("Retry delays must satisfy 0 <= base_delay <= max_delay")
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.sqlstates = frozenset(sqlstates)
+        self.native_errors = frozenset(native_errors)
+        self._random = random.Random()
+        self._lock = threading.Lock()
+        self.retries = 0
+        self.give_ups = 0
+        self._reasons: Dict[str, int] = {}
+
+    def transient_reason(self, error: BaseException) -> Optional[str]:
+        """
+        Returns the SQLSTATE or native error number that makes error transient, or None if it is not.
+        A TimeoutError is never transient: the call used up its own time limit.
+        """
+        if isinstance(error, TimeoutError):
+            return None
+        matched = native_errors(error) & self.native_errors
+        if matched:
+            return str(min(matched))
+        state = sqlstate(error)
+        return state if state in self.sqlstates else None
+
+    def next_delay(self, error: BaseException, attempt: int) -> Optional[float]:
+        """
+        Returns the seconds to wait before attempt + 1 of a call whose attempt failed with error, or None if the
+        call must not be retried: the error is not transient or this was the last attempt. Counts the outcome.
+        """
+        reason = self.transient_reason(error)
+        if reason is None:
+            return None
+        with self._lock:
+            if attempt >= self.max_attempts:
+                self.give_ups += 1
+                return None
+            self.retries += 1
+            self._reasons[reason] = self._reasons.get(reason, 0) + 1
+            bound = min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+            return self._random.uniform(0, bound)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"retries": self.retries, "give_ups": self.give_ups, "reasons": dict(self._reasons)}
+
+    def __repr__(self) -> str:
+        return (
+            f"RetryPolicy(max_attempts={self.max_attempts}, base_delay={self.base_delay}, "
+            f"max_delay={self.max_delay})"
+        )
@@ -0,0 +1,350 @@
+import datetime
+import decimal
+import threading
+import time
+import uuid
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import pyodbc
+
+from .statements import next_result_set
+
+ROUTINE_KINDS = {"procedure": "stored procedure", "tvf": "table-valued function"}
+_OBJECT_TYPES = {"procedure": ("P", "PC", "X"), "tvf": ("IF", "TF", "FT")}
+
+# One round trip: the object, its parameters, and its result columns. Procedures do not declare their result
+# columns, so the server's description of the first result set is used for them.
+_DESCRIBE_QUERY = """
+DECLARE @object_id INT = OBJECT_ID(?);
+SELECT o.type, SCHEMA_NAME(o.schema_id), o.name FROM sys.objects AS o WHERE o.object_id = @object_id;
+SELECT p.name, TYPE_NAME(p.user_type_id), TYPE_NAME(p.system_type_id), p.max_length, p.precision, p.scale,
+       p.is_output, t.is_table_type
+FROM sys.parameters AS p JOIN sys.types AS t ON t.user_type_id = p.user_type_id
+WHERE p.object_id = @object_id AND p.parameter_id > 0
+ORDER BY p.parameter_id;
+IF OBJECTPROPERTY(@object_id, 'IsProcedure') = 1
+    SELECT name, system_type_name, is_nullable
+    FROM sys.dm_exec_describe_first_result_set_for_object(@object_id, 0)
+    WHERE error_number IS NULL AND name IS NOT NULL
+    ORDER BY column_ordinal;
+ELSE
+    SELECT c.name, TYPE_NAME(c.user_type_id), c.is_nullable
+    FROM sys.columns AS c WHERE c.object_id = @object_id
+    ORDER BY c.column_id;
+"""
+
+# ODBC SQL types used to declare parameters with cursor.setinputsizes(), by SQL Server base type.
+_SQL_TYPES = {
+    "bit": "SQL_BIT",
+    "tinyint": "SQL_TINYINT",
+    "smallint": "SQL_SMALLINT",
+    "int": "SQL_INTEGER",
+    "bigint": "SQL_BIGINT",
+    "decimal": "SQL_DECIMAL",
+    "numeric": "SQL_NUMERIC",
+    "money": "SQL_DECIMAL",
+    "smallmoney": "SQL_DECIMAL",
+    "float": "SQL_DOUBLE",
+    "real": "SQL_REAL",
+    "char": "SQL_CHAR",
+    "varchar": "SQL_VARCHAR",
+    "nchar": "SQL_WCHAR",
+    "nvarchar": "SQL_WVARCHAR",
+    "binary": "SQL_BINARY",
+    "varbinary": "SQL_VARBINARY",
+    "date": "SQL_TYPE_DATE",
+    "datetime": "SQL_TYPE_TIMESTAMP",
+    "datetime2": "SQL_TYPE_TIMESTAMP",
+    "smalldatetime": "SQL_TYPE_TIMESTAMP",
+    "uniqueidentifier": "SQL_GUID",
+}
+
+_INTEGER_RANGES = {
+    "tinyint": (0, 2**8 - 1),
+    "smallint": (-(2**15), 2**15 - 1),
+    "int": (-(2**31), 2**31 - 1),
+    "bigint": (-(2**63), 2**63 - 1),
+}
+_NUMBERS = (int, float, decimal.Decimal)
+_TEMPORAL = (datetime.date, datetime.time)
+_BINARY = (bytes, bytearray, memoryview)
+# Python types the server accepts for a parameter of each base type; anything else is an operand type clash.
+# Base types not listed accept any scalar.
+_ACCEPTED_TYPES = {
+    **{name: _NUMBERS + (str,) for name in ("bit", "tinyint", "smallint", "int", "bigint", "float", "real")},
+    **{name: _NUMBERS + (str,) for name in ("decimal", "numeric", "money", "smallmoney")},
+    **{name: _TEMPORAL + (str,) for name in ("date", "datetime2", "time", "datetimeoffset")},
+    "datetime": _TEMPORAL + _NUMBERS + (str,),
+    "smalldatetime": _TEMPORAL + _NUMBERS + (str,),
+    "binary": _BINARY,
+    "varbinary": _BINARY,
+    "image": _BINARY,
+    "uniqueidentifier": (uuid.UUID, str) + _BINARY,
+}
+
+
+def _quote(identifier: str) -> str:
+    return "[" + identifier.replace("]", "]]") + "]"
+
+
+class RoutineParameter:
+    """
+    One declared parameter of a stored procedure or table-valued function.
+
+    Attributes:
+        name (str): The parameter name, including the leading @.
+        type_name (str): The declared type, e.g. "int", "nvarchar" or the name of a user-defined table type.
+        base_type (str): The system type the declared type is based on.
+        max_length (int): Maximum length in bytes, or -1 for (max) types.
+        precision (int): Numeric or temporal precision.
+        scale (int): Numeric or temporal scale.
+        is_output (bool): Whether the parameter is declared OUTPUT.
+        is_table_type (bool): Whether the parameter is a table-valued parameter.
+    """
+
+    __slots__ = ("name", "type_name", "base_type", "max_length", "precision", "scale", "is_output", "is_table_type")
+
+    def __init__(
+        self,
+        name: str,
+        type_name: str,
+        base_type: str,
+        max_length: int,
+        precision: int,
+        scale: int,
+        is_output: bool = False,
+        is_table_type: bool = False,
+    ) -> None:
+        self.name = name
+        self.type_name = type_name
+        self.base_type = base_type
+        self.max_length = max_length
+        self.precision = precision
+        self.scale = scale
+        self.is_output = bool(is_output)
+        self.is_table_type = bool(is_table_type)
+
+    @property
+    def length(self) -> Optional[int]:
+        """Maximum length in characters (or bytes for binary types), or None if unbounded."""
+        if self.max_length == -1 or self.base_type not in ("char", "varchar", "nchar", "nvarchar", "binary", "varbinary"):
+            return None
+        return self.max_length // 2 if self.base_type in ("nchar", "nvarchar") else self.max_length
+
+    def input_size(self) -> Optional[Tuple[int, int, int]]:
+        """The (sql_type, size, decimal_digits) declaration for cursor.setinputsizes(), or None if not mappable."""
+        sql_type = getattr(pyodbc, _SQL_TYPES.get(self.base_type, ""), None)
+        if sql_type is None or self.is_table_type:
+            return None
+        if self.base_type in ("char", "varchar", "nchar", "nvarchar", "binary", "varbinary"):
+            # A size of 0 declares a (max) type.
+            return (sql_type, self.length or 0, 0)
+        return (sql_type, self.precision, self.scale)
+
+    def check(self, value: Any) -> Optional[str]:
+        """Returns why value cannot be passed to this parameter, or None if it can."""
+        if value is None:
+            return None
+        if self.is_table_type:
+            if not isinstance(value, (list, tuple)):
+                return f"expects rows for table type {self.type_name}, got {type(value).__name__}"
+            return None
+        if isinstance(value, (list, tuple)):
+            return f"expects a single {self.type_name} value, got a {type(value).__name__} (not a table type)"
+        accepted = _ACCEPTED_TYPES.get(self.base_type)
+        if accepted is not None and not isinstance(value, accepted):
+            return f"expects {self.type_name}, got {type(value).__name__}"
+        if self.base_type in _INTEGER_RANGES and isinstance(value, _NUMBERS):
+            low, high = _INTEGER_RANGES[self.base_type]
+            if not low <= value <= high:
+                return f"value {value} is out of range for {self.type_name}"
+        elif self.base_type in ("decimal", "numeric") and isinstance(value, _NUMBERS):
+            if abs(value) >= 10 ** (self.precision - self.scale):
+                return f"value {value} does not fit {self.type_name}({self.precision}, {self.scale})"
+        elif self.length is not None and isinstance(value, (str,) + _BINARY) and len(value) > self.length:
+            return f"value of length {len(value)} exceeds {self.type_name}({self.length})"
+        return None
+
+    def __repr__(self) -> str:
+        return f"RoutineParameter({self.name!r}, {self.type_name!r})"
+
+
+class RoutineSignature:
+    """
+    The parameters and result columns of a stored procedure or table-valued function, and its call templates.
+
+    bind() validates the arguments of a call on the client and returns the call's SQL text together with the
+    typed parameter declarations. The SQL text only depends on the number of arguments and is built once per
+    count, so every call with the same shape sends the same statement with the same parameter types and reuses
+    one cached plan on the server.
+
+    Attributes:
+        kind (str): "procedure" or "tvf".
+        name (str): The name the routine was looked up by.
+        qualified_name (str): The quoted, schema-qualified name used in the call templates.
+        parameters (List[RoutineParameter]): The declared parameters, in order.
+        columns (List[Tuple[str, str, bool]]): (name, type, nullable) of every result column. Empty for procedures
+            whose first result set the server cannot describe (e.g. one built from a temp table).
+    """
+
+    def __init__(
+        self,
+        kind: str,
+        name: str,
+        qualified_name: str,
+        parameters: Sequence[RoutineParameter],
+        columns: Sequence[Tuple[str, str, bool]] = (),
+    ) -> None:
+        self.kind = kind
+        self.name = name
+        self.qualified_name = qualified_name
+        self.parameters = list(parameters)
+        self.columns = list(columns)
+        self._templates: Dict[int, Tuple[str, Optional[List[Tuple[int, int, int]]]]] = {}
+
+    def bind(self, args: Sequence[Any]) -> Tuple[str, Optional[List[Tuple[int, int, int]]]]:
+        """
+        Validates args against the declared parameters and returns the call's SQL text and its input sizes.
+
+        Returns:
+            Tuple[str, Optional[List[Tuple[int, int, int]]]]: The SQL text and the declarations to pass to
+                cursor.setinputsizes(), or None when a parameter type has no ODBC mapping (e.g. table types).
+
+        Raises:
+            ValueError: If the number of arguments or one of their values does not fit the declared parameters.
+        """
+        args = args or ()
+        self.check_args(args)
+        template = self._templates.get(len(args))
+        if template is None:
+            template = self._templates[len(args)] = self._template(len(args))
+        return template
+
+    def check_args(self, args: Sequence[Any]) -> None:
+        """Raises ValueError if args cannot be passed to the routine. See bind()."""
+        label = ROUTINE_KINDS[self.kind]
+        expected = len(self.parameters)
+        # Procedure parameters may have defaults, which the catalog does not report for T-SQL procedures, so
+        # only extra arguments are rejected. Functions always need every argument.
+        if len(args) > expected or (self.kind == "tvf" and len(args) != expected):
+            names = ", ".join(param.name for param in self.parameters) or "none"
+            raise ValueError(
+                f"Invalid call to {label} '{self.name}': expected {expected} parameters ({names}), got {len(args)}"
+            )
+        for param, value in zip(self.parameters, args):
+            problem = param.check(value)
+            if problem is not None:
+                raise ValueError(f"Invalid argument for {label} '{self.name}', parameter {param.name}: {problem}")
+
+    def _template(self, arg_count: int) -> Tuple[str, Optional[List[Tuple[int, int, int]]]]:
+        placeholders = ", ".join(["?"] * arg_count)
+        if self.kind == "procedure":
+            query = f"EXEC {self.qualified_name} {placeholders}".rstrip()
+        else:
+            query = f"SELECT * FROM {self.qualified_name}({placeholders})"
+        sizes = [param.input_size() for param in self.parameters[:arg_count]]
+        return query, sizes if sizes and None not in sizes else None
+
+    def __repr__(self) -> str:
+        return f"RoutineSignature({self.kind!r}, {self.qualified_name!r}, parameters={self.parameters!r})"
+
+
+def describe_routine(conn: Any, kind: str, name: str) -> RoutineSignature:
+    """
+    Reads the parameters and result columns of a stored procedure or table-valued function from the system catalog.
+
+    TVF names are resolved in the dbo schema, like the statements built for execute_tvf_and_fetch_results().
+
+    Raises:
+        ValueError: If the routine does not exist or is not of the expected kind.
+        pyodbc.Error: For any database-related errors.
+    """
+    if kind not in ROUTINE_KINDS:
+        raise ValueError(f"Unknown routine kind '{kind}', expected one of {tuple(ROUTINE_KINDS)}")
+    cursor = conn.cursor()
+    try:
+        cursor.execute(_DESCRIBE_QUERY, (name if kind == "procedure" else f"dbo.{name}",))
+        objects = next_result_set(cursor, "tuple", advance=False) or []
+        parameters = next_result_set(cursor, "tuple") or []
+        columns = next_result_set(cursor, "tuple") or []
+    finally:
+        cursor.close()
+    label = ROUTINE_KINDS[kind]
+    if not objects:
+        raise ValueError(f"The {label} '{name}' does not exist")
+    object_type, schema, object_name = objects[0]
+    if object_type.strip() not in _OBJECT_TYPES[kind]:
+        raise ValueError(f"'{name}' is not a {label}")
+    return RoutineSignature(
+        kind,
+        name,
+        f"{_quote(schema)}.{_quote(object_name)}",
+        [RoutineParameter(*row) for row in parameters],
+        [(column, type_name, bool(nullable)) for column, type_name, nullable in columns],
+    )
+
+
+class RoutineCatalog:
+    """
+    A thread-safe cache of stored procedure and table-valued function signatures.
+
+    A connector created with a catalog describes every procedure or TVF it calls once, on first use, and from
+    then on calls it through the cached signature's typed call template, validating the arguments on the client.
+    Like a QueryCache, one catalog can be shared by several connectors to the same database.
+
+    Call invalidate() after altering a routine, or pass a ttl to pick up schema changes automatically.
+
+    Example:
+        db = DatabaseConnector(conn_string, routines=RoutineCatalog())
+        db.execute_and_return_stored_procedure("sp_get_orders", 42)  # described once, then bound and typed
+    """
+
+    def __init__(self, ttl: Optional[float] = None) -> None:
+        """
+        Args:
+            ttl (Optional[float]): Seconds after which a signature is described again. None keeps it until invalidated.
+        """
+        if ttl is not None and ttl <= 0:
+            raise ValueError("ttl must be positive")
+        self.ttl = ttl
+        self._signatures: Dict[Tuple[str, str], Tuple[RoutineSignature, float]] = {}
+        self._lock = threading.Lock()
+        self.loads = 0
+
+    def get(self, kind: str, name: str) -> Optional[RoutineSignature]:
+        """Returns the cached signature of a routine, or None if it has not been described (or has expired)."""
+        entry = self._signatures.get((kind, name.lower()))
+        if entry is None or entry[1] <= time.monotonic():
+            return None
+        return entry[0]
+
+    def signature(self, conn: Any, kind: str, name: str) -> RoutineSignature:
+        """Returns the cached signature of a routine, describing it on conn first if needed."""
+        signature = self.get(kind, name)
+        if signature is None:
+            signature = self.put(describe_routine(conn, kind, name))
+        return signature
+
+    def put(self, signature: RoutineSignature) -> RoutineSignature:
+        """Caches a signature and returns it."""
+        expires_at = time.monotonic() + self.ttl if self.ttl is not None else float("inf")
+        with self._lock:
+            self._signatures[(signature.kind, signature.name.lower())] = (signature, expires_at)
+            self.loads += 1
+        return signature
+
+    def invalidate(self, *names: str) -> int:
+        """Drops the signatures of the named routines, or of every routine if no name is given. Returns the count."""
+        with self._lock:
+            if not names:
+                removed = len(self._signatures)
+                self._signatures.clear()
+                return removed
+            lowered = {name.lower() for name in names}
+            keys = [key for key in self._signatures if key[1] in lowered]
+            for key in keys:
+                del self._signatures[key]
+            return len(keys)
+
+    def __len__(self) -> int:
+        return len(self._signatures)
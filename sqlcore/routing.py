@@ -0,0 +1,1097 @@
+import logging
+import re
+import threading
+import time
+from contextlib import ExitStack, aclosing, closing, contextmanager
+from typing import Any, AsyncIterator, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+import pyodbc
+
+from .async_connector import AsyncDatabaseConnector
+from .connector import DatabaseConnector
+from .converters import TypeConverters
+from .export import DEFAULT_ROW_GROUP_SIZE
+from .pagination import DEFAULT_PAGE_SIZE
+from .partition import source_query
+from .statements import DEFAULT_BATCH_SIZE, is_read_only
+
+logger = logging.getLogger("sqlcore.routing")
+
+ROUTES = ("primary", "replica")
+
+_COMMENT = re.compile(r"--[^\n]*|/\*.*?\*/", re.S)
+# Locking hints and sequence values only mean something on the primary.
+_PRIMARY_ONLY = re.compile(r"\b(?:UPDLOCK|XLOCK|HOLDLOCK|TABLOCKX|NEXT\s+VALUE\s+FOR)\b", re.I)
+# SQLSTATEs saying the server could not be reached or stopped answering, rather than the statement being wrong.
+_CONNECTION_SQLSTATE = re.compile(r"\b(?:08\w{3}|HYT0[01])\b")
+
+
+def is_read_query(query: str) -> bool:
+    """
+    Whether a statement can run on a replica: is_read_only() after comments are removed, and no locking hint.
+    Anything that cannot be shown to be a read is treated as a write.
+    """
+    text = _COMMENT.sub(" ", query)
+    return is_read_only(text) and not _PRIMARY_ONLY.search(text)
+
+
+def is_connection_failure(error: BaseException) -> bool:
+    """
+    Whether an error means the server is unavailable: a driver operational or interface error (e.g. a failed
+    connect), or an error carrying a connection (08xxx) or timeout (HYT00/HYT01) SQLSTATE.
+    """
+    if isinstance(error, (pyodbc.OperationalError, pyodbc.InterfaceError)):
+        return True
+    return isinstance(error, pyodbc.Error) and bool(_CONNECTION_SQLSTATE.search(str(error)))
+
+
+def _statements_read(statements: Sequence[Union[str, Tuple[str, Sequence[Any]]]]) -> bool:
+    return all(is_read_query(statement if isinstance(statement, str) else statement[0]) for statement in statements)
+
+
+class Endpoint:
+    """
+    One server behind a routing connector: its connector and routing state.
+
+    Attributes:
+        name (str): "primary", or "replica_<index>" in the order the replicas were given.
+        connector (Any): The DatabaseConnector or AsyncDatabaseConnector, with its own pool.
+        outstanding (int): Calls currently running on the endpoint, including open streams.
+        requests (int): Calls routed to the endpoint.
+        failures (int): Consecutive connection failures.
+        connection_errors (int): Total connection failures.
+        ejections (int): Times the endpoint was taken out of rotation.
+        ejected_until (float): time.monotonic() until which the endpoint is out of rotation, 0 while it is in.
+    """
+
+    __slots__ = (
+        "name",
+        "connector",
+        "outstanding",
+        "requests",
+        "failures",
+        "connection_errors",
+        "ejections",
+        "ejected_until",
+    )
+
+    def __init__(self, name: str, connector: Any) -> None:
+        self.name = name
+        self.connector = connector
+        self.outstanding = 0
+        self.requests = 0
+        self.failures = 0
+        self.connection_errors = 0
+        self.ejections = 0
+        self.ejected_until = 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "outstanding": self.outstanding,
+            "requests": self.requests,
+            "failures": self.failures,
+            "connection_errors": self.connection_errors,
+            "ejections": self.ejections,
+            "healthy": self.ejected_until <= time.monotonic(),
+        }
+
+
+class _RoutingBase:
+    """Endpoint selection and health tracking shared by RoutingDatabaseConnector and AsyncRoutingDatabaseConnector."""
+
+    def __init__(
+        self,
+        connector_class: type,
+        primary: Optional[str],
+        replicas: Sequence[str],
+        max_failures: int,
+        eject_for: float,
+        fallback_to_primary: bool,
+        options: Dict[str, Any],
+    ) -> None:
+        if max_failures < 1:
+            raise ValueError("max_failures must be at least 1")
+        if eject_for < 0:
+            raise ValueError("eject_for must not be negative")
+        self.max_failures = max_failures
+        self.eject_for = eject_for
+        self.fallback_to_primary = fallback_to_primary
+        self._lock = threading.Lock()
+        self._next = 0
+        self.primary = Endpoint("primary", connector_class(primary, **options))
+        self.replicas: List[Endpoint] = []
+        # A replica that is down must not stop the application from starting: its pool is created empty and
+        # warmed up separately, and a replica that cannot be reached starts out ejected.
+        min_size = options.get("min_size")
+        # Replicas serve the primary's data, so their results are cached under the primary's namespace.
+        replica_options = {"cache_namespace": self.primary.connector.cache_namespace, **options, "min_size": 0}
+        for index, conn_string in enumerate(replicas):
+            endpoint = Endpoint(f"replica_{index}", connector_class(conn_string, **replica_options))
+            self.replicas.append(endpoint)
+            pool = endpoint.connector.pool
+            if pool is None:
+                continue
+            pool.min_size = min(1, pool.max_size) if min_size is None else min_size
+            try:
+                pool.warm_up()
+            except pyodbc.Error as e:
+                endpoint.failures = max_failures - 1
+                self._failed(endpoint, e)
+
+    @property
+    def endpoints(self) -> List[Endpoint]:
+        """The primary followed by the replicas."""
+        return [self.primary, *self.replicas]
+
+    def _in_transaction(self) -> bool:
+        return self.primary.connector._transaction.get() is not None
+
+    def _choose(self, read: bool, route: Optional[str], tried: Sequence[Endpoint] = ()) -> Optional[Endpoint]:
+        """
+        Picks the endpoint of a call and counts it as outstanding there. Reads go to the healthy replica with the
+        fewest outstanding calls (ties rotate), writes and calls inside a primary transaction or session to the
+        primary. Returns None if no endpoint not in tried can take the call.
+        """
+        if route is None:
+            route = "replica" if read and not self._in_transaction() else "primary"
+            fallback = self.fallback_to_primary
+        elif route not in ROUTES:
+            raise ValueError(f"Invalid route '{route}': expected one of {', '.join(ROUTES)}")
+        else:
+            fallback = False
+        now = time.monotonic()
+        with self._lock:
+            best = None
+            if route == "replica":
+                count = len(self.replicas)
+                for offset in range(count):
+                    endpoint = self.replicas[(self._next + offset) % count]
+                    if endpoint in tried:
+                        continue
+                    if endpoint.ejected_until:
+                        if endpoint.ejected_until > now:
+                            continue
+                        # Back in rotation on probation: one more connection failure ejects it again.
+                        endpoint.ejected_until = 0.0
+                        endpoint.failures = self.max_failures - 1
+                    if best is None or endpoint.outstanding < best.outstanding:
+                        best = endpoint
+                if count:
+                    self._next = (self._next + 1) % count
+            if best is None and (route == "primary" or fallback) and self.primary not in tried:
+                best = self.primary
+            if best is not None:
+                best.outstanding += 1
+                best.requests += 1
+            return best
+
+    def _endpoint(self, read: bool, route: Optional[str]) -> Endpoint:
+        endpoint = self._choose(read, route)
+        if endpoint is None:
+            raise pyodbc.OperationalError("No healthy read replica is available")
+        return endpoint
+
+    def _finish(self, endpoint: Endpoint, error: Optional[BaseException]) -> bool:
+        """
+        Ends a call on an endpoint. A success resets its failure count; a connection failure counts towards
+        ejecting it. Returns whether error was a connection failure.
+        """
+        with self._lock:
+            endpoint.outstanding -= 1
+            if error is None:
+                endpoint.failures = 0
+                return False
+            if not is_connection_failure(error):
+                return False
+            self._failed(endpoint, error)
+            return True
+
+    def _failed(self, endpoint: Endpoint, error: BaseException) -> None:
+        endpoint.failures += 1
+        endpoint.connection_errors += 1
+        if endpoint is self.primary or endpoint.failures < self.max_failures or endpoint.ejected_until:
+            return
+        endpoint.ejected_until = time.monotonic() + self.eject_for
+        endpoint.ejections += 1
+        logger.warning("Ejecting %s for %.1f s after %d connection failures: %s", endpoint.name,
+                       self.eject_for, endpoint.failures, error)
+
+    @contextmanager
+    def lane(self, name: str):
+        """Makes every call inside it check its connection out from the given pool lane, on whichever endpoint."""
+        with ExitStack() as stack:
+            for endpoint in self.endpoints:
+                stack.enter_context(endpoint.connector.lane(name))
+            yield
+
+    def routing_stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Returns, per endpoint ("primary", "replica_0", ...), the outstanding calls, calls routed, consecutive and
+        total connection failures, ejections and whether it is in rotation.
+        """
+        with self._lock:
+            return {endpoint.name: endpoint.stats() for endpoint in self.endpoints}
+
+    def cache_stats(self) -> Dict[str, Any]:
+        """Returns the stats of the result cache, which every endpoint shares."""
+        return self.primary.connector.cache_stats()
+
+    def retry_stats(self) -> Dict[str, Any]:
+        """Returns the counters of the retry policy, which every endpoint shares."""
+        return self.primary.connector.retry_stats()
+
+    def pool_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Returns the pool stats of every endpoint, by endpoint name."""
+        return {endpoint.name: endpoint.connector.pool_stats() for endpoint in self.endpoints}
+
+
+class RoutingDatabaseConnector(_RoutingBase):
+    """
+    Routes calls between a primary server and read replicas, with a separate DatabaseConnector and pool for each.
+
+    SELECT queries (see is_read_query) and TVF calls go to the replica with the fewest outstanding calls; writes,
+    stored procedures and everything run inside transaction() or session() go to the primary. Every routed
+    method takes a route argument, "primary" or "replica", to override the choice, e.g. route="primary" to read
+    your own writes or route="replica" for a read-only procedure.
+
+    A replica that fails with a connection error max_failures times in a row is taken out of rotation for
+    eject_for seconds, then let back in on probation. A read that hits a connection failure on a replica is
+    retried on another replica, and on the primary when fallback_to_primary is set (the default); writes are
+    never retried. With fallback_to_primary, reads also go to the primary while no replica is healthy.
+
+    Methods not routed here (batches, partitioned extraction, describe_routine, ...) are available on the
+    endpoints' connectors, e.g. db.primary.connector.
+
+    Example:
+        db = RoutingDatabaseConnector(primary_conn_string, [replica1_conn_string, replica2_conn_string], pool_limit=10)
+        users = db.execute_query("SELECT * FROM users")          # a replica
+        db.execute_query("UPDATE users SET age = age + 1")       # the primary
+        me = db.execute_query("SELECT * FROM users WHERE id = ?", (1,), route="primary")
+    """
+
+    def __init__(
+        self,
+        primary: Optional[str],
+        replicas: Sequence[str] = (),
+        max_failures: int = 3,
+        eject_for: float = 30.0,
+        fallback_to_primary: bool = True,
+        **options: Any,
+    ) -> None:
+        """
+        Args:
+            primary (Optional[str]): ODBC connection string of the primary. Falls back to SQL_CONN_STRING.
+            replicas (Sequence[str]): ODBC connection strings of the read replicas.
+            max_failures (int): Consecutive connection failures after which a replica is ejected.
+            eject_for (float): Seconds an ejected replica stays out of rotation.
+            fallback_to_primary (bool): Send reads to the primary when no replica can take them.
+            options (Any): DatabaseConnector arguments (pool_limit, row_format, cache, hooks, ...) used for every
+                endpoint, so each replica gets a pool of the same size. A cache, routine catalog or hook passed
+                here is shared by all endpoints.
+        """
+        super().__init__(
+            DatabaseConnector, primary, replicas, max_failures, eject_for, fallback_to_primary, options
+        )
+
+    def _call(self, read: bool, route: Optional[str], method: str, *args: Any, **kwargs: Any) -> Any:
+        endpoint = self._endpoint(read, route)
+        tried = [endpoint]
+        while True:
+            try:
+                result = getattr(endpoint.connector, method)(*args, **kwargs)
+            except BaseException as e:
+                if not self._finish(endpoint, e) or not read:
+                    raise
+                endpoint = self._choose(read, route, tried)
+                if endpoint is None:
+                    raise
+                tried.append(endpoint)
+                continue
+            self._finish(endpoint, None)
+            return result
+
+    def _stream(self, read: bool, route: Optional[str], method: str, *args: Any, **kwargs: Any) -> Iterator[Any]:
+        # The endpoint is picked when iteration starts and stays outstanding until the stream ends.
+        endpoint = self._endpoint(read, route)
+        error = None
+        try:
+            with closing(getattr(endpoint.connector, method)(*args, **kwargs)) as items:
+                yield from items
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            self._finish(endpoint, error)
+
+    def transaction(self):
+        """Starts a transaction on the primary. Calls inside it are routed to the primary. See DatabaseConnector."""
+        return self.primary.connector.transaction()
+
+    def session(self):
+        """Starts a session on the primary. Calls inside it are routed to the primary. See DatabaseConnector."""
+        return self.primary.connector.session()
+
+    def execute_query(
+        self,
+        query: str,
+        params: Optional[tuple] = None,
+        row_format: Optional[str] = None,
+        cache_ttl: Optional[float] = None,
+        cache_tags: Sequence[str] = (),
+        timeout: Optional[float] = None,
+        lane: Optional[str] = None,
+        converters: Optional[TypeConverters] = None,
+        retry: Optional[bool] = None,
+        route: Optional[str] = None,
+    ) -> List[Any]:
+        """Runs DatabaseConnector.execute_query on a replica if the query is a read, else on the primary."""
+        return self._call(
+            is_read_query(query),
+            route,
+            "execute_query",
+            query,
+            params,
+            row_format,
+            cache_ttl,
+            cache_tags,
+            timeout=timeout,
+            lane=lane,
+            converters=converters,
+            retry=retry,
+        )
+
+    def execute_stored_procedure(
+        self,
+        proc_name: str,
+        *args: Any,
+        timeout: Optional[float] = None,
+        lane: Optional[str] = None,
+        retry: Optional[bool] = None,
+        route: Optional[str] = None,
+    ) -> None:
+        """Runs DatabaseConnector.execute_stored_procedure on the primary."""
+        self._call(False, route, "execute_stored_procedure", proc_name, *args, timeout=timeout, lane=lane, retry=retry)
+
+    def execute_and_return_stored_procedure(
+        self,
+        proc_name: str,
+        *args: Any,
+        row_format: Optional[str] = None,
+        cache_ttl: Optional[float] = None,
+        cache_tags: Sequence[str] = (),
+        timeout: Optional[float] = None,
+        lane: Optional[str] = None,
+        converters: Optional[TypeConverters] = None,
+        retry: Optional[bool] = None,
+        route: Optional[str] = None,
+    ) -> List[Any]:
+        """Runs DatabaseConnector.execute_and_return_stored_procedure on the primary."""
+        return self._call(
+            route == "replica",
+            route,
+            "execute_and_return_stored_procedure",
+            proc_name,
+            *args,
+            row_format=row_format,
+            cache_ttl=cache_ttl,
+            cache_tags=cache_tags,
+            timeout=timeout,
+            lane=lane,
+            converters=converters,
+            retry=retry,
+        )
+
+    def execute_many(self, query: str, rows: Iterable[Sequence[Any]], **kwargs: Any) -> int:
+        """Runs DatabaseConnector.execute_many on the primary."""
+        return self._call(False, "primary", "execute_many", query, rows, **kwargs)
+
+    def execute_tvf_and_fetch_results(
+        self,
+        tvf_name: str,
+        *parameters: Any,
+        row_format: Optional[str] = None,
+        cache_ttl: Optional[float] = None,
+        cache_tags: Sequence[str] = (),
+        timeout: Optional[float] = None,
+        lane: Optional[str] = None,
+        converters: Optional[TypeConverters] = None,
+        retry: Optional[bool] = None,
+        route: Optional[str] = None,
+    ) -> List[Any]:
+        """Runs DatabaseConnector.execute_tvf_and_fetch_results on a replica."""
+        return self._call(
+            True,
+            route,
+            "execute_tvf_and_fetch_results",
+            tvf_name,
+            *parameters,
+            row_format=row_format,
+            cache_ttl=cache_ttl,
+            cache_tags=cache_tags,
+            timeout=timeout,
+            lane=lane,
+            converters=converters,
+            retry=retry,
+        )
+
+    def execute_query_columnar(
+        self,
+        query: str,
+        params: Optional[tuple] = None,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        timeout: Optional[float] = None,
+        lane: Optional[str] = None,
+        route: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """Runs DatabaseConnector.execute_query_columnar on a replica if the query is a read, else on the primary."""
+        return self._call(
+            is_read_query(query),
+            route,
+            "execute_query_columnar",
+            query,
+            params,
+            batch_size,
+            timeout=timeout,
+            lane=lane,
+        )
+
+    def export_query(
+        self,
+        query: str,
+        params: Optional[tuple] = None,
+        path: Optional[str] = None,
+        format: str = "csv",
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        row_group_size: int = DEFAULT_ROW_GROUP_SIZE,
+        timeout: Optional[float] = None,
+        lane: Optional[str] = None,
+        route: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        Runs DatabaseConnector.export_query on a replica if the query is a read, else on the primary. Exports are
+        not retried on another endpoint, since the file may already be partly written.
+        """
+        endpoint = self._endpoint(is_read_query(query), route)
+        error = None
+        try:
+            return endpoint.connector.export_query(
+                query, params, path, format, batch_size, row_group_size, timeout=timeout, lane=lane
+            )
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            self._finish(endpoint, error)
+
+    def stream_query(
+        self,
+        query: str,
+        params: Optional[tuple] = None,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        row_format: Optional[str] = None,
+        lane: Optional[str] = None,
+        route: Optional[str] = None,
+    ) -> Iterator[Any]:
+        """Runs DatabaseConnector.stream_query on a replica if the query is a read, else on the primary."""
+        return self._stream(
+            is_read_query(query), route, "stream_query", query, params, batch_size, row_format, lane=lane
+        )
+
+    def stream_stored_procedure(
+        self,
+        proc_name: str,
+        *args: Any,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        row_format: Optional[str] = None,
+        lane: Optional[str] = None,
+        route: Optional[str] = None,
+    ) -> Iterator[Any]:
+        """Runs DatabaseConnector.stream_stored_procedure on the primary."""
+        return self._stream(
+            route == "replica",
+            route,
+            "stream_stored_procedure",
+            proc_name,
+            *args,
+            batch_size=batch_size,
+            row_format=row_format,
+            lane=lane,
+        )
+
+    def stream_tvf_results(
+        self,
+        tvf_name: str,
+        *parameters: Any,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        row_format: Optional[str] = None,
+        lane: Optional[str] = None,
+        route: Optional[str] = None,
+    ) -> Iterator[Any]:
+        """Runs DatabaseConnector.stream_tvf_results on a replica."""
+        return self._stream(
+            True,
+            route,
+            "stream_tvf_results",
+            tvf_name,
+            *parameters,
+            batch_size=batch_size,
+            row_format=row_format,
+            lane=lane,
+        )
+
+    def paginate_query(
+        self,
+        source: str,
+        keys: Union[str, Sequence[str]],
+        page_size: int = DEFAULT_PAGE_SIZE,
+        params: Optional[tuple] = None,
+        after: Optional[Sequence[Any]] = None,
+        row_format: Optional[str] = None,
+        lane: Optional[str] = None,
+        route: Optional[str] = None,
+    ) -> Iterator[List[Any]]:
+        """
+        Runs DatabaseConnector.paginate_query on a replica if the source is a read, else on the primary. Every
+        page of a scan is read from the same endpoint.
+        """
+        return self._stream(
+            is_read_query(source_query(source)),
+            route,
+            "paginate_query",
+            source,
+            keys,
+            page_size,
+            params,
+            after,
+            row_format,
+            lane,
+        )
+
+    def execute_query_sets(
+        self,
+        query: str,
+        params: Optional[tuple] = None,
+        row_format: Optional[str] = None,
+        timeout: Optional[float] = None,
+        lane: Optional[str] = None,
+        converters: Optional[TypeConverters] = None,
+        retry: Optional[bool] = None,
+        route: Optional[str] = None,
+    ) -> List[List[Any]]:
+        """Runs DatabaseConnector.execute_query_sets on a replica if the batch only reads, else on the primary."""
+        return self._call(
+            is_read_query(query),
+            route,
+            "execute_query_sets",
+            query,
+            params,
+            row_format,
+            timeout,
+            lane,
+            converters,
+            retry,
+        )
+
+    def execute_and_return_stored_procedure_sets(
+        self,
+        proc_name: str,
+        *args: Any,
+        row_format: Optional[str] = None,
+        timeout: Optional[float] = None,
+        lane: Optional[str] = None,
+        converters: Optional[TypeConverters] = None,
+        retry: Optional[bool] = None,
+        route: Optional[str] = None,
+    ) -> List[List[Any]]:
+        """Runs DatabaseConnector.execute_and_return_stored_procedure_sets on the primary."""
+        return self._call(
+            route == "replica",
+            route,
+            "execute_and_return_stored_procedure_sets",
+            proc_name,
+            *args,
+            row_format=row_format,
+            timeout=timeout,
+            lane=lane,
+            converters=converters,
+            retry=retry,
+        )
+
+    def execute_statements(
+        self,
+        statements: Sequence[Union[str, Tuple[str, Sequence[Any]]]],
+        row_format: Optional[str] = None,
+        timeout: Optional[float] = None,
+        lane: Optional[str] = None,
+        converters: Optional[TypeConverters] = None,
+        retry: Optional[bool] = None,
+        route: Optional[str] = None,
+    ) -> List[List[Any]]:
+        """Runs DatabaseConnector.execute_statements on a replica if every statement reads, else on the primary."""
+        return self._call(
+            _statements_read(statements),
+            route,
+            "execute_statements",
+            statements,
+            row_format,
+            timeout,
+            lane,
+            converters,
+            retry,
+        )
+
+    def stream_query_sets(
+        self,
+        query: str,
+        params: Optional[tuple] = None,
+        row_format: Optional[str] = None,
+        lane: Optional[str] = None,
+        route: Optional[str] = None,
+    ) -> Iterator[List[Any]]:
+        """Runs DatabaseConnector.stream_query_sets on a replica if the batch only reads, else on the primary."""
+        return self._stream(is_read_query(query), route, "stream_query_sets", query, params, row_format, lane)
+
+    def stream_stored_procedure_sets(
+        self,
+        proc_name: str,
+        *args: Any,
+        row_format: Optional[str] = None,
+        lane: Optional[str] = None,
+        route: Optional[str] = None,
+    ) -> Iterator[List[Any]]:
+        """Runs DatabaseConnector.stream_stored_procedure_sets on the primary."""
+        return self._stream(
+            route == "replica",
+            route,
+            "stream_stored_procedure_sets",
+            proc_name,
+            *args,
+            row_format=row_format,
+            lane=lane,
+        )
+
+    def close(self) -> None:
+        """Closes the pools of every endpoint."""
+        for endpoint in self.endpoints:
+            endpoint.connector.close()
+
+
+class AsyncRoutingDatabaseConnector(_RoutingBase):
+    """
+    The asyncio version of RoutingDatabaseConnector, with an AsyncDatabaseConnector per endpoint. Routing, health
+    tracking and the route argument work the same way.
+
+    Example:
+        db = AsyncRoutingDatabaseConnector(primary_conn_string, [replica_conn_string], pool_limit=10)
+        users = await db.async_execute_query("SELECT * FROM users")
+    """
+
+    def __init__(
+        self,
+        primary: Optional[str],
+        replicas: Sequence[str] = (),
+        max_failures: int = 3,
+        eject_for: float = 30.0,
+        fallback_to_primary: bool = True,
+        **options: Any,
+    ) -> None:
+        """
+        Args:
+            primary (Optional[str]): ODBC connection string of the primary. Falls back to SQL_CONN_STRING.
+            replicas (Sequence[str]): ODBC connection strings of the read replicas.
+            max_failures (int): Consecutive connection failures after which a replica is ejected.
+            eject_for (float): Seconds an ejected replica stays out of rotation.
+            fallback_to_primary (bool): Send reads to the primary when no replica can take them.
+            options (Any): AsyncDatabaseConnector arguments used for every endpoint. Each endpoint gets its own
+                executor unless one is passed here.
+        """
+        super().__init__(
+            AsyncDatabaseConnector, primary, replicas, max_failures, eject_for, fallback_to_primary, options
+        )
+
+    async def _call(self, read: bool, route: Optional[str], method: str, *args: Any, **kwargs: Any) -> Any:
+        endpoint = self._endpoint(read, route)
+        tried = [endpoint]
+        while True:
+            try:
+                result = await getattr(endpoint.connector, method)(*args, **kwargs)
+            except BaseException as e:
+                if not self._finish(endpoint, e) or not read:
+                    raise
+                endpoint = self._choose(read, route, tried)
+                if endpoint is None:
+                    raise
+                tried.append(endpoint)
+                continue
+            self._finish(endpoint, None)
+            return result
+
+    async def _stream(
+        self, read: bool, route: Optional[str], method: str, *args: Any, **kwargs: Any
+    ) -> AsyncIterator[Any]:
+        endpoint = self._endpoint(read, route)
+        error = None
+        try:
+            async with aclosing(getattr(endpoint.connector, method)(*args, **kwargs)) as items:
+                async for item in items:
+                    yield item
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            self._finish(endpoint, error)
+
+    def transaction(self):
+        """Starts a transaction on the primary. Calls inside it are routed to the primary."""
+        return self.primary.connector.transaction()
+
+    def session(self):
+        """Starts a session on the primary. Calls inside it are routed to the primary."""
+        return self.primary.connector.session()
+
+    async def async_execute_query(
+        self,
+        query: str,
+        params: Optional[tuple] = None,
+        row_format: Optional[str] = None,
+        cache_ttl: Optional[float] = None,
+        cache_tags: Sequence[str] = (),
+        coalesce: Optional[bool] = None,
+        timeout: Optional[float] = None,
+        lane: Optional[str] = None,
+        converters: Optional[TypeConverters] = None,
+        retry: Optional[bool] = None,
+        route: Optional[str] = None,
+    ) -> List[Any]:
+        """Runs AsyncDatabaseConnector.async_execute_query on a replica if the query is a read, else on the primary."""
+        return await self._call(
+            is_read_query(query),
+            route,
+            "async_execute_query",
+            query,
+            params,
+            row_format,
+            cache_ttl,
+            cache_tags,
+            coalesce=coalesce,
+            timeout=timeout,
+            lane=lane,
+            converters=converters,
+            retry=retry,
+        )
+
+    async def async_execute_stored_procedure(
+        self,
+        proc_name: str,
+        *args: Any,
+        timeout: Optional[float] = None,
+        lane: Optional[str] = None,
+        retry: Optional[bool] = None,
+        route: Optional[str] = None,
+    ) -> None:
+        """Runs AsyncDatabaseConnector.async_execute_stored_procedure on the primary."""
+        await self._call(
+            False, route, "async_execute_stored_procedure", proc_name, *args, timeout=timeout, lane=lane, retry=retry
+        )
+
+    async def async_execute_and_return_stored_procedure(
+        self,
+        proc_name: str,
+        *args: Any,
+        row_format: Optional[str] = None,
+        cache_ttl: Optional[float] = None,
+        cache_tags: Sequence[str] = (),
+        timeout: Optional[float] = None,
+        lane: Optional[str] = None,
+        converters: Optional[TypeConverters] = None,
+        retry: Optional[bool] = None,
+        route: Optional[str] = None,
+    ) -> List[Any]:
+        """Runs AsyncDatabaseConnector.async_execute_and_return_stored_procedure on the primary."""
+        return await self._call(
+            route == "replica",
+            route,
+            "async_execute_and_return_stored_procedure",
+            proc_name,
+            *args,
+            row_format=row_format,
+            cache_ttl=cache_ttl,
+            cache_tags=cache_tags,
+            timeout=timeout,
+            lane=lane,
+            converters=converters,
+            retry=retry,
+        )
+
+    async def async_execute_many(self, query: str, rows: Iterable[Sequence[Any]], **kwargs: Any) -> int:
+        """Runs AsyncDatabaseConnector.async_execute_many on the primary."""
+        return await self._call(False, "primary", "async_execute_many", query, rows, **kwargs)
+
+    async def async_execute_tvf_and_fetch_results(
+        self,
+        tvf_name: str,
+        *parameters: Any,
+        row_format: Optional[str] = None,
+        cache_ttl: Optional[float] = None,
+        cache_tags: Sequence[str] = (),
+        coalesce: Optional[bool] = None,
+        timeout: Optional[float] = None,
+        lane: Optional[str] = None,
+        converters: Optional[TypeConverters] = None,
+        retry: Optional[bool] = None,
+        route: Optional[str] = None,
+    ) -> List[Any]:
+        """Runs AsyncDatabaseConnector.async_execute_tvf_and_fetch_results on a replica."""
+        return await self._call(
+            True,
+            route,
+            "async_execute_tvf_and_fetch_results",
+            tvf_name,
+            *parameters,
+            row_format=row_format,
+            cache_ttl=cache_ttl,
+            cache_tags=cache_tags,
+            coalesce=coalesce,
+            timeout=timeout,
+            lane=lane,
+            converters=converters,
+            retry=retry,
+        )
+
+    async def async_execute_query_columnar(
+        self,
+        query: str,
+        params: Optional[tuple] = None,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        timeout: Optional[float] = None,
+        lane: Optional[str] = None,
+        route: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """Runs AsyncDatabaseConnector.async_execute_query_columnar on a replica if the query is a read."""
+        return await self._call(
+            is_read_query(query),
+            route,
+            "async_execute_query_columnar",
+            query,
+            params,
+            batch_size,
+            timeout=timeout,
+            lane=lane,
+        )
+
+    async def async_export_query(
+        self,
+        query: str,
+        params: Optional[tuple] = None,
+        path: Optional[str] = None,
+        format: str = "csv",
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        row_group_size: int = DEFAULT_ROW_GROUP_SIZE,
+        timeout: Optional[float] = None,
+        lane: Optional[str] = None,
+        route: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        Runs AsyncDatabaseConnector.async_export_query on a replica if the query is a read, else on the primary.
+        Exports are not retried on another endpoint, since the file may already be partly written.
+        """
+        endpoint = self._endpoint(is_read_query(query), route)
+        error = None
+        try:
+            return await endpoint.connector.async_export_query(
+                query, params, path, format, batch_size, row_group_size, timeout=timeout, lane=lane
+            )
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            self._finish(endpoint, error)
+
+    def async_stream_query(
+        self,
+        query: str,
+        params: Optional[tuple] = None,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        row_format: Optional[str] = None,
+        lane: Optional[str] = None,
+        route: Optional[str] = None,
+    ) -> AsyncIterator[Any]:
+        """Runs AsyncDatabaseConnector.async_stream_query on a replica if the query is a read, else on the primary."""
+        return self._stream(
+            is_read_query(query), route, "async_stream_query", query, params, batch_size, row_format, lane=lane
+        )
+
+    def async_stream_tvf_results(
+        self,
+        tvf_name: str,
+        *parameters: Any,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        row_format: Optional[str] = None,
+        lane: Optional[str] = None,
+        route: Optional[str] = None,
+    ) -> AsyncIterator[Any]:
+        """Runs AsyncDatabaseConnector.async_stream_tvf_results on a replica."""
+        return self._stream(
+            True,
+            route,
+            "async_stream_tvf_results",
+            tvf_name,
+            *parameters,
+            batch_size=batch_size,
+            row_format=row_format,
+            lane=lane,
+        )
+
+    def async_stream_stored_procedure(
+        self,
+        proc_name: str,
+        *args: Any,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        row_format: Optional[str] = None,
+        lane: Optional[str] = None,
+        route: Optional[str] = None,
+    ) -> AsyncIterator[Any]:
+        """Runs AsyncDatabaseConnector.async_stream_stored_procedure on the primary."""
+        return self._stream(
+            route == "replica",
+            route,
+            "async_stream_stored_procedure",
+            proc_name,
+            *args,
+            batch_size=batch_size,
+            row_format=row_format,
+            lane=lane,
+        )
+
+    def async_paginate_query(
+        self,
+        source: str,
+        keys: Union[str, Sequence[str]],
+        page_size: int = DEFAULT_PAGE_SIZE,
+        params: Optional[tuple] = None,
+        after: Optional[Sequence[Any]] = None,
+        row_format: Optional[str] = None,
+        lane: Optional[str] = None,
+        route: Optional[str] = None,
+    ) -> AsyncIterator[List[Any]]:
+        """Runs AsyncDatabaseConnector.async_paginate_query on a replica if the source is a read."""
+        return self._stream(
+            is_read_query(source_query(source)),
+            route,
+            "async_paginate_query",
+            source,
+            keys,
+            page_size,
+            params,
+            after,
+            row_format,
+            lane,
+        )
+
+    async def async_execute_query_sets(
+        self,
+        query: str,
+        params: Optional[tuple] = None,
+        row_format: Optional[str] = None,
+        timeout: Optional[float] = None,
+        lane: Optional[str] = None,
+        converters: Optional[TypeConverters] = None,
+        retry: Optional[bool] = None,
+        route: Optional[str] = None,
+    ) -> List[List[Any]]:
+        """Runs AsyncDatabaseConnector.async_execute_query_sets on a replica if the batch only reads."""
+        return await self._call(
+            is_read_query(query),
+            route,
+            "async_execute_query_sets",
+            query,
+            params,
+            row_format,
+            timeout,
+            lane,
+            converters,
+            retry,
+        )
+
+    async def async_execute_and_return_stored_procedure_sets(
+        self,
+        proc_name: str,
+        *args: Any,
+        row_format: Optional[str] = None,
+        timeout: Optional[float] = None,
+        lane: Optional[str] = None,
+        converters: Optional[TypeConverters] = None,
+        retry: Optional[bool] = None,
+        route: Optional[str] = None,
+    ) -> List[List[Any]]:
+        """Runs AsyncDatabaseConnector.async_execute_and_return_stored_procedure_sets on the primary."""
+        return await self._call(
+            route == "replica",
+            route,
+            "async_execute_and_return_stored_procedure_sets",
+            proc_name,
+            *args,
+            row_format=row_format,
+            timeout=timeout,
+            lane=lane,
+            converters=converters,
+            retry=retry,
+        )
+
+    async def async_execute_statements(
+        self,
+        statements: Sequence[Union[str, Tuple[str, Sequence[Any]]]],
+        row_format: Optional[str] = None,
+        timeout: Optional[float] = None,
+        lane: Optional[str] = None,
+        converters: Optional[TypeConverters] = None,
+        retry: Optional[bool] = None,
+        route: Optional[str] = None,
+    ) -> List[List[Any]]:
+        """Runs AsyncDatabaseConnector.async_execute_statements on a replica if every statement reads."""
+        return await self._call(
+            _statements_read(statements),
+            route,
+            "async_execute_statements",
+            statements,
+            row_format,
+            timeout,
+            lane,
+            converters,
+            retry,
+        )
+
+    def async_stream_query_sets(
+        self,
+        query: str,
+        params: Optional[tuple] = None,
+        row_format: Optional[str] = None,
+        lane: Optional[str] = None,
+        route: Optional[str] = None,
+    ) -> AsyncIterator[List[Any]]:
+        """Runs AsyncDatabaseConnector.async_stream_query_sets on a replica if the batch only reads."""
+        return self._stream(is_read_query(query), route, "async_stream_query_sets", query, params, row_format, lane)
+
+    def async_stream_stored_procedure_sets(
+        self,
+        proc_name: str,
+        *args: Any,
+        row_format: Optional[str] = None,
+        lane: Optional[str] = None,
+        route: Optional[str] = None,
+    ) -> AsyncIterator[List[Any]]:
+        """Runs AsyncDatabaseConnector.async_stream_stored_procedure_sets on the primary."""
+        return self._stream(
+            route == "replica",
+            route,
+            "async_stream_stored_procedure_sets",
+            proc_name,
+            *args,
+            row_format=row_format,
+            lane=lane,
+        )
+
+    async def close(self) -> None:
+        """Closes the pools (and owned executors) of every endpoint."""
+        for endpoint in self.endpoints:
+            await endpoint.connector.close()
@@ -0,0 +1,117 @@
+import functools
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+ROW_FORMATS = ("dict", "tuple", "row")
+
+
+class Row(tuple):
+    """
+    A compact, read-only result row supporting lookup by column name and by position.
+
+    Rows are tuples, so they cost no more memory than the raw values. The column-name-to-position index is stored
+    once per result set, on a Row subclass created by row_type(), instead of being repeated in every row the way
+    dict keys are.
+
+    Attribute access only reaches columns whose names are not already attributes of Row or tuple: a column named
+    keys, values, items, get, as_dict, count or index is read with row["count"], never row.count.
+
+    Example:
+        row["name"], row[0], row.name, row.as_dict()
+    """
+
+    __slots__ = ()
+    _index: Dict[str, int] = {}
+
+    def __getitem__(self, key: Any) -> Any:
+        if isinstance(key, str):
+            try:
+                return tuple.__getitem__(self, self._index[key])
+            except KeyError:
+                raise KeyError(key) from None
+        return tuple.__getitem__(self, key)
+
+    def __getattr__(self, name: str) -> Any:
+        # Only called when normal attribute lookup fails, i.e. for column names.
+        try:
+            return tuple.__getitem__(self, self._index[name])
+        except KeyError:
+            raise AttributeError(name) from None
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{name}={value!r}" for name, value in self.items())
+        return f"Row({fields})"
+
+    def __reduce__(self) -> Tuple[Any, ...]:
+        return _rebuild_row, (self.keys(), tuple(self))
+
+    def keys(self) -> List[str]:
+        """Returns the column names in result order."""
+        return list(self._index)
+
+    def values(self) -> Tuple[Any, ...]:
+        """Returns the row's values as a plain tuple."""
+        return tuple(self)
+
+    def items(self) -> List[Tuple[str, Any]]:
+        """Returns (column name, value) pairs in result order."""
+        return list(zip(self._index, self))
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Returns the value of the named column, or default if there is no such column."""
+        position = self._index.get(key)
+        return default if position is None else tuple.__getitem__(self, position)
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Returns the row as a plain dictionary."""
+        return dict(zip(self._index, self))
+
+
+def row_type(columns: Sequence[str]) -> type:
+    """Creates the Row subclass shared by every row of a result set with the given columns."""
+    index = {name: position for position, name in enumerate(columns)}
+    return type("Row", (Row,), {"__slots__": (), "_index": index})
+
+
+@functools.lru_cache(maxsize=256)
+def _unpickled_row_type(columns: Tuple[str, ...]) -> type:
+    return row_type(columns)
+
+
+def _rebuild_row(columns: Sequence[str], values: Tuple[Any, ...]) -> Row:
+    # Rows unpickled with the same columns share one class rather than getting a class each.
+    return _unpickled_row_type(tuple(columns))(values)
+
+
+def validate_row_format(row_format: str) -> str:
+    """Checks that row_format is one of ROW_FORMATS and returns it."""
+    if row_format not in ROW_FORMATS:
+        raise ValueError(f"Unknown row_format '{row_format}', expected one of {ROW_FORMATS}")
+    return row_format
+
+
+def convert_rows(columns: Sequence[str], rows: Iterable[Any], row_format: Optional[str] = "dict") -> List[Any]:
+    """
+    Converts a batch of driver rows into the requested row format.
+
+    Args:
+        columns (Sequence[str]): Column names of the result set, in order.
+        rows (Iterable[Any]): Rows as returned by the driver (e.g. pyodbc.Row).
+        row_format (Optional[str]): "dict" (the default), "tuple" or "row".
+
+    Returns:
+        List[Any]: The converted rows.
+    """
+    return row_converter(columns, row_format)(rows)
+
+
+def row_converter(columns: Sequence[str], row_format: Optional[str] = "dict") -> Callable[[Iterable[Any]], List[Any]]:
+    """
+    Returns a function that converts batches of driver rows like convert_rows(). Results fetched in several
+    batches use one converter, so that all their "row" rows share a single Row class.
+    """
+    if row_format == "dict":
+        return lambda rows: [dict(zip(columns, row)) for row in rows]
+    if row_format == "tuple":
+        return lambda rows: [tuple(row) for row in rows]
+    row_class = row_type(columns)
+    return lambda rows: list(map(row_class, rows))
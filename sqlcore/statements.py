@@ -0,0 +1,307 @@
+import pyodbc
+import re
+from itertools import islice
+from typing import Any, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+from .converters import TypeConverters, install_converters, restore_converters
+from .rows import convert_rows
+
+DEFAULT_BATCH_SIZE = 1000
+
+# One part of a SQL Server name: a plain identifier or a [bracketed] one.
+NAME_PART = r"(?:\[[^\]]+\]|[A-Za-z_][A-Za-z0-9_@$#]*)"
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_READ_STATEMENT = re.compile(r"^\s*(SELECT|WITH)\b", re.IGNORECASE)
+# Anything that can write, call procedures or change session state. SELECT ... INTO creates a table.
+_WRITE_KEYWORD = re.compile(
+    r"\b(INSERT|UPDATE|DELETE|MERGE|INTO|EXEC|EXECUTE|CREATE|ALTER|DROP|TRUNCATE|GRANT|REVOKE|DENY|SET|DECLARE|"
+    r"BEGIN|COMMIT|ROLLBACK|SAVE|USE|WAITFOR|OPENROWSET|OPENQUERY)\b",
+    re.IGNORECASE,
+)
+
+
+def procedure_call(proc_name: str, arg_count: int) -> str:
+    """Builds the EXEC statement for a stored procedure taking arg_count positional parameters."""
+    param_placeholders = ", ".join(["?"] * arg_count)
+    return f"EXEC {proc_name} {param_placeholders}"
+
+
+def tvf_query(tvf_name: str, param_count: int) -> str:
+    """Builds the SELECT statement for a table-valued function in the dbo schema."""
+    param_placeholders = ",".join(["?"] * param_count)
+    return f"SELECT * FROM dbo.{tvf_name}({param_placeholders})"
+
+
+def execute_statement(
+    cursor: Any,
+    query: str,
+    params: Optional[Sequence[Any]] = None,
+    input_sizes: Optional[Sequence[Any]] = None,
+) -> Any:
+    """
+    Executes query on cursor. Parameters are passed to the driver as one sequence, so that a single list argument
+    (e.g. a TVP) is not unpacked. input_sizes, if given, declares the SQL types of the parameters first.
+    """
+    if input_sizes:
+        cursor.setinputsizes(input_sizes)
+    if params:
+        return cursor.execute(query, params)
+    return cursor.execute(query)
+
+
+def is_read_only(query: str) -> bool:
+    """
+    Conservatively checks that query is a plain SELECT (or WITH ... SELECT) that cannot modify anything.
+
+    Returns False for anything it is not sure about, including SELECT ... INTO and multi-statement batches that
+    contain a write.
+    """
+    text = _STRING_LITERAL.sub("''", query)
+    return bool(_READ_STATEMENT.match(text)) and not _WRITE_KEYWORD.search(text)
+
+
+def run_statement(
+    conn: Any,
+    query: str,
+    params: Optional[Sequence[Any]] = None,
+    row_format: str = "dict",
+    fetch: bool = True,
+    commit: bool = True,
+    rollback: bool = True,
+    rollback_reads: bool = False,
+    input_sizes: Optional[Sequence[Any]] = None,
+    cancellation: Optional[Any] = None,
+    converters: Optional[TypeConverters] = None,
+) -> List[Any]:
+    """
+    Executes one statement on conn, fetches its result and finishes the transaction, as a single blocking unit.
+
+    The async connector runs this in one executor call, so a query costs one thread hop instead of one per step.
+
+    Args:
+        conn (Any): The connection to run the statement on.
+        query (str): The SQL statement.
+        params (Optional[Sequence[Any]]): Parameters, passed to the driver as one sequence so that a single list
+            argument (e.g. a TVP) is not unpacked.
+        row_format (str): Row format of the returned rows.
+        fetch (bool): Fetch the result set, if any. When False the statement is always committed.
+        commit (bool): Commit statements that return no rows. False inside a transaction.
+        rollback (bool): Roll back after an error. False when the connection is pinned by a transaction or session.
+        rollback_reads (bool): Roll back after fetching rows, to end the read transaction.
+        input_sizes (Optional[Sequence[Any]]): SQL type declarations of the parameters, for cursor.setinputsizes().
+        cancellation (Optional[Cancellation]): Lets another thread cancel the statement, see sqlcore.cancel.
+        converters (Optional[TypeConverters]): Output converters installed on conn for this statement only, over
+            those of the connection.
+
+    Returns:
+        List[Any]: The fetched rows, or an empty list.
+    """
+    cursor = conn.cursor()
+    replaced = None
+    try:
+        if converters:
+            replaced = install_converters(conn, converters)
+        if cancellation is not None:
+            cancellation.attach(cursor)
+        execute_statement(cursor, query, params, input_sizes)
+
+        if fetch and cursor.description:
+            columns = [col[0] for col in cursor.description]
+            result = convert_rows(columns, cursor.fetchall(), row_format)
+            if rollback_reads:
+                conn.rollback()
+            return result
+        if commit:
+            conn.commit()
+        return []
+    except pyodbc.Error:
+        if rollback:
+            try:
+                conn.rollback()
+            except pyodbc.Error:
+                pass
+        raise
+    finally:
+        cursor.close()
+        if replaced is not None:
+            restore_converters(conn, replaced)
+
+
+def combine_statements(statements: Sequence[Union[str, Tuple[str, Sequence[Any]]]]) -> Tuple[str, Tuple[Any, ...]]:
+    """
+    Joins several statements into one batch that is sent to the server in a single round trip.
+
+    Args:
+        statements (Sequence[Union[str, Tuple[str, Sequence[Any]]]]): SQL strings, or (sql, params) pairs for
+            parameterized statements.
+
+    Returns:
+        Tuple[str, Tuple[Any, ...]]: The batch text and the parameters of all statements, in order.
+    """
+    if not statements:
+        raise ValueError("At least one statement is required")
+    parts = []
+    params: List[Any] = []
+    for statement in statements:
+        if isinstance(statement, str):
+            parts.append(statement.rstrip().rstrip(";"))
+        else:
+            sql, statement_params = statement
+            parts.append(sql.rstrip().rstrip(";"))
+            params.extend(statement_params or ())
+    return ";\n".join(parts), tuple(params)
+
+
+def next_result_set(cursor: Any, row_format: str, advance: bool = True) -> Optional[List[Any]]:
+    """
+    Moves to the next result set that has rows (skipping row counts of INSERT/UPDATE statements) and fetches it.
+
+    Args:
+        cursor (Any): A cursor on which a statement has been executed.
+        row_format (str): Row format of the returned rows.
+        advance (bool): Call nextset() first. False reads the current result set, right after execute().
+
+    Returns:
+        Optional[List[Any]]: The rows of the result set, or None when there are no more result sets.
+    """
+    if advance and not cursor.nextset():
+        return None
+    while not cursor.description:
+        if not cursor.nextset():
+            return None
+    columns = [col[0] for col in cursor.description]
+    return convert_rows(columns, cursor.fetchall(), row_format)
+
+
+def iter_result_sets(cursor: Any, row_format: str) -> Iterator[List[Any]]:
+    """Yields every result set of the executed statement(s) in turn, each as a list of rows."""
+    rows = next_result_set(cursor, row_format, advance=False)
+    while rows is not None:
+        yield rows
+        rows = next_result_set(cursor, row_format)
+
+
+def run_result_sets(
+    conn: Any,
+    query: str,
+    params: Optional[Sequence[Any]] = None,
+    row_format: str = "dict",
+    commit: bool = True,
+    rollback: bool = True,
+    input_sizes: Optional[Sequence[Any]] = None,
+    cancellation: Optional[Any] = None,
+    converters: Optional[TypeConverters] = None,
+) -> List[List[Any]]:
+    """
+    Executes a statement or batch on conn and returns all of its result sets, as a single blocking unit.
+
+    The batch may write, so it is committed once every result set has been read (unless commit is False), and
+    rolled back after an error (unless rollback is False). cancellation and converters work as in run_statement().
+    """
+    cursor = conn.cursor()
+    replaced = None
+    try:
+        if converters:
+            replaced = install_converters(conn, converters)
+        if cancellation is not None:
+            cancellation.attach(cursor)
+        execute_statement(cursor, query, params, input_sizes)
+        result = list(iter_result_sets(cursor, row_format))
+        if commit:
+            conn.commit()
+        return result
+    except pyodbc.Error:
+        if rollback:
+            try:
+                conn.rollback()
+            except pyodbc.Error:
+                pass
+        raise
+    finally:
+        cursor.close()
+        if replaced is not None:
+            restore_converters(conn, replaced)
+
+
+def chunks(rows: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    """Splits an iterable into lists of at most size items without materialising the whole iterable."""
+    if size < 1:
+        raise ValueError("chunk_size must be at least 1")
+    iterator = iter(rows)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def execute_many_chunked(
+    conn: Any,
+    query: str,
+    rows: Iterable[Sequence[Any]],
+    chunk_size: int,
+    commit_per_chunk: bool,
+    fast_executemany: bool,
+    autocommit: bool = True,
+    cancellation: Optional[Any] = None,
+) -> int:
+    """
+    Runs query once per row with executemany, chunk by chunk, and commits. Returns the number of rows sent.
+
+    With commit_per_chunk each chunk is committed as soon as it has been sent, otherwise everything is committed
+    once at the end. On failure whatever has not been committed yet is rolled back. Without autocommit (inside
+    a transaction) committing and rolling back are left to the caller. cancellation works as in run_statement()
+    and stops the load at whichever chunk is running.
+    """
+    cursor = conn.cursor()
+    try:
+        if cancellation is not None:
+            cancellation.attach(cursor)
+        # fast_executemany binds each chunk as a parameter array and sends it in one round trip.
+        cursor.fast_executemany = fast_executemany
+        total = 0
+        for chunk in chunks(rows, chunk_size):
+            cursor.executemany(query, chunk)
+            total += len(chunk)
+            if autocommit and commit_per_chunk:
+                conn.commit()
+        if autocommit and not commit_per_chunk:
+            conn.commit()
+        return total
+    except BaseException:
+        if autocommit:
+            conn.rollback()
+        raise
+    finally:
+        cursor.close()
+
+
+def execution_error(e: pyodbc.Error, kind: str, name: str, params: Sequence[Any]) -> Exception:
+    """
+    Translates a driver error into the exception the connectors raise for it.
+
+    Programming errors (bad SQL, unknown objects, invalid parameters) become ValueError, everything else is
+    re-raised as pyodbc.Error with a message naming the statement that failed.
+
+    Args:
+        e (pyodbc.Error): The error raised by the driver.
+        kind (str): One of "query", "procedure" or "tvf".
+        name (str): The query text, procedure name or TVF name.
+        params (Sequence[Any]): The parameters the statement was executed with.
+    """
+    if kind == "query":
+        if isinstance(e, pyodbc.ProgrammingError):
+            return ValueError(f"Query execution failed: {name}. Error: {str(e)}")
+        return pyodbc.Error(f"Database error occurred: {str(e)}")
+    if kind == "procedure":
+        if isinstance(e, pyodbc.ProgrammingError):
+            return ValueError(
+                f"Stored procedure execution failed: '{name}' with parameters {params}. Error: {str(e)}"
+            )
+        return pyodbc.Error(
+            f"Database error while executing stored procedure: '{name}' with parameters {params}. Error: {str(e)}"
+        )
+    if isinstance(e, pyodbc.ProgrammingError):
+        return ValueError(f"TVF execution failed: '{name}' with parameters {params}. Error: {str(e)}")
+    return pyodbc.Error(f"Database error while executing TVF: '{name}' with parameters {params}. Error: {str(e)}")
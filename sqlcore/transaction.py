@@ -0,0 +1,220 @@
+import asyncio
+import re
+from contextvars import ContextVar, Token
+from typing import Any, List, Optional
+
+_SAVEPOINT_NAME = re.compile(r"^[A-Za-z_][A-Za-z0-9_]{0,31}$")
+
+# SAVE TRANSACTION needs an open transaction. In manual-commit mode the driver runs with IMPLICIT_TRANSACTIONS ON,
+# where BEGIN TRANSACTION at @@TRANCOUNT = 0 opens two nested transactions, so committing one leaves exactly
+# the implicit transaction open for the savepoint to live in.
+_SAVEPOINT_SQL = "IF @@TRANCOUNT = 0 BEGIN BEGIN TRANSACTION; COMMIT TRANSACTION; END; SAVE TRANSACTION {name}"
+_ROLLBACK_TO_SQL = "ROLLBACK TRANSACTION {name}"
+
+
+def _check_savepoint_name(name: str) -> str:
+    if not _SAVEPOINT_NAME.match(name):
+        raise ValueError(f"Invalid savepoint name '{name}': use up to 32 letters, digits and underscores")
+    return name
+
+
+class _TransactionBase:
+    """State shared by Transaction and AsyncTransaction."""
+
+    def __init__(self, connector: Any, active: ContextVar, atomic: bool) -> None:
+        self.connector = connector
+        self.atomic = atomic
+        self.conn: Any = None
+        self._active = active
+        self._parent: Optional["_TransactionBase"] = None
+        self._token: Optional[Token] = None
+        self._savepoint: Optional[str] = None
+        self._savepoints = 0
+        # Set on the outermost scope when finishing a scope failed, so that its connection is discarded.
+        self._broken = False
+
+    @property
+    def deferred(self) -> bool:
+        """Whether statements run in this scope leave committing to an enclosing transaction."""
+        return self.atomic or (self._parent is not None and self._parent.deferred)
+
+    def _enter(self) -> bool:
+        """Links this scope to the enclosing one, if any. Returns True if a connection must be checked out."""
+        if self._token is not None:
+            raise RuntimeError("A transaction or session cannot be entered twice")
+        self._parent = self._active.get()
+        if self._parent is not None:
+            self.conn = self._parent.conn
+        return self._parent is None
+
+    def _root(self) -> "_TransactionBase":
+        root = self
+        while root._parent is not None:
+            root = root._parent
+        return root
+
+    def _next_savepoint_name(self) -> str:
+        root = self._root()
+        root._savepoints += 1
+        return f"sqlcore_sp_{root._savepoints}"
+
+    def _finish_failed(self) -> None:
+        """Called when committing or rolling back on exit raised: the connection's state is unknown, so discard it."""
+        self._root()._broken = True
+
+
+class Transaction(_TransactionBase):
+    """
+    Pins one pooled connection to the current thread or context so that every connector call made inside the
+    block runs on it.
+
+    As a transaction (atomic=True) nothing is committed or rolled back per statement: the whole block is committed
+    once on a clean exit and rolled back if it raises. A transaction nested inside another one becomes a savepoint,
+    so only the inner block is undone when it raises. As a session (atomic=False) statements keep their usual
+    per-statement commits, but share the connection and skip the per-read rollback.
+
+    Created through DatabaseConnector.transaction() and DatabaseConnector.session().
+    """
+
+    def __enter__(self) -> "Transaction":
+        if self._enter():
+            self.conn = self.connector.get_connection()
+        self._token = self._active.set(self)
+        try:
+            if self.atomic and self._parent is not None and self._parent.deferred:
+                self._savepoint = self.savepoint(self._next_savepoint_name())
+        except BaseException:
+            self._leave()
+            raise
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        try:
+            if self._savepoint is not None:
+                if exc_type is not None:
+                    self.rollback_to(self._savepoint)
+            elif self._parent is None or (self.atomic and not self._parent.deferred):
+                if self.atomic and exc_type is None:
+                    self.conn.commit()
+                else:
+                    self.conn.rollback()
+        except Exception as error:
+            self._finish_failed()
+            raise error from exc
+        finally:
+            self._leave()
+
+    def commit(self) -> None:
+        """Commits the work done so far without leaving the block."""
+        self.conn.commit()
+
+    def rollback(self) -> None:
+        """Rolls back the work done so far without leaving the block."""
+        self.conn.rollback()
+
+    def savepoint(self, name: Optional[str] = None) -> str:
+        """
+        Creates a savepoint that rollback_to() can later return to.
+
+        Args:
+            name (Optional[str]): Savepoint name. Generated if omitted.
+
+        Returns:
+            str: The savepoint name.
+        """
+        name = _check_savepoint_name(name or self._next_savepoint_name())
+        self.conn.execute(_SAVEPOINT_SQL.format(name=name))
+        return name
+
+    def rollback_to(self, name: str) -> None:
+        """Undoes everything done since the given savepoint, keeping the transaction open."""
+        self.conn.execute(_ROLLBACK_TO_SQL.format(name=_check_savepoint_name(name)))
+
+    def _leave(self) -> None:
+        self._active.reset(self._token)
+        if self._parent is None:
+            if self._broken:
+                self.connector.discard_connection(self.conn)
+            else:
+                self.connector.release_connection(self.conn)
+
+
+class AsyncTransaction(_TransactionBase):
+    """
+    The asyncio version of Transaction, used with `async with`.
+
+    The connection is pinned to the current task. Do not run statements concurrently (e.g. with asyncio.gather)
+    inside one transaction: they would share a single connection.
+
+    Created through AsyncDatabaseConnector.transaction() and AsyncDatabaseConnector.session().
+    """
+
+    def __init__(self, connector: Any, active: ContextVar, atomic: bool) -> None:
+        super().__init__(connector, active, atomic)
+        self._held: List[asyncio.Future] = []
+
+    async def __aenter__(self) -> "AsyncTransaction":
+        if self._enter():
+            self.conn = await self.connector.get_connection()
+        self._token = self._active.set(self)
+        try:
+            if self.atomic and self._parent is not None and self._parent.deferred:
+                self._savepoint = await self.savepoint(self._next_savepoint_name())
+        except BaseException:
+            await self._leave()
+            raise
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        try:
+            await self._settle()
+            if self._savepoint is not None:
+                if exc_type is not None:
+                    await self.rollback_to(self._savepoint)
+            elif self._parent is None or (self.atomic and not self._parent.deferred):
+                if self.atomic and exc_type is None:
+                    await self._run(self.conn.commit)
+                else:
+                    await self._run(self.conn.rollback)
+        except Exception as error:
+            self._finish_failed()
+            raise error from exc
+        finally:
+            await self._leave()
+
+    async def commit(self) -> None:
+        """Commits the work done so far without leaving the block."""
+        await self._run(self.conn.commit)
+
+    async def rollback(self) -> None:
+        """Rolls back the work done so far without leaving the block."""
+        await self._run(self.conn.rollback)
+
+    async def savepoint(self, name: Optional[str] = None) -> str:
+        """Creates a savepoint that rollback_to() can later return to, and returns its name."""
+        name = _check_savepoint_name(name or self._next_savepoint_name())
+        await self._run(self.conn.execute, _SAVEPOINT_SQL.format(name=name))
+        return name
+
+    async def rollback_to(self, name: str) -> None:
+        """Undoes everything done since the given savepoint, keeping the transaction open."""
+        await self._run(self.conn.execute, _ROLLBACK_TO_SQL.format(name=_check_savepoint_name(name)))
+
+    def hold(self, future: asyncio.Future) -> None:
+        """Makes the block wait for future, work running on the pinned connection, before it commits or rolls back."""
+        self._held.append(future)
+
+    async def _settle(self) -> None:
+        held, self._held = self._held, []
+        await asyncio.gather(*held, return_exceptions=True)
+
+    async def _leave(self) -> None:
+        self._active.reset(self._token)
+        if self._parent is None:
+            if self._broken:
+                await self.connector.discard_connection(self.conn)
+            else:
+                await self.connector.release_connection(self.conn)
+
+    async def _run(self, func: Any, *args: Any) -> Any:
+        return await self.connector.run_blocking(func, *args)
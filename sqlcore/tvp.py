@@ -0,0 +1,52 @@
+from typing import Any, Iterable, List, Mapping, Optional, Sequence, Union
+
+
+def _plain(value: Any) -> Any:
+    # numpy scalars (e.g. from columnar results) are not bindable by the driver; unwrap them to Python values.
+    return value.item() if hasattr(value, "item") and hasattr(value, "dtype") else value
+
+
+def table_valued_parameter(
+    rows: Optional[Iterable[Sequence[Any]]] = None,
+    columns: Optional[Union[Mapping[str, Sequence[Any]], Sequence[Sequence[Any]]]] = None,
+    type_name: Optional[str] = None,
+    schema: Optional[str] = None,
+) -> List[Any]:
+    """
+    Builds a value that pyodbc binds as a table-valued parameter (TVP) of a stored procedure.
+
+    Pass either row-wise data or columnar data (e.g. the result of execute_query_columnar). The whole set is sent
+    to the server in a single round trip, which makes set-based loads much cheaper than one call per row.
+
+    Example:
+        rows = table_valued_parameter([(1, "Alice"), (2, "Bob")], type_name="UserTableType")
+        db.execute_stored_procedure("sp_import_users", rows)
+
+    Args:
+        rows (Optional[Iterable[Sequence[Any]]]): The rows of the table, each a sequence of column values.
+        columns (Optional[Union[Mapping, Sequence]]): Columnar data instead of rows, either a mapping of column name to
+            values or a sequence of column value sequences, in the column order of the table type.
+        type_name (Optional[str]): The user-defined table type. Needed when the driver cannot infer it.
+        schema (Optional[str]): The schema of the table type.
+
+    Returns:
+        List[Any]: The parameter value to pass to execute_stored_procedure and friends.
+
+    Raises:
+        ValueError: If both or neither of rows and columns are given.
+    """
+    if (rows is None) == (columns is None):
+        raise ValueError("Pass exactly one of rows or columns to build a table-valued parameter")
+    if columns is not None:
+        if isinstance(columns, Mapping):
+            columns = list(columns.values())
+        columns = [values.tolist() if hasattr(values, "tolist") else values for values in columns]
+        rows = zip(*columns)
+
+    value: List[Any] = [tuple(_plain(item) for item in row) for row in rows]
+    if type_name is not None:
+        # pyodbc reads the type name and schema from leading string items of the TVP sequence.
+        value[:0] = [type_name, schema] if schema is not None else [type_name]
+    elif schema is not None:
+        raise ValueError("schema requires type_name")
+    return value
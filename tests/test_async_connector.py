@@ -1,7 +1,17 @@
+import asyncio
+import uuid
 import pytest
 import pytest_asyncio
 import pyodbc
 from sqlcore.async_connector import AsyncDatabaseConnector
+from sqlcore.batch import QuerySpec
+from sqlcore.cache import QueryCache
+from sqlcore.converters import TypeConverters
+from sqlcore.hooks import QueryHooks
+from sqlcore.pool import PoolLane
+from sqlcore.retry import RetryPolicy
+from sqlcore.routines import RoutineCatalog
+from sqlcore.routing import AsyncRoutingDatabaseConnector
 
 # Use the same connection string as your other tests.
 TEST_CONN_STRING = (
@@ -67,4 +77,229 @@ async def test_async_execute_tvf_and_fetch_results_fn_trigger_error(async_db_con
     # The TVF fn_trigger_error is defined to trigger a runtime error (e.g. division by zero)
     # and should raise a pyodbc.Error with a matching message.
     with pytest.raises(pyodbc.Error, match="Database error while executing TVF"):
-        await async_db_connector.async_execute_tvf_and_fetch_results("fn_trigger_error")
\ No newline at end of file
+        await async_db_connector.async_execute_tvf_and_fetch_results("fn_trigger_error")
+
+@pytest.mark.asyncio
+async def test_async_get_connection_times_out_when_pool_exhausted():
+    connector = AsyncDatabaseConnector(conn_string=TEST_CONN_STRING, pool_limit=1)
+    try:
+        conn = await connector.get_connection()
+        with pytest.raises(TimeoutError):
+            await connector.get_connection(timeout=0.1)
+        assert connector.pool_stats()["timeouts"] == 1
+        await connector.release_connection(conn)
+    finally:
+        await connector.close()
+
+@pytest.mark.asyncio
+async def test_async_pool_saturation_queues_instead_of_blocking():
+    connector = AsyncDatabaseConnector(conn_string=TEST_CONN_STRING, pool_limit=1)
+    try:
+        # More concurrent queries than pooled connections should queue up and all complete.
+        results = await asyncio.gather(
+            *(connector.async_execute_query("SELECT name FROM users WHERE id = ?", (1,)) for _ in range(5))
+        )
+        assert all(result[0]["name"] == "Alice" for result in results)
+        stats = connector.pool_stats()
+        assert stats["waiters"] == 0
+        assert stats["idle"] == 1
+    finally:
+        await connector.close()
+
+@pytest.mark.asyncio
+async def test_async_connection_context_manager_releases(async_db_connector):
+    async with async_db_connector.connection() as conn:
+        assert async_db_connector.pool_stats()["in_use"] == 1
+        assert conn is not None
+    assert async_db_connector.pool_stats()["in_use"] == 0
+
+@pytest.mark.asyncio
+async def test_async_stream_stored_procedure(async_db_connector):
+    names = [row["name"] async for row in async_db_connector.async_stream_stored_procedure("sp_get_users", batch_size=1)]
+    assert names == ["Alice", "Bob"]
+    assert async_db_connector.pool_stats()["in_use"] == 0
+
+@pytest.mark.asyncio
+async def test_async_concurrent_cache_misses_share_one_query():
+    connector = AsyncDatabaseConnector(conn_string=TEST_CONN_STRING, pool_limit=2, cache=QueryCache())
+    try:
+        results = await asyncio.gather(
+            *(connector.async_execute_query("SELECT * FROM users", cache_ttl=60) for _ in range(20))
+        )
+        assert all(result == results[0] for result in results)
+        assert connector.pool_stats()["acquired"] == 1
+        await connector.async_execute_query("SELECT * FROM users", cache_ttl=60)
+        assert connector.cache_stats()["hits"] == 1
+    finally:
+        await connector.close()
+
+@pytest.mark.asyncio
+async def test_async_coalesces_identical_concurrent_reads():
+    connector = AsyncDatabaseConnector(conn_string=TEST_CONN_STRING, pool_limit=2)
+    try:
+        calls = [connector.async_execute_and_return_stored_procedure("sp_get_users", coalesce=True) for _ in range(20)]
+        results = await asyncio.gather(*calls)
+        assert all(len(result) == 2 for result in results)
+        assert connector.pool_stats()["acquired"] == 1
+        assert connector.coalesce_stats()["joined"] == 19
+    finally:
+        await connector.close()
+
+@pytest.mark.asyncio
+async def test_async_execute_batch_as_completed(async_db_connector):
+    specs = [QuerySpec.tvf("fn_get_users") for _ in range(5)] + [QuerySpec.tvf("fn_trigger_error")]
+    results = [result async for result in async_db_connector.async_execute_batch_as_completed(specs)]
+    assert sorted(result.index for result in results) == list(range(6))
+    assert sum(not result.ok for result in results) == 1
+    assert async_db_connector.pool_stats()["in_use"] == 0
+
+@pytest.mark.asyncio
+async def test_async_batch_in_transaction_runs_before_the_transaction_ends(async_db_connector):
+    """A batch started in a transaction sees its uncommitted writes, even when iterated after the block."""
+    async with async_db_connector.transaction():
+        await async_db_connector.async_execute_query("CREATE TABLE #batch_seen (id INT)")
+        await async_db_connector.async_execute_query("INSERT INTO #batch_seen VALUES (1)")
+        results = async_db_connector.async_execute_batch_as_completed(
+            [QuerySpec.query("SELECT COUNT(*) AS n FROM #batch_seen")]
+        )
+    assert (await results.__anext__()).result() == [{"n": 1}]
+    assert async_db_connector.pool_stats()["in_use"] == 0
+
+@pytest.mark.asyncio
+async def test_async_stored_procedure_result_sets(async_db_connector):
+    users, counts = await async_db_connector.async_execute_and_return_stored_procedure_sets("sp_get_user_summary")
+    assert len(users) == 2
+    assert counts[0]["user_count"] == 2
+    streamed = [rows async for rows in async_db_connector.async_stream_stored_procedure_sets("sp_get_user_summary")]
+    assert streamed == [users, counts]
+
+@pytest.mark.asyncio
+async def test_async_paginate_query(async_db_connector):
+    pages = [page async for page in async_db_connector.async_paginate_query("users", "id", page_size=1)]
+    assert [page[0]["name"] for page in pages] == ["Alice", "Bob"]
+
+@pytest.mark.asyncio
+async def test_async_cancelled_task_cancels_statement_and_frees_connection(async_db_connector):
+    task = asyncio.ensure_future(async_db_connector.async_execute_query("WAITFOR DELAY '00:00:05'; SELECT 1 AS x"))
+    await asyncio.sleep(0.5)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    assert async_db_connector.pool_stats()["in_use"] == 0
+    with pytest.raises(TimeoutError):
+        await async_db_connector.async_execute_query("WAITFOR DELAY '00:00:05'; SELECT 1 AS x", timeout=0.5)
+    assert await async_db_connector.async_execute_query("SELECT 1 AS x") == [{"x": 1}]
+
+@pytest.mark.asyncio
+async def test_async_export_query_csv(async_db_connector, tmp_path):
+    path = tmp_path / "users.csv"
+    stats = await async_db_connector.async_export_query("SELECT name FROM users ORDER BY id", None, str(path))
+    assert stats["rows"] == 2
+    assert path.read_text().splitlines() == ["name", "Alice", "Bob"]
+
+@pytest.mark.asyncio
+async def test_async_routine_catalog_validates_arguments():
+    connector = AsyncDatabaseConnector(conn_string=TEST_CONN_STRING, pool_limit=2, routines=RoutineCatalog())
+    try:
+        result = await connector.async_execute_and_return_stored_procedure("sp_get_users_by_age", 26)
+        assert [row["name"] for row in result] == ["Bob"]
+        with pytest.raises(ValueError, match="expects int"):
+            await connector.async_execute_and_return_stored_procedure("sp_get_users_by_age", b"\x01")
+    finally:
+        await connector.close()
+
+@pytest.mark.asyncio
+async def test_async_hooks_report_stream_fetches():
+    class Recorder(QueryHooks):
+        def __init__(self):
+            self.events = []
+
+        def on_execute_start(self, event):
+            self.events.append("start")
+
+        def on_fetch(self, event, rows):
+            self.events.append(("fetch", rows))
+
+        def on_execute_end(self, event):
+            self.events.append(("end", event.rows, event.error is None))
+
+    recorder = Recorder()
+    connector = AsyncDatabaseConnector(conn_string=TEST_CONN_STRING, pool_limit=1, hooks=[recorder])
+    try:
+        rows = [row async for row in connector.async_stream_query("SELECT * FROM users ORDER BY id", batch_size=1)]
+        assert len(rows) == 2
+        assert recorder.events == ["start", ("fetch", 1), ("fetch", 1), ("end", 2, True)]
+    finally:
+        await connector.close()
+
+@pytest.mark.asyncio
+async def test_async_output_converters_per_call():
+    connector = AsyncDatabaseConnector(conn_string=TEST_CONN_STRING, pool_limit=1)
+    try:
+        query = "SELECT CAST(1.5 AS DECIMAL(4, 1)) AS amount, NEWID() AS guid"
+        row = (await connector.async_execute_query(query, converters=TypeConverters.fast()))[0]
+        assert row["amount"] == 1.5 and isinstance(row["amount"], float)
+        assert isinstance(row["guid"], uuid.UUID)
+        row = (await connector.async_execute_query(query))[0]
+        assert isinstance(row["guid"], str)
+    finally:
+        await connector.close()
+
+@pytest.mark.asyncio
+async def test_async_pool_lanes_serve_higher_priority_waiters_first():
+    connector = AsyncDatabaseConnector(
+        conn_string=TEST_CONN_STRING,
+        pool_limit=1,
+        lanes={"interactive": PoolLane(priority=1), "batch": PoolLane()},
+    )
+    try:
+        order = []
+
+        async def query(lane):
+            await connector.async_execute_query("SELECT * FROM users", lane=lane)
+            order.append(lane)
+
+        async with connector.connection():
+            tasks = [asyncio.create_task(query("batch"))]
+            await asyncio.sleep(0.05)
+            tasks.append(asyncio.create_task(query("interactive")))
+            await asyncio.sleep(0.05)
+        await asyncio.gather(*tasks)
+        assert order == ["interactive", "batch"]
+        assert connector.pool_stats()["lanes"]["batch"]["waited"] == 1
+    finally:
+        await connector.close()
+
+@pytest.mark.asyncio
+async def test_async_routing_balances_concurrent_reads():
+    connector = AsyncRoutingDatabaseConnector(TEST_CONN_STRING, [TEST_CONN_STRING, TEST_CONN_STRING], pool_limit=2)
+    try:
+        results = await asyncio.gather(*(connector.async_execute_query("SELECT * FROM users") for _ in range(6)))
+        assert all(len(rows) == 2 for rows in results)
+        await connector.async_execute_stored_procedure("sp_get_users")
+        stats = connector.routing_stats()
+        assert stats["replica_0"]["requests"] + stats["replica_1"]["requests"] == 6
+        assert stats["replica_0"]["requests"] and stats["replica_1"]["requests"]
+        assert stats["primary"]["requests"] == 1
+    finally:
+        await connector.close()
+
+@pytest.mark.asyncio
+async def test_async_retry_policy_reruns_marked_calls_only():
+    policy = RetryPolicy(max_attempts=2, base_delay=0.01, native_errors={50001})
+    connector = AsyncDatabaseConnector(conn_string=TEST_CONN_STRING, pool_limit=1, retry_policy=policy)
+    try:
+        await connector.async_execute_query(
+            "DROP SEQUENCE IF EXISTS async_retry_attempts; CREATE SEQUENCE async_retry_attempts START WITH 1"
+        )
+        flaky = (
+            "DECLARE @attempt BIGINT = NEXT VALUE FOR async_retry_attempts; "
+            "IF @attempt % 2 = 1 THROW 50001, 'transient failure', 1; "
+            "SELECT @attempt AS attempt"
+        )
+        assert await connector.async_execute_query(flaky, retry=True) == [{"attempt": 2}]
+        with pytest.raises((ValueError, pyodbc.Error), match="transient failure"):
+            await connector.async_execute_query(flaky)
+        assert connector.retry_stats()["retries"] == 1
+    finally:
+        await connector.close()
@@ -0,0 +1,51 @@
+import pytest
+from sqlcore import table_valued_parameter
+from sqlcore.connector import DatabaseConnector
+
+TEST_CONN_STRING = (
+    "DRIVER={ODBC Driver 17 for SQL Server};"
+    "SERVER=localhost,1433;"
+    "DATABASE=testdb;"
+    "UID=sa;"
+    "PWD=YourStrong@Password"
+)
+
+@pytest.fixture(scope="module")
+def db_connector():
+    """Fixture to initialize and clean up the DatabaseConnector."""
+    connector = DatabaseConnector(conn_string=TEST_CONN_STRING, pool_limit=3)
+    yield connector
+    connector.close()
+
+@pytest.fixture(autouse=True)
+def empty_bulk_items(db_connector):
+    """Start and finish every test with an empty bulk_items table."""
+    db_connector.execute_query("DELETE FROM bulk_items")
+    yield
+    db_connector.execute_query("DELETE FROM bulk_items")
+
+@pytest.mark.parametrize("commit_per_chunk", [False, True])
+def test_execute_many_inserts_all_rows(db_connector, commit_per_chunk):
+    """Test that execute_many sends every row, chunk by chunk."""
+    rows = ((i, f"item {i}") for i in range(250))
+    sent = db_connector.execute_many(
+        "INSERT INTO bulk_items (id, label) VALUES (?, ?)", rows, chunk_size=100, commit_per_chunk=commit_per_chunk
+    )
+    assert sent == 250
+    result = db_connector.execute_query("SELECT COUNT(*) AS n FROM bulk_items")
+    assert result[0]["n"] == 250
+
+def test_execute_many_rolls_back_on_error(db_connector):
+    """Test that a failing chunk leaves nothing behind when committing once."""
+    rows = [(1, "ok"), ("not a number", "bad")]
+    with pytest.raises(Exception):
+        db_connector.execute_many("INSERT INTO bulk_items (id, label) VALUES (?, ?)", rows, fast_executemany=False)
+    result = db_connector.execute_query("SELECT COUNT(*) AS n FROM bulk_items")
+    assert result[0]["n"] == 0
+
+def test_stored_procedure_with_table_valued_parameter(db_connector):
+    """Test passing a whole table to a stored procedure in one call."""
+    items = table_valued_parameter(columns={"id": [1, 2, 3], "label": ["a", "b", "c"]}, type_name="ItemTableType")
+    db_connector.execute_stored_procedure("sp_insert_items", items)
+    result = db_connector.execute_query("SELECT id, label FROM bulk_items ORDER BY id")
+    assert [row["label"] for row in result] == ["a", "b", "c"]
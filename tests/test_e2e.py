@@ -1,5 +1,19 @@
+import datetime
+import decimal
+import time
+import uuid
+
+import pyodbc
 import pytest
+from sqlcore.batch import QuerySpec
+from sqlcore.cache import QueryCache
 from sqlcore.connector import DatabaseConnector
+from sqlcore.converters import SQL_DECIMAL, TypeConverters
+from sqlcore.metrics import MetricsCollector
+from sqlcore.pool import PoolLane
+from sqlcore.retry import RetryPolicy
+from sqlcore.routines import RoutineCatalog
+from sqlcore.routing import RoutingDatabaseConnector
 
 TEST_CONN_STRING = (
     "DRIVER={ODBC Driver 17 for SQL Server};"
@@ -33,4 +47,356 @@ def test_e2e_table_valued_function(db_connector):
     """E2E test for executing a table-valued function."""
     result = db_connector.execute_tvf_and_fetch_results("fn_get_users")
     assert len(result) == 2
-    assert result[0]["age"] == 25
\ No newline at end of file
+    assert result[0]["age"] == 25
+
+def test_e2e_pool_opens_min_size_and_grows_on_demand():
+    """The pool starts with min_size connections and opens more up to pool_limit when needed."""
+    connector = DatabaseConnector(conn_string=TEST_CONN_STRING, pool_limit=3, min_size=1)
+    try:
+        assert connector.pool_stats()["size"] == 1
+        conns = [connector.get_connection() for _ in range(3)]
+        assert connector.pool_stats()["size"] == 3
+        with pytest.raises(TimeoutError):
+            connector.get_connection(timeout=0.1)
+        for conn in conns:
+            connector.release_connection(conn)
+    finally:
+        connector.close()
+
+
+def test_e2e_pool_evicts_dead_connections():
+    """A connection that died while idle is replaced instead of being handed out."""
+    connector = DatabaseConnector(conn_string=TEST_CONN_STRING, pool_limit=1, health_check_interval=0)
+    try:
+        conn = connector.get_connection()
+        conn.close()
+        connector.release_connection(conn)
+        result = connector.execute_query("SELECT name FROM users WHERE id = ?", (1,))
+        assert result[0]["name"] == "Alice"
+        assert connector.pool_stats()["evicted"] == 1
+    finally:
+        connector.close()
+
+
+def test_e2e_stream_query(db_connector):
+    """Streaming returns the same rows as execute_query, fetched in batches."""
+    rows = list(db_connector.stream_query("SELECT * FROM users ORDER BY id", batch_size=1))
+    assert [row["name"] for row in rows] == ["Alice", "Bob"]
+
+
+def test_e2e_stream_releases_connection_on_early_exit(db_connector):
+    """Breaking out of a stream returns its connection to the pool."""
+    stream = db_connector.stream_tvf_results("fn_get_all_users", batch_size=1)
+    assert next(stream)["name"] == "Alice"
+    stream.close()
+    assert db_connector.pool_stats()["in_use"] == 0
+
+
+def test_e2e_execute_query_columnar(db_connector):
+    """Columnar fetch returns one typed array per column."""
+    np = pytest.importorskip("numpy")
+    result = db_connector.execute_query_columnar("SELECT id, name, age FROM users ORDER BY id", batch_size=1)
+    assert list(result) == ["id", "name", "age"]
+    assert result["age"].dtype == np.int64
+    assert result["age"].tolist() == [25, 30]
+    assert result["name"].tolist() == ["Alice", "Bob"]
+    assert not result["name"].mask.any()
+
+def test_e2e_cached_query_hits_and_invalidates():
+    """Repeated reads with cache_ttl are served from the cache until their tag is invalidated."""
+    cache = QueryCache(max_entries=10)
+    connector = DatabaseConnector(conn_string=TEST_CONN_STRING, pool_limit=1, cache=cache)
+    try:
+        first = connector.execute_tvf_and_fetch_results("fn_get_users", cache_ttl=60, cache_tags=("users",))
+        first[0]["name"] = "changed"
+        second = connector.execute_tvf_and_fetch_results("fn_get_users", cache_ttl=60, cache_tags=("users",))
+        assert second[0]["name"] == "Alice"
+        assert connector.cache_stats()["hits"] == 1
+        assert connector.cache_stats()["misses"] == 1
+
+        assert cache.invalidate("users") == 1
+        connector.execute_tvf_and_fetch_results("fn_get_users", cache_ttl=60, cache_tags=("users",))
+        assert connector.cache_stats()["misses"] == 2
+    finally:
+        connector.close()
+
+def test_e2e_execute_batch_returns_ordered_results_and_errors(db_connector):
+    """A batch returns one result per spec, in order, with failures reported per item."""
+    specs = [
+        QuerySpec.query("SELECT * FROM users WHERE age > ?", (26,)),
+        QuerySpec.procedure("sp_get_users"),
+        QuerySpec.tvf("fn_trigger_error"),
+        QuerySpec.tvf("fn_get_users", row_format="tuple"),
+    ]
+    results = db_connector.execute_batch(specs, max_concurrency=2)
+    assert [result.index for result in results] == [0, 1, 2, 3]
+    assert results[0].rows[0]["name"] == "Bob"
+    assert len(results[1].rows) == 2
+    assert not results[2].ok
+    with pytest.raises(pyodbc.Error, match="Database error while executing TVF"):
+        results[2].result()
+    assert results[3].rows[0][1] == "Alice"
+    assert db_connector.pool_stats()["in_use"] == 0
+
+def test_e2e_batch_in_transaction_runs_before_the_transaction_ends(db_connector):
+    """A batch started in a transaction sees its uncommitted writes, even when iterated after the block."""
+    with db_connector.transaction():
+        db_connector.execute_query("CREATE TABLE #batch_seen (id INT)")
+        db_connector.execute_query("INSERT INTO #batch_seen VALUES (1)")
+        results = db_connector.execute_batch_as_completed([QuerySpec.query("SELECT COUNT(*) AS n FROM #batch_seen")])
+    assert next(results).result() == [{"n": 1}]
+
+def test_e2e_stored_procedure_returns_every_result_set(db_connector):
+    """All result sets of a procedure are returned, in order."""
+    users, counts = db_connector.execute_and_return_stored_procedure_sets("sp_get_user_summary")
+    assert [row["name"] for row in users] == ["Alice", "Bob"]
+    assert counts == [{"user_count": 2}]
+
+def test_e2e_execute_statements_in_one_batch(db_connector):
+    """Several parameterized statements run as one batch and each SELECT yields a result set."""
+    result_sets = db_connector.execute_statements([
+        ("SELECT name FROM users WHERE id = ?", (1,)),
+        ("SELECT name FROM users WHERE id = ?", (2,)),
+    ])
+    assert result_sets == [[{"name": "Alice"}], [{"name": "Bob"}]]
+
+def test_e2e_stream_query_sets(db_connector):
+    """Result sets can be streamed one at a time."""
+    sets = list(db_connector.stream_query_sets("SELECT 1 AS a; SELECT 2 AS b", row_format="tuple"))
+    assert sets == [[(1,)], [(2,)]]
+    assert db_connector.pool_stats()["in_use"] == 0
+
+def test_e2e_extract_partitioned(db_connector):
+    """Every row is read exactly once across the partitions."""
+    batches = list(db_connector.extract_partitioned("users", "id", partitions=2, workers=2, batch_size=1))
+    assert sorted(row["name"] for _, rows in batches for row in rows) == ["Alice", "Bob"]
+    assert {index for index, _ in batches} == {0, 1}
+
+def test_e2e_extract_partitioned_to_files(db_connector, tmp_path):
+    """Each partition is written to its own CSV file."""
+    summaries = db_connector.extract_partitioned_to_files("users", "id", str(tmp_path), ranges=[(None, 2), (2, None)])
+    assert [summary["rows"] for summary in summaries] == [1, 1]
+    assert (tmp_path / "part-00000.csv").read_text().splitlines() == ["id,name,age", "1,Alice,25"]
+
+def test_e2e_paginate_query_releases_connection_between_pages(db_connector):
+    """Keyset pages come back in key order, one query each, without holding a connection in between."""
+    pages = db_connector.paginate_query("users", "id", page_size=1, row_format="tuple")
+    first = next(pages)
+    assert db_connector.pool_stats()["in_use"] == 0
+    assert [page[0][:2] for page in [first, *pages]] == [(1, "Alice"), (2, "Bob")]
+
+    pages = list(db_connector.paginate_query("SELECT * FROM users WHERE age > ?", ["age DESC", "id"], params=(0,)))
+    assert [row["name"] for row in pages[0]] == ["Bob", "Alice"]
+    assert [row["id"] for page in db_connector.paginate_query("users", "id", after=(1,)) for row in page] == [2]
+    with pytest.raises(ValueError, match="Invalid page key"):
+        db_connector.paginate_query("users", "id; DROP TABLE users")
+
+def test_e2e_query_timeout_cancels_statement_and_frees_connection(db_connector):
+    """A statement running past its timeout is cancelled on the server and its connection is not reused."""
+    started = time.monotonic()
+    with pytest.raises(TimeoutError, match="Timed out after 0.5s"):
+        db_connector.execute_query("WAITFOR DELAY '00:00:05'; SELECT 1 AS x", timeout=0.5)
+    assert time.monotonic() - started < 3
+    assert db_connector.pool_stats()["in_use"] == 0
+    assert db_connector.execute_query("SELECT 1 AS x", timeout=5) == [{"x": 1}]
+
+def test_e2e_timeout_covers_bulk_and_export_calls(db_connector, tmp_path):
+    """execute_many and export_query are cancelled at their timeout too, and a cancelled export leaves no file."""
+    with pytest.raises(TimeoutError):
+        db_connector.execute_many("WAITFOR DELAY '00:00:05'; DECLARE @unused INT = ?", [(1,)], timeout=0.5)
+    path = tmp_path / "slow.csv"
+    with pytest.raises(TimeoutError):
+        db_connector.export_query("WAITFOR DELAY '00:00:05'; SELECT 1 AS x", None, str(path), timeout=0.5)
+    assert not path.exists()
+    assert db_connector.pool_stats()["in_use"] == 0
+
+def test_e2e_export_query_csv(db_connector, tmp_path):
+    """A query result is streamed into a CSV file with a header row."""
+    path = tmp_path / "users.csv"
+    stats = db_connector.export_query("SELECT id, name FROM users ORDER BY id", None, str(path), batch_size=1)
+    assert stats["rows"] == 2
+    assert stats["bytes"] == path.stat().st_size
+    assert path.read_text().splitlines() == ["id,name", "1,Alice", "2,Bob"]
+
+def test_e2e_export_query_parquet(db_connector, tmp_path):
+    """Parquet exports keep the column types and honour the row group size."""
+    pq = pytest.importorskip("pyarrow.parquet")
+    path = tmp_path / "users.parquet"
+    stats = db_connector.export_query(
+        "SELECT id, name, age FROM users ORDER BY id", None, str(path), format="parquet", row_group_size=1
+    )
+    assert stats["rows"] == 2
+    parquet_file = pq.ParquetFile(str(path))
+    assert parquet_file.metadata.num_row_groups == 2
+    assert parquet_file.read().to_pylist()[1] == {"id": 2, "name": "Bob", "age": 30}
+
+def test_e2e_routine_catalog_binds_typed_calls():
+    """Procedures are described once and then called through typed templates, with arguments checked locally."""
+    catalog = RoutineCatalog()
+    connector = DatabaseConnector(conn_string=TEST_CONN_STRING, pool_limit=1, routines=catalog)
+    try:
+        signature = connector.describe_routine("sp_get_users_by_age")
+        assert [(p.name, p.type_name, p.length) for p in signature.parameters] == [
+            ("@min_age", "int", None),
+            ("@name_prefix", "nvarchar", 20),
+        ]
+        assert [column[0] for column in signature.columns] == ["id", "name", "age"]
+
+        result = connector.execute_and_return_stored_procedure("sp_get_users_by_age", 26)
+        assert [row["name"] for row in result] == ["Bob"]
+        assert connector.execute_and_return_stored_procedure("sp_get_users_by_age", 20, "Al")[0]["name"] == "Alice"
+        assert catalog.loads == 1
+
+        with pytest.raises(ValueError, match="expected 2 parameters"):
+            connector.execute_and_return_stored_procedure("sp_get_users_by_age", 20, "Al", 1)
+        with pytest.raises(ValueError, match="exceeds nvarchar"):
+            connector.execute_and_return_stored_procedure("sp_get_users_by_age", 20, "x" * 21)
+        with pytest.raises(ValueError, match="does not exist"):
+            connector.execute_stored_procedure("sp_missing")
+
+        assert connector.describe_routine("fn_get_users", kind="tvf").parameters == []
+        assert len(connector.execute_tvf_and_fetch_results("fn_get_users")) == 2
+    finally:
+        connector.close()
+
+def test_e2e_metrics_collector_records_latency_per_fingerprint():
+    """Queries that only differ in literals share a fingerprint; slow calls land in the slow-query log."""
+    metrics = MetricsCollector(slow_query_ms=0)
+    connector = DatabaseConnector(conn_string=TEST_CONN_STRING, pool_limit=1, hooks=[metrics])
+    try:
+        connector.execute_query("SELECT * FROM users WHERE id = 1")
+        connector.execute_query("SELECT * FROM users WHERE id = 2")
+        with pytest.raises(ValueError):
+            connector.execute_query("SELECT * FROM missing_table")
+        snapshot = metrics.snapshot()
+        stats = snapshot["queries"]["SELECT * FROM users WHERE id = ?"]
+        assert stats["count"] == 2
+        assert stats["rows"] == 2
+        assert stats["p99_ms"] > 0
+        assert snapshot["queries"]["SELECT * FROM missing_table"]["errors"] == 1
+        assert snapshot["acquire_wait"]["count"] == 3
+        assert snapshot["connection_hold"]["count"] == 3
+        assert len(metrics.slow_queries()) == 3
+    finally:
+        connector.close()
+
+def test_e2e_metrics_cover_bulk_and_export_calls(tmp_path):
+    """execute_many and export_query are reported to hooks like any other statement."""
+    metrics = MetricsCollector()
+    connector = DatabaseConnector(conn_string=TEST_CONN_STRING, pool_limit=1, hooks=[metrics])
+    try:
+        connector.execute_many("DECLARE @unused INT = ?", [(1,), (2,)])
+        connector.export_query("SELECT id, name FROM users", None, str(tmp_path / "users.csv"))
+        queries = metrics.snapshot()["queries"]
+        assert queries["DECLARE @unused INT = ?"]["count"] == 1
+        assert queries["SELECT id, name FROM users"]["rows"] == 2
+    finally:
+        connector.close()
+
+TYPED_VALUES_QUERY = (
+    "SELECT CAST(12.34 AS DECIMAL(10, 2)) AS amount, "
+    "CAST('6F9619FF-8B86-D011-B42D-00C04FC964FF' AS UNIQUEIDENTIFIER) AS guid, "
+    "CAST('2024-05-06 07:08:09.1234567 -05:30' AS DATETIMEOFFSET) AS stamp"
+)
+
+def test_e2e_shared_cache_is_namespaced_per_connector():
+    """Connectors sharing a cache only share results when they have the same cache_namespace."""
+    cache = QueryCache()
+    first = DatabaseConnector(conn_string=TEST_CONN_STRING, pool_limit=1, cache=cache)
+    other = DatabaseConnector(conn_string=TEST_CONN_STRING, pool_limit=1, cache=cache, cache_namespace="other")
+    try:
+        first.execute_query("SELECT * FROM users", cache_ttl=60)
+        other.execute_query("SELECT * FROM users", cache_ttl=60)
+        assert cache.stats()["misses"] == 2 and cache.stats()["entries"] == 2
+    finally:
+        first.close()
+        other.close()
+
+def test_e2e_output_converters_decode_typed_columns():
+    """The fast converters decode DECIMAL, UNIQUEIDENTIFIER and DATETIMEOFFSET; per-call converters override them."""
+    connector = DatabaseConnector(conn_string=TEST_CONN_STRING, pool_limit=1, converters=TypeConverters.fast())
+    try:
+        row = connector.execute_query(TYPED_VALUES_QUERY)[0]
+        assert row["amount"] == 12.34 and isinstance(row["amount"], float)
+        assert row["guid"] == uuid.UUID("6F9619FF-8B86-D011-B42D-00C04FC964FF")
+        offset = datetime.timezone(-datetime.timedelta(hours=5, minutes=30))
+        assert row["stamp"] == datetime.datetime(2024, 5, 6, 7, 8, 9, 123456, offset)
+
+        row = connector.execute_query(TYPED_VALUES_QUERY, converters=TypeConverters({SQL_DECIMAL: None}))[0]
+        assert row["amount"] == decimal.Decimal("12.34")
+        assert isinstance(connector.execute_query(TYPED_VALUES_QUERY)[0]["amount"], float)
+    finally:
+        connector.close()
+
+def test_e2e_pool_lanes_cap_batch_work_and_reserve_interactive_connections():
+    """A capped batch lane cannot starve the interactive lane, which keeps its reserved connection."""
+    connector = DatabaseConnector(
+        conn_string=TEST_CONN_STRING,
+        pool_limit=3,
+        lanes={"interactive": PoolLane(reserved=1, priority=1), "batch": PoolLane(max_size=2)},
+    )
+    try:
+        with connector.connection(lane="batch"), connector.connection(lane="batch"):
+            with pytest.raises(TimeoutError):
+                with connector.connection(timeout=0.1, lane="batch"):
+                    pass
+            assert len(connector.execute_query("SELECT * FROM users", lane="interactive")) == 2
+            with connector.lane("interactive"):
+                assert len(connector.execute_query("SELECT * FROM users WHERE id = ?", (1,))) == 1
+            lanes = connector.pool_stats()["lanes"]
+            assert lanes["batch"]["in_use"] == 2
+            assert lanes["batch"]["timeouts"] == 1
+            assert lanes["interactive"]["acquired"] == 2
+        with pytest.raises(ValueError, match="lane"):
+            connector.execute_query("SELECT 1", lane="reports")
+    finally:
+        connector.close()
+
+def test_e2e_routing_sends_reads_to_replicas_and_ejects_dead_ones():
+    """Reads are balanced over healthy replicas, writes and procedures go to the primary, dead replicas are ejected."""
+    dead_replica = TEST_CONN_STRING.replace("localhost,1433", "localhost,1")
+    connector = RoutingDatabaseConnector(
+        TEST_CONN_STRING, [TEST_CONN_STRING, dead_replica, TEST_CONN_STRING], pool_limit=2
+    )
+    try:
+        stats = connector.routing_stats()
+        assert stats["replica_1"]["healthy"] is False
+        assert stats["replica_1"]["ejections"] == 1
+
+        for _ in range(4):
+            assert len(connector.execute_query("SELECT * FROM users")) == 2
+        assert len(connector.execute_tvf_and_fetch_results("fn_get_users")) == 2
+        assert len(connector.execute_and_return_stored_procedure("sp_get_users")) == 2
+        connector.execute_query("UPDATE users SET age = age WHERE id = ?", (1,))
+        connector.execute_query("SELECT 1 AS one", route="primary")
+        with connector.session():
+            connector.execute_query("SELECT * FROM users")
+
+        stats = connector.routing_stats()
+        assert stats["replica_0"]["requests"] + stats["replica_2"]["requests"] == 5
+        assert abs(stats["replica_0"]["requests"] - stats["replica_2"]["requests"]) <= 1
+        assert stats["replica_1"]["requests"] == 0
+        assert stats["primary"]["requests"] == 4
+        assert all(endpoint["outstanding"] == 0 for endpoint in stats.values())
+        with pytest.raises(ValueError, match="Invalid route"):
+            connector.execute_query("SELECT 1", route="secondary")
+    finally:
+        connector.close()
+
+def test_e2e_retry_policy_reruns_transient_failures():
+    """A call failing with a transient error is run again; a sequence, which rollbacks do not undo, counts attempts."""
+    policy = RetryPolicy(max_attempts=2, base_delay=0.01, native_errors={50001})
+    connector = DatabaseConnector(conn_string=TEST_CONN_STRING, pool_limit=1, retry_policy=policy)
+    try:
+        connector.execute_query("DROP SEQUENCE IF EXISTS retry_attempts; CREATE SEQUENCE retry_attempts START WITH 1")
+        flaky = (
+            "DECLARE @attempt BIGINT = NEXT VALUE FOR retry_attempts; "
+            "IF @attempt % 2 = 1 THROW 50001, 'transient failure', 1; "
+            "SELECT @attempt AS attempt"
+        )
+        assert connector.execute_query(flaky, retry=True) == [{"attempt": 2}]
+        with pytest.raises((ValueError, pyodbc.Error), match="transient failure"):
+            connector.execute_query(flaky)
+        assert connector.retry_stats() == {"retries": 1, "give_ups": 0, "reasons": {"50001": 1}}
+    finally:
+        connector.close()
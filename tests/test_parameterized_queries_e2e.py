@@ -60,4 +60,23 @@ def test_query_with_between_operator(db_connector, age_min, age_max, expected_co
     """Test executing a query with BETWEEN operator in parameters."""
     query = "SELECT * FROM users WHERE age BETWEEN ? AND ?"
     result = db_connector.execute_query(query, (age_min, age_max))
-    assert len(result) == expected_count
\ No newline at end of file
+    assert len(result) == expected_count
+
+@pytest.mark.parametrize("row_format", ["tuple", "row"])
+def test_query_row_formats(db_connector, row_format):
+    """Test that compact row formats expose the same values as dictionaries."""
+    query = "SELECT id, name FROM users WHERE id = ?"
+    result = db_connector.execute_query(query, (1,), row_format=row_format)
+    assert len(result) == 1
+    assert result[0][1] == "Alice"
+    if row_format == "row":
+        assert result[0]["name"] == "Alice"
+        assert result[0].as_dict() == {"id": 1, "name": "Alice"}
+    else:
+        assert result[0] == (1, "Alice")
+
+
+def test_query_invalid_row_format(db_connector):
+    """Test that an unknown row format is rejected."""
+    with pytest.raises(ValueError, match="Unknown row_format"):
+        db_connector.execute_query("SELECT 1", row_format="xml")
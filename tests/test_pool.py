@@ -0,0 +1,117 @@
+import asyncio
+import threading
+import time
+
+import pytest
+from sqlcore.pool import AsyncConnectionPool, ConnectionPool, PoolLane
+
+
+class StubConnection:
+    """Stands in for a driver connection; the pools only close it."""
+
+    def __init__(self):
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class StubConnect:
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.opened = []
+
+    def __call__(self):
+        time.sleep(self.delay)
+        conn = StubConnection()
+        self.opened.append(conn)
+        return conn
+
+
+def test_close_fails_waiting_threads():
+    pool = ConnectionPool(StubConnect(), min_size=0, max_size=1, health_check_interval=None)
+    held = pool.acquire()
+    errors = []
+
+    def wait():
+        try:
+            pool.acquire(timeout=3)
+        except Exception as e:
+            errors.append(e)
+
+    waiter = threading.Thread(target=wait)
+    waiter.start()
+    time.sleep(0.1)
+    started = time.monotonic()
+    pool.close()
+    waiter.join()
+    assert time.monotonic() - started < 1
+    assert isinstance(errors[0], RuntimeError)
+    pool.release(held)
+    assert held.closed
+    assert pool.stats()["size"] == 0
+
+
+def test_acquire_after_close_raises_without_connecting():
+    connect = StubConnect()
+    pool = ConnectionPool(connect, min_size=1, max_size=2, health_check_interval=None)
+    pool.warm_up()
+    pool.close()
+    with pytest.raises(RuntimeError, match="closed"):
+        pool.acquire(timeout=1)
+    assert len(connect.opened) == 1 and connect.opened[0].closed
+
+
+def test_interactive_waiter_is_served_before_batch_waiters():
+    lanes = {"interactive": PoolLane(priority=1), "batch": PoolLane()}
+    pool = ConnectionPool(StubConnect(), min_size=0, max_size=1, health_check_interval=None, lanes=lanes)
+    held = pool.acquire(lane="batch")
+    order = []
+
+    def wait(lane):
+        conn = pool.acquire(timeout=3, lane=lane)
+        order.append(lane)
+        pool.release(conn)
+
+    waiters = []
+    for lane in ("batch", "batch", "interactive"):
+        waiters.append(threading.Thread(target=wait, args=(lane,)))
+        waiters[-1].start()
+        time.sleep(0.05)
+    pool.release(held)
+    for waiter in waiters:
+        waiter.join()
+    assert order == ["interactive", "batch", "batch"]
+    assert pool.stats()["lanes"]["batch"]["waited"] == 2
+    pool.close()
+
+
+@pytest.mark.asyncio
+async def test_async_close_fails_waiting_coroutines():
+    pool = AsyncConnectionPool(StubConnect(), min_size=0, max_size=1, health_check_interval=None)
+    held = await pool.acquire()
+    waiter = asyncio.ensure_future(pool.acquire(timeout=3))
+    await asyncio.sleep(0.05)
+    await pool.close()
+    with pytest.raises(RuntimeError, match="closed"):
+        await asyncio.wait_for(waiter, 1)
+    with pytest.raises(RuntimeError, match="closed"):
+        await pool.acquire()
+    await pool.release(held)
+    assert held.closed
+    assert pool.stats()["size"] == 0
+
+
+@pytest.mark.asyncio
+async def test_async_connection_opened_after_close_is_closed():
+    connect = StubConnect(delay=0.2)
+    pool = AsyncConnectionPool(connect, min_size=0, max_size=1, health_check_interval=None)
+    task = asyncio.ensure_future(pool.acquire())
+    await asyncio.sleep(0.05)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    await pool.close()
+    await asyncio.sleep(0.3)
+    assert connect.opened[0].closed
+    assert pool.stats()["size"] == 0 and pool.stats()["idle"] == 0
@@ -0,0 +1,64 @@
+import pytest
+from sqlcore.connector import DatabaseConnector
+
+TEST_CONN_STRING = (
+    "DRIVER={ODBC Driver 17 for SQL Server};"
+    "SERVER=localhost,1433;"
+    "DATABASE=testdb;"
+    "UID=sa;"
+    "PWD=YourStrong@Password"
+)
+
+@pytest.fixture(scope="module")
+def db_connector():
+    """Fixture to initialize and clean up the DatabaseConnector."""
+    connector = DatabaseConnector(conn_string=TEST_CONN_STRING, pool_limit=3)
+    yield connector
+    connector.close()
+
+@pytest.fixture(autouse=True)
+def empty_bulk_items(db_connector):
+    """Start and finish every test with an empty bulk_items table."""
+    db_connector.execute_query("DELETE FROM bulk_items")
+    yield
+    db_connector.execute_query("DELETE FROM bulk_items")
+
+def count_items(db_connector):
+    return db_connector.execute_query("SELECT COUNT(*) AS n FROM bulk_items")[0]["n"]
+
+def test_transaction_commits_once_on_success(db_connector):
+    """Test that every statement in a transaction runs on one connection and is committed at the end."""
+    with db_connector.transaction():
+        conn = db_connector.get_connection()
+        db_connector.execute_query("INSERT INTO bulk_items (id, label) VALUES (?, ?)", (1, "a"))
+        db_connector.execute_query("INSERT INTO bulk_items (id, label) VALUES (?, ?)", (2, "b"))
+        assert db_connector.get_connection() is conn
+        assert db_connector.pool_stats()["in_use"] == 1
+    assert count_items(db_connector) == 2
+
+def test_transaction_rolls_back_on_error(db_connector):
+    """Test that an exception undoes every statement of the transaction."""
+    with pytest.raises(RuntimeError):
+        with db_connector.transaction():
+            db_connector.execute_query("INSERT INTO bulk_items (id, label) VALUES (?, ?)", (1, "a"))
+            raise RuntimeError("abort")
+    assert count_items(db_connector) == 0
+
+def test_nested_transaction_rolls_back_to_savepoint(db_connector):
+    """Test that a failing nested transaction only undoes its own statements."""
+    with db_connector.transaction():
+        db_connector.execute_query("INSERT INTO bulk_items (id, label) VALUES (?, ?)", (1, "kept"))
+        with pytest.raises(RuntimeError):
+            with db_connector.transaction():
+                db_connector.execute_query("INSERT INTO bulk_items (id, label) VALUES (?, ?)", (2, "undone"))
+                raise RuntimeError("abort inner")
+    result = db_connector.execute_query("SELECT label FROM bulk_items")
+    assert [row["label"] for row in result] == ["kept"]
+
+def test_session_commits_each_write(db_connector):
+    """Test that a session pins a connection but keeps per-statement commits."""
+    with pytest.raises(RuntimeError):
+        with db_connector.session():
+            db_connector.execute_query("INSERT INTO bulk_items (id, label) VALUES (?, ?)", (1, "a"))
+            raise RuntimeError("abort")
+    assert count_items(db_connector) == 1